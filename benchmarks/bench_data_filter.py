@@ -0,0 +1,67 @@
+"""
+Compares the row-wise and the vectorized DataFilter paths.
+
+Usage:
+    python -m benchmarks.bench_data_filter --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_filter import RedditCommentFilter, RedditPostFilter
+
+WORDS = np.array(
+    ["climate", "energy", "solar", "waste", "carbon", "policy", "city", "green"]
+)
+
+
+def make_data(size: int, seed: int = 0) -> pd.DataFrame:
+    """Builds a synthetic frame with the columns both filters look at."""
+    rng = np.random.default_rng(seed)
+    word_counts = rng.integers(1, 40, size)
+    text = [" ".join(rng.choice(WORDS, n)) for n in word_counts]
+    return pd.DataFrame(
+        {
+            "id": np.arange(size).astype(str),
+            "title": text,
+            "body": text,
+            "score": rng.integers(0, 30, size),
+            "num_comments": rng.integers(0, 10, size),
+            "sentiment_score": rng.uniform(-1, 1, size),
+        }
+    )
+
+
+def time_run(data_filter, data: pd.DataFrame) -> tuple[float, pd.DataFrame]:
+    start = time.perf_counter()
+    result = data_filter.run(data)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'filter':<20}{'rows':>10}{'row-wise':>12}{'vectorized':>12}{'speedup':>10}"
+    )
+    for size in args.sizes:
+        data = make_data(size)
+        for filter_cls in (RedditPostFilter, RedditCommentFilter):
+            row_time, expected = time_run(filter_cls(vectorized=False), data)
+            vec_time, result = time_run(filter_cls(vectorized=True), data)
+            pd.testing.assert_frame_equal(expected, result)
+            print(
+                f"{filter_cls.__name__:<20}{size:>10}{row_time:>11.3f}s"
+                f"{vec_time:>11.3f}s{row_time / vec_time:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
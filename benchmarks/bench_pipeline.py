@@ -0,0 +1,195 @@
+"""
+End-to-end benchmark of the pipeline stages on synthetic data.
+
+Replays synthetic posts and comments through the fetcher, cleaner,
+enricher, filter and database manager (on SQLite) at several scales and
+reports per-stage time, throughput and peak memory as JSON.
+
+Usage:
+    python -m benchmarks.bench_pipeline --sizes 1000 10000 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import pandas as pd
+
+from src.connection_pool import ConnectionPool
+from src.data_cleaner import RedditCommentCleaner, RedditPostCleaner
+from src.data_enricher import RedditCommentEnricher, RedditPostEnricher
+from src.data_filter import RedditCommentFilter, RedditPostFilter
+from src.database_manager import CommentDataBaseManager, PostDataBaseManager
+from src.replay_fetcher import (
+    ReplayFetcher,
+    TextDistribution,
+    synthetic_comments,
+    synthetic_posts,
+    write_jsonl,
+)
+
+SCHEMA = """
+CREATE TABLE posts (
+    id TEXT PRIMARY KEY, title TEXT, author TEXT, subreddit TEXT,
+    content TEXT, created_datetime TEXT, score INTEGER, num_comments INTEGER,
+    url TEXT, category TEXT, keyword TEXT, sentiment_score REAL
+);
+CREATE TABLE comments (
+    id TEXT PRIMARY KEY, post_id TEXT, author TEXT, subreddit TEXT, body TEXT,
+    score INTEGER, created_utc REAL, created_datetime TEXT, sentiment_score REAL
+);
+"""
+
+DATASETS = {
+    "posts": (
+        synthetic_posts,
+        RedditPostCleaner,
+        RedditPostEnricher,
+        RedditPostFilter,
+        PostDataBaseManager,
+    ),
+    "comments": (
+        synthetic_comments,
+        RedditCommentCleaner,
+        RedditCommentEnricher,
+        RedditCommentFilter,
+        CommentDataBaseManager,
+    ),
+}
+
+
+def run_stages(
+    dataset: str, path: str, size: int, db_url: str
+) -> tuple[list[tuple[str, Callable[[Any], Any]]], ConnectionPool]:
+    """
+    Returns the stages of a dataset as (name, function) in order, and the
+    connection pool to close afterwards.
+    """
+    _, cleaner, enricher, data_filter, db_manager = DATASETS[dataset]
+    pool = ConnectionPool(db_url)
+    fetcher = ReplayFetcher(path, size=size)
+    enricher = enricher()
+    manager = db_manager(pool)
+
+    def store(data: pd.DataFrame) -> pd.DataFrame:
+        manager.run(data)
+        return data
+
+    return [
+        ("fetch", lambda _: fetcher.run()),
+        ("frame", pd.DataFrame),
+        ("clean", cleaner().run),
+        ("enrich", enricher.run),
+        ("store", store),
+        ("filter", data_filter().run),
+    ], pool
+
+
+def measure(
+    dataset: str, path: str, size: int, db_url: str, trace_memory: bool
+) -> dict[str, dict[str, float]]:
+    """
+    Runs the stages once, returning their time, throughput and, with
+    `trace_memory`, their peak traced memory.
+    """
+    stages, pool = run_stages(dataset, path, size, db_url)
+    results = {}
+    data = None
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        for name, function in stages:
+            rows_in = 0 if data is None else len(data)
+            if trace_memory:
+                tracemalloc.reset_peak()
+            started = time.perf_counter()
+            data = function(data)
+            elapsed = time.perf_counter() - started
+            results[name] = {
+                "seconds": elapsed,
+                "rows_in": rows_in,
+                "rows_out": len(data),
+                "rows_per_second": max(rows_in, len(data)) / max(elapsed, 1e-9),
+            }
+            if trace_memory:
+                results[name]["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        pool.close()
+    return results
+
+
+def benchmark(
+    dataset: str, size: int, distribution: TextDistribution, trace_memory: bool
+) -> dict[str, Any]:
+    """Benchmarks one dataset at one scale on a fresh SQLite database."""
+    generate = DATASETS[dataset][0]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"{dataset}.jsonl")
+        write_jsonl(generate(size, distribution), path)
+
+        def fresh_db(name: str) -> str:
+            db_path = os.path.join(directory, f"{name}.sqlite")
+            with sqlite3.connect(db_path) as connection:
+                connection.executescript(SCHEMA)
+            connection.close()
+            return f"sqlite:///{db_path}"
+
+        # Timed without tracemalloc, which slows allocation-heavy stages.
+        stages = measure(dataset, path, size, fresh_db("timed"), False)
+        if trace_memory:
+            traced = measure(dataset, path, size, fresh_db("traced"), True)
+            for name, result in traced.items():
+                stages[name]["peak_memory_bytes"] = result["peak_memory_bytes"]
+
+    total = sum(stage["seconds"] for stage in stages.values())
+    return {
+        "dataset": dataset,
+        "rows": size,
+        "total_seconds": total,
+        "rows_per_second": size / max(total, 1e-9),
+        "stages": stages,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument(
+        "--datasets", nargs="+", choices=list(DATASETS), default=list(DATASETS)
+    )
+    parser.add_argument("--mean-words", type=float, default=25.0)
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the tracemalloc pass"
+    )
+    parser.add_argument("--output", help="JSON file, printed to stdout if omitted")
+    args = parser.parse_args()
+
+    distribution = TextDistribution(mean_words=args.mean_words)
+    report = {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "results": [
+            benchmark(dataset, size, distribution, not args.no_memory)
+            for size in args.sizes
+            for dataset in args.datasets
+        ],
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Reports the memory of the pipeline's DataFrames with and without the schema.
+
+Synthetic records are built into DataFrames as inferred by pandas and with
+`schema.POST_SCHEMA`/`COMMENT_SCHEMA` applied, then cleaned and enriched.
+The deep memory usage after every stage is printed for both.
+
+Usage:
+    python -m benchmarks.bench_schema --size 200000
+"""
+
+import argparse
+
+import pandas as pd
+
+from src.data_cleaner import RedditCommentCleaner, RedditPostCleaner
+from src.data_enricher import RedditCommentEnricher, RedditPostEnricher
+from src.replay_fetcher import synthetic_comments, synthetic_posts
+from src.schema import COMMENT_SCHEMA, POST_SCHEMA, apply_schema, memory_report
+from src.sentiment import LexiconBackend
+
+DATASETS = {
+    "posts": (synthetic_posts, POST_SCHEMA, RedditPostCleaner, RedditPostEnricher),
+    "comments": (
+        synthetic_comments,
+        COMMENT_SCHEMA,
+        RedditCommentCleaner,
+        RedditCommentEnricher,
+    ),
+}
+
+
+def stage_memory(data: pd.DataFrame, cleaner, enricher) -> dict[str, dict[str, int]]:
+    """Returns the memory report of the raw, cleaned and enriched data."""
+    reports = {"raw": memory_report(data)}
+    data = cleaner.run(data)
+    reports["cleaned"] = memory_report(data)
+    data = enricher.run(data)
+    reports["enriched"] = memory_report(data)
+    return reports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--columns", action="store_true", help="per-column sizes")
+    args = parser.parse_args()
+
+    # The lexicon backend keeps the run short, scores do not affect memory.
+    backend = LexiconBackend.from_textblob()
+    for dataset, (generate, schema, cleaner, enricher) in DATASETS.items():
+        records = list(generate(args.size))
+        inferred = stage_memory(
+            pd.DataFrame(records), cleaner(), enricher(sentiment_backend=backend)
+        )
+        compact = stage_memory(
+            apply_schema(pd.DataFrame(records), schema),
+            cleaner(),
+            enricher(sentiment_backend=backend),
+        )
+
+        print(f"{dataset} ({args.size} rows)")
+        print(f"  {'stage':<10}{'inferred MB':>14}{'schema MB':>12}{'ratio':>8}")
+        for stage in inferred:
+            before = inferred[stage]["total"]
+            after = compact[stage]["total"]
+            print(
+                f"  {stage:<10}{before / 2**20:>14.1f}{after / 2**20:>12.1f}"
+                f"{before / after:>7.1f}x"
+            )
+        if args.columns:
+            for column, before in inferred["enriched"].items():
+                after = compact["enriched"].get(column, 0)
+                print(f"    {column:<18}{before / 2**20:>10.2f}{after / 2**20:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
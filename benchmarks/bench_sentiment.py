@@ -0,0 +1,65 @@
+"""
+Compares the sentiment backends against TextBlob on throughput and agreement.
+
+Texts are synthetic comments run through the cleaner, like in the pipeline.
+Agreement is reported as the correlation with the TextBlob scores, the
+mean absolute difference and the share of texts with the same sign.
+
+Usage:
+    python -m benchmarks.bench_sentiment --size 20000 --vader vader_lexicon.txt
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_cleaner import RedditCleaner
+from src.replay_fetcher import synthetic_comments
+from src.sentiment import LexiconBackend, SentimentBackend, TextBlobBackend
+
+
+def make_texts(size: int, seed: int = 0) -> list[str]:
+    """Builds cleaned, non-empty synthetic comment texts."""
+    bodies = pd.Series([c["body"] for c in synthetic_comments(size, seed=seed)])
+    return [text for text in RedditCleaner._clean_texts(bodies) if text]
+
+
+def time_score(backend: SentimentBackend, texts: list[str]) -> tuple[float, np.ndarray]:
+    start = time.perf_counter()
+    scores = backend.score(texts)
+    return time.perf_counter() - start, scores
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=20_000)
+    parser.add_argument("--vader", help="VADER lexicon file to compare as well")
+    args = parser.parse_args()
+
+    texts = make_texts(args.size)
+    backends = [LexiconBackend.from_textblob()]
+    if args.vader:
+        backends.append(LexiconBackend.from_vader(args.vader))
+
+    reference_time, reference = time_score(TextBlobBackend(), texts)
+    print(
+        f"{'backend':<18}{'texts/s':>12}{'speedup':>10}"
+        f"{'corr':>8}{'mean |d|':>10}{'sign':>8}"
+    )
+    print(f"{'textblob':<18}{len(texts) / reference_time:>12.0f}{1:>9.1f}x")
+    for backend in backends:
+        elapsed, scores = time_score(backend, texts)
+        correlation = np.corrcoef(reference, scores)[0, 1]
+        difference = np.abs(reference - scores).mean()
+        same_sign = (np.sign(reference) == np.sign(scores)).mean()
+        print(
+            f"{backend.name:<18}{len(texts) / elapsed:>12.0f}"
+            f"{reference_time / elapsed:>9.1f}x{correlation:>8.3f}"
+            f"{difference:>10.3f}{same_sign:>8.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,541 @@
+import asyncio
+import inspect
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Collection,
+    Iterable,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+try:
+    import asyncpraw
+    import asyncprawcore
+except ImportError:  # pragma: no cover - optional dependency
+    asyncpraw = None
+    asyncprawcore = None
+
+from .data_fetcher import RedditPostFetcher, SearchCheckpoints
+from .data_processor import AsyncDataProcessor
+from .fetch_state import FetchStateStore
+from .rate_limiter import TokenBucket
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Returned by `_next` once an iterator is exhausted.
+_END = object()
+
+
+async def _aiter(items: Union[Iterable[T], AsyncIterable[T]]) -> AsyncIterator[T]:
+    """Iterates a synchronous or an asynchronous iterable asynchronously."""
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def _next(iterator: AsyncIterator[T]) -> Any:
+    """Returns the next item of an iterator, `_END` once it is exhausted."""
+    try:
+        return await anext(iterator)
+    except StopAsyncIteration:
+        return _END
+
+
+class AsyncRedditDataFetcher(AsyncDataProcessor):
+    """
+    Fetcher issuing its Reddit API requests with asyncpraw, so that one
+    event loop keeps up to `max_concurrency` of them in flight.
+    """
+
+    # Errors worth another attempt: network failures, 5xx and 429 responses.
+    _RETRYABLE_ERRORS: tuple[type[Exception], ...] = (
+        (
+            asyncprawcore.exceptions.RequestException,
+            asyncprawcore.exceptions.ServerError,
+            asyncprawcore.exceptions.TooManyRequests,
+        )
+        if asyncprawcore is not None
+        else ()
+    )
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        user_agent: str,
+        max_concurrency: int = 32,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        reddit_settings: Optional[dict[str, Any]] = None,
+        raise_errors: bool = False,
+    ) -> None:
+        """
+        Initializes the Fetcher object.
+
+        Parameters:
+        - client_id (str): Reddit API client ID
+        - client_secret (str): Reddit API client secret
+        - user_agent (str): Reddit API user agent string
+        - max_concurrency (int): Number of requests in flight at a time.
+        - rate_limiter (TokenBucket | None): Limiter shared by all fetchers
+        using the same API credentials.
+        - max_retries (int): Retries of a request after a transient error.
+        - retry_backoff (float): Seconds to wait before the first retry,
+        doubled for every further retry.
+        - reddit_settings (dict | None): Further asyncpraw settings, e.g. the
+        `oauth_url` and `reddit_url` of another server.
+        - raise_errors (bool): Raise requests that failed for good rather
+        than log them and go on without their records.
+
+        Returns:
+        - None
+        """
+        super().__init__()
+        self._credentials = {
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "user_agent": user_agent,
+            **(reddit_settings or {}),
+        }
+        # Created on first use, asyncpraw binds its session to the loop.
+        self._reddit: Optional[Any] = None
+        self._max_concurrency = max_concurrency
+        self._rate_limiter = rate_limiter
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+        self._raise_errors = raise_errors
+
+    def _client(self) -> "asyncpraw.Reddit":
+        """Returns the Reddit instance shared by all requests of the fetcher."""
+        if asyncpraw is None:
+            raise ImportError(
+                "The async fetchers require asyncpraw, install it with "
+                "`pip install asyncpraw`"
+            )
+        if self._reddit is None:
+            self._reddit = asyncpraw.Reddit(**self._credentials)
+        return self._reddit
+
+    async def _request(self, request: Callable[[], Awaitable[R]], cost: int = 1) -> R:
+        """
+        Runs an API request under the rate limit, retrying transient errors
+        with exponential backoff.
+
+        Args:
+        - request (Callable): Coroutine function performing the request(s).
+        - cost (int): Number of API calls the request makes.
+
+        Returns:
+        - The result of `request`.
+        """
+        for attempt in range(self._max_retries + 1):
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire_async(cost)
+            try:
+                return await request()
+            except self._RETRYABLE_ERRORS as e:
+                if attempt == self._max_retries:
+                    raise
+                delay = self._retry_backoff * 2**attempt
+                self._logger.warning(f"Request failed ({e}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+
+    async def _map_concurrently(
+        self,
+        function: Callable[[T], Awaitable[R]],
+        items: Union[Iterable[T], AsyncIterable[T]],
+    ) -> AsyncIterator[R]:
+        """
+        Applies `function` to every item, with at most `max_concurrency`
+        calls in flight, and yields the results as soon as they complete.
+
+        Items are consumed lazily and may be produced while earlier ones
+        are processed, e.g. post IDs from another pipeline.
+
+        Args:
+        - function (Callable): Coroutine function to apply.
+        - items (Iterable | AsyncIterable): Items to process.
+
+        Returns:
+        - AsyncIterator: Results in completion order.
+        """
+        iterator = _aiter(items)
+        next_item: Optional[asyncio.Future] = asyncio.ensure_future(_next(iterator))
+        pending: set[asyncio.Future] = set()
+        try:
+            while next_item is not None or pending:
+                waiting = set(pending)
+                if next_item is not None and len(pending) < self._max_concurrency:
+                    waiting.add(next_item)
+                done, _ = await asyncio.wait(
+                    waiting, return_when=asyncio.FIRST_COMPLETED
+                )
+                if next_item in done:
+                    done.remove(next_item)
+                    item = next_item.result()
+                    if item is _END:
+                        next_item = None
+                    else:
+                        pending.add(asyncio.ensure_future(function(item)))
+                        next_item = asyncio.ensure_future(_next(iterator))
+                for future in done:
+                    pending.remove(future)
+                    yield future.result()
+        finally:
+            for future in (*pending, next_item):
+                if future is not None:
+                    future.cancel()
+
+    async def stream(self) -> AsyncIterator[dict[str, Any]]:
+        """
+        Yields the fetched records one by one.
+
+        Returns:
+        - AsyncIterator[dict[str, Any]]: Fetched records.
+        """
+        for record in await self.run():
+            yield record
+
+    def committed(self, keys: list[str]) -> None:
+        """
+        Called by the pipeline, on an executor, once all records of the
+        given keys were stored, see `RedditDataFetcher.committed`.
+        """
+
+    async def close(self) -> None:
+        """Closes the HTTP session of the fetcher."""
+        if self._reddit is not None:
+            await self._reddit.close()
+            self._reddit = None
+
+
+class AsyncRedditCommentFetcher(AsyncRedditDataFetcher):
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        user_agent: str,
+        more_comments_limit: Optional[int],
+        post_ids: Union[Iterable[str], AsyncIterable[str]],
+        max_concurrency: int = 32,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        num_comments: Optional[dict[str, int]] = None,
+        fetch_state: Optional[FetchStateStore] = None,
+        reddit_settings: Optional[dict[str, Any]] = None,
+        completed_post_ids: Optional[Collection[str]] = None,
+        raise_errors: bool = False,
+    ) -> None:
+        """
+        Initializes the CommentFetcher object.
+
+        Parameters:
+        - client_id (str): Reddit API client ID
+        - client_secret (str): Reddit API client secret
+        - user_agent (str): Reddit API user agent string
+        - more_comments_limit (int | None): The limit for fetching more
+        comments.
+        - post_ids (Iterable[str] | AsyncIterable[str]): Post IDs, consumed
+        lazily.
+        - max_concurrency (int): Number of posts fetched concurrently.
+        - rate_limiter (TokenBucket | None): Shared API rate limiter.
+        - max_retries (int): Retries per post after a transient error.
+        - retry_backoff (float): Initial retry delay in seconds.
+        - num_comments (dict[str, int] | None): Current number of comments
+        per post ID.
+        - fetch_state (FetchStateStore | None): Store of previous fetches,
+        posts whose number of comments did not change are skipped. A post
+        is recorded once its comments were stored, see `committed`.
+        - reddit_settings (dict | None): Further asyncpraw settings.
+        - completed_post_ids (Collection[str] | None): Posts whose comments
+        a checkpointed run already stored, they are skipped.
+        - raise_errors (bool): Raise errors fetching a post rather than skip
+        the post.
+
+        Returns:
+        - None
+        """
+        super().__init__(
+            client_id,
+            client_secret,
+            user_agent,
+            max_concurrency=max_concurrency,
+            rate_limiter=rate_limiter,
+            max_retries=max_retries,
+            retry_backoff=retry_backoff,
+            reddit_settings=reddit_settings,
+            raise_errors=raise_errors,
+        )
+        self._post_ids = post_ids
+        self._more_comments_limit = more_comments_limit
+        self._num_comments = num_comments
+        self._fetch_state = fetch_state
+        self._completed_post_ids = completed_post_ids or ()
+
+    async def _changed_post_ids(self) -> AsyncIterator[str]:
+        """
+        Yields the IDs of the posts whose number of comments changed since
+        their comments were last fetched.
+        """
+        skipped = 0
+        async for post_id in _aiter(self._post_ids):
+            if post_id in self._completed_post_ids:
+                continue
+            if self._fetch_state is not None and self._num_comments is not None:
+                # SQLite blocks, it is queried off the loop.
+                fetched_count = await asyncio.to_thread(
+                    self._fetch_state.get_comment_counts, [post_id]
+                )
+                if fetched_count.get(post_id) == self._num_comments.get(post_id):
+                    skipped += 1
+                    continue
+            yield post_id
+        if self._fetch_state is not None and self._num_comments is not None:
+            self._logger.info(f"Skipped {skipped} posts without new comments")
+
+    async def _fetch_post_comments(self, post_id: str) -> list[dict[str, Any]]:
+        """
+        Fetches all comments of a single post.
+
+        Args:
+            post_id (str): ID of the post.
+
+        Returns:
+            list[dict[str, Any]]: Comment data, empty if the post could
+            not be fetched.
+        """
+
+        async def request() -> list[dict[str, Any]]:
+            post = await self._client().submission(id=post_id)
+            await post.comments.replace_more(limit=self._more_comments_limit)
+            comments = post.comments.list()
+            # A coroutine in older asyncpraw releases.
+            if inspect.isawaitable(comments):
+                comments = await comments
+            return [
+                {
+                    "id": comment.id,
+                    "post_id": post_id,
+                    "author": getattr(comment.author, "name", None),
+                    "subreddit": post.subreddit.display_name,
+                    "body": comment.body,
+                    "score": comment.score,
+                    "created_utc": comment.created_utc,
+                }
+                for comment in comments
+            ]
+
+        try:
+            comments = await self._request(
+                request, cost=1 + (self._more_comments_limit or 0)
+            )
+        except self._RETRYABLE_ERRORS as e:
+            if self._raise_errors:
+                raise
+            self._logger.error(f"Error fetching comments of post {post_id}: {e}")
+            return []
+
+        if not comments:
+            # Nothing to store, the post is not passed to `committed`.
+            await asyncio.to_thread(self.committed, [post_id])
+        return comments
+
+    def committed(self, keys: list[str]) -> None:
+        """Records the comment counts of the posts whose comments were stored."""
+        if self._fetch_state is None or self._num_comments is None:
+            return
+        for post_id in keys:
+            num_comments = self._num_comments.get(post_id)
+            if num_comments is not None:
+                self._fetch_state.update_comment_count(post_id, num_comments)
+
+    async def stream(self) -> AsyncIterator[dict[str, Any]]:
+        """
+        Fetches comments for Reddit posts, yielding the comments of each
+        post as soon as it has been fetched.
+
+        Returns:
+            AsyncIterator[dict[str, Any]]: Comment data.
+        """
+        self._logger.info("Fetching Comment Data...")
+        fetched = 0
+        async for comments in self._map_concurrently(
+            self._fetch_post_comments, self._changed_post_ids()
+        ):
+            fetched += len(comments)
+            for comment in comments:
+                yield comment
+        self._logger.info(f"Fetched Data: #{fetched}")
+
+    async def run(self) -> list[dict[str, Any]]:
+        """
+        Fetches comments for Reddit posts, grouped by post in the order the
+        posts finished.
+
+        Returns:
+            list[dict[str, Any]]: List of dictionaries containing comment data.
+        """
+        return [comment async for comment in self.stream()]
+
+
+class AsyncRedditPostFetcher(AsyncRedditDataFetcher):
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        user_agent: str,
+        categories: dict[str, dict[str, list[str]]],
+        post_limit: int,
+        time_filter: str,
+        sort_filter: str,
+        max_concurrency: int = 32,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        fetch_state: Optional[FetchStateStore] = None,
+        reddit_settings: Optional[dict[str, Any]] = None,
+        completed_post_ids: Optional[Collection[str]] = None,
+        raise_errors: bool = False,
+    ) -> None:
+        """
+        Initializes the PostFetcher object.
+
+        Parameters:
+        - client_id (str): Reddit API client ID
+        - client_secret (str): Reddit API client secret
+        - user_agent (str): Reddit API user agent string
+        - categories (dict): Subreddits and keywords per category.
+        - post_limit (int): Number of posts to fetch per keyword.
+        - time_filter (str): Time window of the searches.
+        - sort_filter (str): Sort order of the searches.
+        - max_concurrency (int): Number of searches run concurrently.
+        - rate_limiter (TokenBucket | None): Shared API rate limiter.
+        - max_retries (int): Retries per search after a transient error.
+        - retry_backoff (float): Initial retry delay in seconds.
+        - fetch_state (FetchStateStore | None): Store of previous fetches,
+        posts already found by a search are not returned again. A search is
+        recorded once all posts it found were stored, see `committed`.
+        - reddit_settings (dict | None): Further asyncpraw settings.
+        - completed_post_ids (Collection[str] | None): Posts a checkpointed
+        run already stored, they are not returned again.
+        - raise_errors (bool): Raise errors of a search rather than go on
+        without its posts.
+
+        Returns:
+        - None
+        """
+        super().__init__(
+            client_id,
+            client_secret,
+            user_agent,
+            max_concurrency=max_concurrency,
+            rate_limiter=rate_limiter,
+            max_retries=max_retries,
+            retry_backoff=retry_backoff,
+            reddit_settings=reddit_settings,
+            raise_errors=raise_errors,
+        )
+        self._categories = categories
+        self._post_limit = post_limit
+        self._time_filter = time_filter
+        self._sort_filter = sort_filter
+        self._searches = SearchCheckpoints(fetch_state, sort_filter, completed_post_ids)
+
+    async def _search(
+        self, task: tuple[int, tuple[str, str, str]]
+    ) -> tuple[int, list[dict[str, Any]]]:
+        """
+        Runs a single keyword search in a subreddit.
+
+        Args:
+            task (tuple): Index of the search and its (category, subreddit,
+            keyword).
+
+        Returns:
+            tuple[int, list[dict[str, Any]]]: Index of the search and the
+            data of the posts it found.
+        """
+        index, (category, subreddit, keyword) = task
+        # SQLite blocks, the fetch state is used off the loop.
+        checkpoint = await asyncio.to_thread(self._searches.get, subreddit, keyword)
+
+        async def request() -> list[Any]:
+            submissions = []
+            listing = await self._client().subreddit(subreddit)
+            async for submission in listing.search(
+                keyword,
+                sort=self._sort_filter,
+                time_filter=self._time_filter,
+                limit=self._post_limit,
+            ):
+                if self._searches.seen(submission, checkpoint):
+                    if self._searches.newest_first:
+                        break
+                    continue
+                submissions.append(submission)
+            return submissions
+
+        try:
+            # Listings are paged by 100 submissions per request.
+            submissions = await self._request(
+                request, cost=max(1, -(-(self._post_limit or 0) // 100))
+            )
+        except Exception as e:
+            if self._raise_errors:
+                raise
+            self._logger.error(
+                f"Error fetching {keyword} in subreddit: {subreddit}: {e}"
+            )
+            return index, []
+
+        posts = [
+            RedditPostFetcher._post_record(submission, category, keyword)
+            for submission in submissions
+        ]
+        return index, await asyncio.to_thread(
+            self._searches.found, subreddit, keyword, posts
+        )
+
+    def committed(self, keys: list[str]) -> None:
+        """Records the searches whose posts, by ID, all were stored."""
+        self._searches.committed(keys)
+
+    async def run(self) -> list[dict[str, Any]]:
+        """
+        Fetches Reddit posts based on keywords, all searches concurrently
+        up to `max_concurrency`. Posts found by several searches are
+        returned once.
+
+        Returns:
+            list[dict[str, any]]: List of dictionaries containing post data.
+        """
+        self._logger.info("Fetching Post data...")
+        tasks = [
+            (category, subreddit, keyword)
+            for category, settings in self._categories.items()
+            for subreddit in settings["subreddits"]
+            for keyword in settings["keywords"]
+        ]
+        results: list[list[dict[str, Any]]] = [[] for _ in tasks]
+        async for index, posts in self._map_concurrently(
+            self._search, enumerate(tasks)
+        ):
+            results[index] = posts
+
+        posts = RedditPostFetcher._merge_matches(results)
+        duplicates = sum(map(len, results)) - len(posts)
+        self._logger.info(
+            f"Fetched Data: #{len(posts)} ({duplicates} duplicate matches merged)"
+        )
+        return posts
@@ -0,0 +1,218 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from itertools import chain
+from typing import Any, AsyncIterator, Callable, Optional, Union
+
+import numpy as np
+from pandas import DataFrame
+from sqlalchemy import URL, make_url
+
+try:
+    import aiomysql
+except ImportError:  # pragma: no cover - optional dependency
+    aiomysql = None
+
+from .change_detector import ChangeDetector
+from .database_manager import (
+    CommentDataBaseManager,
+    DatabaseManager,
+    PostDataBaseManager,
+)
+
+
+class AsyncConnectionPool:
+    """
+    Pool of aiomysql connections shared by the async database managers,
+    the counterpart of `ConnectionPool` for the async pipeline mode.
+    """
+
+    dialect = "mysql"
+    placeholder = "%s"
+
+    def __init__(
+        self, db_url: Union[str, URL], pool_size: int = 10, pool_recycle: int = 3600
+    ) -> None:
+        """
+        Initializes the AsyncConnectionPool object, `open` connects it.
+
+        Parameters:
+        - db_url (str | URL): SQLAlchemy URL of the MySQL database.
+        - pool_size (int): Number of connections, i.e. writes in flight.
+        - pool_recycle (int): Seconds after which a connection is replaced.
+
+        Returns:
+        - None
+        """
+        if aiomysql is None:
+            raise ImportError(
+                "AsyncConnectionPool requires aiomysql, install it with "
+                "`pip install aiomysql`"
+            )
+        self._url = make_url(db_url)
+        self._pool_size = pool_size
+        self._pool_recycle = pool_recycle
+        self._pool: Optional[Any] = None
+        self.checkouts = 0
+        self.wait_time = 0.0
+
+    async def open(self) -> None:
+        """Connects the pool, on the loop it is used from."""
+        self._pool = await aiomysql.create_pool(
+            host=self._url.host or "localhost",
+            port=self._url.port or 3306,
+            user=self._url.username,
+            password=self._url.password or "",
+            db=self._url.database,
+            minsize=1,
+            maxsize=self._pool_size,
+            pool_recycle=self._pool_recycle,
+            charset="utf8mb4",
+        )
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[Any]:
+        """
+        Checks out a connection and returns it to the pool afterwards.
+
+        Returns:
+        - AsyncIterator[Any]: The checked out connection.
+        """
+        started = time.perf_counter()
+        async with self._pool.acquire() as connection:
+            self.checkouts += 1
+            self.wait_time += time.perf_counter() - started
+            yield connection
+
+    def metrics(self) -> dict[str, Any]:
+        """Returns the number of checkouts and the mean wait for a connection."""
+        return {
+            "checkouts": self.checkouts,
+            "mean_wait_time": self.wait_time / self.checkouts if self.checkouts else 0,
+        }
+
+    def close(self) -> None:
+        """Starts closing the connections, see `wait_closed`."""
+        if self._pool is not None:
+            self._pool.close()
+
+    async def wait_closed(self) -> None:
+        """Waits until all connections are closed."""
+        if self._pool is not None:
+            await self._pool.wait_closed()
+
+
+class AsyncDatabaseManager(DatabaseManager):
+    """
+    Database manager writing from an event loop: its batches are upserted
+    concurrently, up to one per connection of the pool. The rows are
+    prepared on an executor, as that is CPU-bound.
+
+    The pool hands out connections with aiomysql's interface: coroutine
+    `commit` and `rollback`, and cursors used as async context managers
+    with coroutine `execute` and `fetchall`.
+    """
+
+    def __init__(
+        self,
+        pool: AsyncConnectionPool,
+        batch_size: int = 1000,
+        change_detector: Optional[ChangeDetector] = None,
+        sentiment_scorer: Optional[Callable[[DataFrame, np.ndarray], None]] = None,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        Initializes the AsyncDatabaseManager object.
+
+        Parameters:
+        - pool (AsyncConnectionPool): Connection pool shared with the other
+        database managers.
+        - batch_size (int): Rows per INSERT statement and transaction.
+        - change_detector (ChangeDetector | None): Index of the stored rows,
+        rows that did not change since they were stored are not sent again.
+        - sentiment_scorer (Callable | None): Scores the sentiment of the
+        rows written, see `DatabaseManager`.
+        - executor (Executor | None): Executor the rows are prepared on, the
+        loop's default executor if None.
+        """
+        super().__init__(
+            pool,
+            batch_size=batch_size,
+            change_detector=change_detector,
+            sentiment_scorer=sentiment_scorer,
+        )
+        self._executor = executor
+
+    async def _load_change_index_async(self) -> None:
+        """
+        Loads the change detection index from its snapshot, or else from the
+        mutable columns of the stored rows.
+        """
+        if self._change_detector.load_snapshot():
+            return
+        columns = ", ".join(("id",) + self._update_columns)
+        async with self._pool.connection() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(f"SELECT {columns} FROM {self._table}")
+                rows = await cursor.fetchall()
+        self._change_detector.load(
+            DataFrame(list(rows), columns=["id", *self._update_columns])
+        )
+        self._logger.info(
+            f"Loaded {len(self._change_detector)} {self._table} into the change index"
+        )
+
+    async def _write_batch(
+        self, batch: DataFrame, keys: Optional[Any], hashes: Optional[Any]
+    ) -> None:
+        """Upserts a batch in one transaction."""
+        columns = [self._column_values(batch, column) for column in self._columns]
+        params = list(chain.from_iterable(zip(*columns)))
+        started = time.perf_counter()
+        async with self._pool.connection() as connection:
+            try:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(self._upsert_query(len(batch)), params)
+                await connection.commit()
+            except Exception:
+                await connection.rollback()
+                raise
+        if keys is not None:
+            self._change_detector.record(keys, hashes)
+        elapsed = time.perf_counter() - started
+        self._logger.info(
+            f"Stored {len(batch)} rows in {self._table} "
+            f"({len(batch) / max(elapsed, 1e-9):.0f} rows/s)"
+        )
+
+    async def run(self, data: DataFrame) -> None:
+        """Upserts the rows of a DataFrame, see `DatabaseManager`."""
+        if data.empty:
+            return
+        if self._change_detector is not None and not self._change_detector.loaded:
+            await self._load_change_index_async()
+        loop = asyncio.get_running_loop()
+        data, keys, hashes = await loop.run_in_executor(
+            self._executor, self._changed_rows, data
+        )
+        await asyncio.gather(
+            *(
+                self._write_batch(
+                    data.iloc[start : start + self._batch_size],
+                    None if keys is None else keys[start : start + self._batch_size],
+                    None
+                    if hashes is None
+                    else hashes[start : start + self._batch_size],
+                )
+                for start in range(0, len(data), self._batch_size)
+            )
+        )
+
+
+class AsyncCommentDataBaseManager(AsyncDatabaseManager, CommentDataBaseManager):
+    """Upserts Reddit comments from an event loop."""
+
+
+class AsyncPostDataBaseManager(AsyncDatabaseManager, PostDataBaseManager):
+    """Upserts Reddit posts from an event loop."""
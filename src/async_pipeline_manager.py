@@ -0,0 +1,252 @@
+import asyncio
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
+from pandas import DataFrame
+
+from .async_data_fetcher import AsyncRedditDataFetcher
+from .async_database_manager import AsyncDatabaseManager
+from .data_cleaner import RedditCleaner
+from .data_enricher import DataEnricher
+from .data_filter import DataFilter
+from .data_processor import AsyncDataProcessor
+from .logger import setup_logger
+from .near_duplicate_filter import NearDuplicateFilter
+from .pipeline_graph import DEFAULT_DEFINITION, SOURCE, PipelineGraph
+from .pipeline_manager import chunk_keys
+from .schema import apply_schema, concat
+
+
+@dataclass
+class _Write:
+    """A chunk being stored."""
+
+    task: asyncio.Task
+    filtered: DataFrame
+    # Checkpoint keys of the chunk, and those whose records all are in this
+    # chunk or an earlier one.
+    keys: list[str]
+    completed_keys: list[str]
+
+
+class AsyncPipelineManager:
+    """
+    Pipeline run on an event loop, the async counterpart of
+    `PipelineManager`.
+
+    The fetcher and the database manager are `AsyncDataProcessor`s, so many
+    requests and writes are in flight at once. The CPU-bound stages of the
+    graph run on an executor, meanwhile the loop keeps the requests and
+    writes going. Up to `max_pending_writes` chunks are being stored while
+    the next ones are fetched and processed.
+    """
+
+    def __init__(
+        self,
+        fetcher: AsyncRedditDataFetcher,
+        cleaner: RedditCleaner,
+        enricher: DataEnricher,
+        filter: DataFilter,
+        db_manager: AsyncDatabaseManager,
+        chunk_size: Optional[int] = None,
+        max_pending_writes: int = 4,
+        executor: Optional[Executor] = None,
+        name: str = "pipeline",
+        schema: Optional[dict[str, Any]] = None,
+        deduplicator: Optional[NearDuplicateFilter] = None,
+        graph: Optional[dict[str, Any]] = None,
+        processors: Optional[dict[str, Any]] = None,
+        checkpoint_key: Optional[str] = None,
+        raise_store_errors: bool = False,
+    ) -> None:
+        """
+        Initializes an AsyncPipelineManager object.
+
+        Parameters:
+        - fetcher (AsyncRedditDataFetcher): Fetches the records, anything
+        with an async `stream` of records.
+        - cleaner (RedditCleaner): Cleans the fetched records.
+        - enricher (DataEnricher): Enriches the cleaned records.
+        - filter (DataFilter): Selects the valuable enriched records.
+        - db_manager (AsyncDatabaseManager): Stores the enriched records.
+        - chunk_size (int | None): Number of fetched records processed and
+        stored at a time, None to process the whole fetch at once.
+        - max_pending_writes (int): Chunks stored concurrently.
+        - executor (Executor | None): Executor the blocking stages run on,
+        the loop's default executor if None.
+        - name (str): Name of the pipeline in the logs.
+        - schema (dict[str, Any] | None): dtype per column applied to the
+        fetched records, see `schema.POST_SCHEMA`.
+        - deduplicator (NearDuplicateFilter | None): Drops near-duplicates of
+        the cleaned records before they are enriched.
+        - graph (dict[str, Any] | None): Declarative definition of the
+        stages run on every chunk, see `PipelineGraph.from_definition`.
+        - processors (dict[str, DataProcessor | AsyncDataProcessor] | None):
+        Further processors the graph can run, by name. Async processors are
+        awaited on the loop, the others run on the executor.
+        - checkpoint_key (str | None): Column whose values a run completes
+        in order, e.g. "post_id" of the comments. Once the last record of a
+        key was stored, the key is passed to the fetcher's `committed`,
+        keys of a chunk that failed to store never are.
+        - raise_store_errors (bool): Stop the run on a failed store rather
+        than log it and go on with the next chunk.
+        """
+        self._logger = setup_logger("EcoPulse")
+        self._fetcher = fetcher
+        self._db_manager = db_manager
+        self._chunk_size = chunk_size
+        self._max_pending_writes = max_pending_writes
+        self._executor = executor
+        self._name = name
+        self._schema = schema
+        self._checkpoint_key = checkpoint_key
+        self._raise_store_errors = raise_store_errors
+        self._graph = PipelineGraph.from_definition(
+            graph or DEFAULT_DEFINITION,
+            {
+                "cleaner": cleaner,
+                "deduplicator": deduplicator,
+                "enricher": enricher,
+                "filter": filter,
+                **(processors or {}),
+            },
+        )
+
+    async def _run_processor(self, processor: Any, data: DataFrame) -> DataFrame:
+        """Awaits an async processor, runs a blocking one on the executor."""
+        if isinstance(processor, AsyncDataProcessor):
+            return await processor.run(data)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, processor.run, data)
+
+    def _frame(self, records: list[dict[str, Any]], offset: int) -> DataFrame:
+        """Builds the DataFrame of a chunk of fetched records."""
+        # Continue the index across chunks so that rows stay unique.
+        data = DataFrame(records, index=range(offset, offset + len(records)))
+        if self._schema is not None:
+            data = apply_schema(data, self._schema)
+        return data
+
+    async def _raw_chunks(self) -> AsyncIterator[DataFrame]:
+        """
+        Groups the fetched records into chunks.
+
+        Returns:
+            AsyncIterator[DataFrame]: Fetched records per chunk.
+        """
+        loop = asyncio.get_running_loop()
+        records: list[dict[str, Any]] = []
+        offset = 0
+        async for record in self._fetcher.stream():
+            records.append(record)
+            if self._chunk_size is not None and len(records) == self._chunk_size:
+                yield await loop.run_in_executor(
+                    self._executor, self._frame, records, offset
+                )
+                offset += len(records)
+                records = []
+        if records:
+            yield await loop.run_in_executor(
+                self._executor, self._frame, records, offset
+            )
+        elif not offset:
+            self._logger.info("No new data fetched")
+
+    async def _transform(self, data: DataFrame) -> tuple[DataFrame, DataFrame]:
+        """
+        Runs the stages of the graph on a batch of fetched records.
+
+        Returns:
+            tuple[DataFrame, DataFrame]: The records to store and the ones
+            that passed the filter.
+        """
+        outputs = {SOURCE: data}
+        for node in self._graph.nodes:
+            outputs[node.name] = await self._run_processor(
+                node.processor, outputs[node.input]
+            )
+        return outputs[self._graph.store], outputs[self._graph.output]
+
+    async def _store(self, data: DataFrame) -> bool:
+        """Stores a batch of enriched records, returns whether it succeeded."""
+        try:
+            await self._db_manager.run(data)
+        except Exception as e:
+            if self._raise_store_errors:
+                raise
+            self._logger.error(f"Error occurred while storing {self._name}: {e}")
+            return False
+        return True
+
+    async def _commit(self, keys: list[str]) -> None:
+        """Passes the keys whose records all were stored to the fetcher."""
+        keys = [key for key in keys if key not in self._failed_keys]
+        if keys:
+            # The fetch state is SQLite, it blocks.
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, self._fetcher.committed, keys)
+
+    async def _stored(self, write: _Write) -> DataFrame:
+        """Waits for a chunk to be stored and commits its keys."""
+        if await write.task:
+            await self._commit(write.completed_keys)
+        else:
+            self._failed_keys.update(write.keys)
+        return write.filtered
+
+    async def stream(self) -> AsyncIterator[DataFrame]:
+        """
+        Runs the pipeline chunk by chunk, yielding the filtered records of
+        each chunk, in order, once it has been stored.
+
+        Returns:
+            AsyncIterator[DataFrame]: Filtered records per chunk.
+        """
+        writes: deque[_Write] = deque()
+        pending_key: Optional[str] = None
+        self._failed_keys: set[str] = set()
+        try:
+            async for raw_data in self._raw_chunks():
+                keys: list[str] = []
+                completed: list[str] = []
+                if self._checkpoint_key is not None:
+                    keys, completed, pending_key = chunk_keys(
+                        raw_data, self._checkpoint_key, pending_key
+                    )
+                stored, filtered = await self._transform(raw_data)
+                writes.append(
+                    _Write(
+                        asyncio.create_task(self._store(stored)),
+                        filtered,
+                        keys,
+                        completed,
+                    )
+                )
+                while writes and (
+                    len(writes) > self._max_pending_writes or writes[0].task.done()
+                ):
+                    yield await self._stored(writes.popleft())
+            while writes:
+                yield await self._stored(writes.popleft())
+            if pending_key is not None:
+                await self._commit([pending_key])
+        finally:
+            for write in writes:
+                write.task.cancel()
+
+    async def run(self) -> DataFrame:
+        """
+        Runs the pipeline to fetch, clean and store data from Reddit.
+
+        Returns:
+            DataFrame: The records that passed the filter.
+        """
+        filtered_chunks = [chunk async for chunk in self.stream()]
+        self._logger.info("Pipeline executed!")
+        if not filtered_chunks:
+            return DataFrame()
+        if len(filtered_chunks) == 1:
+            return filtered_chunks[0]
+        return concat(filtered_chunks)
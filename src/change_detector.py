@@ -0,0 +1,140 @@
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+class ChangeDetector:
+    """
+    Index of the rows already stored, used to skip no-op upserts.
+
+    Every row is kept as two 64-bit hashes, one of its ID and one of its
+    mutable columns, in sorted NumPy arrays. A row is sent to the database
+    only if its ID is unknown or the hash of its mutable columns differs.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None) -> None:
+        """
+        Initializes the ChangeDetector object.
+
+        Parameters:
+        - snapshot_path (str | None): `.npz` file the index is loaded from and
+        saved to. A snapshot is only accurate while the pipeline is the sole
+        writer of the table; without one the index is loaded from the table.
+
+        Returns:
+        - None
+        """
+        self._snapshot_path = snapshot_path
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._values = np.empty(0, dtype=np.uint64)
+        self._pending: list[tuple[np.ndarray, np.ndarray]] = []
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def hash_ids(ids: pd.Series) -> np.ndarray:
+        """Returns a 64-bit hash per ID."""
+        return pd.util.hash_pandas_object(
+            ids.astype(str), index=False, categorize=False
+        ).to_numpy()
+
+    @staticmethod
+    def hash_values(values: pd.DataFrame) -> np.ndarray:
+        """
+        Returns a 64-bit hash per row of the mutable (numeric) columns. They
+        are hashed as floats so values read back from the database match.
+        """
+        return pd.util.hash_pandas_object(
+            values.astype("float64"), index=False
+        ).to_numpy()
+
+    def load(self, rows: pd.DataFrame) -> None:
+        """
+        Builds the index from stored rows, an `id` column followed by the
+        mutable columns.
+        """
+        keys = self.hash_ids(rows["id"])
+        values = self.hash_values(rows.drop(columns="id"))
+        order = np.argsort(keys, kind="stable")
+        with self._lock:
+            self._keys, self._values = keys[order], values[order]
+            self._pending.clear()
+            self.loaded = True
+
+    def load_snapshot(self) -> bool:
+        """
+        Loads the index from the snapshot file.
+
+        Returns:
+        - bool: Whether a snapshot existed.
+        """
+        if self._snapshot_path is None or not os.path.exists(self._snapshot_path):
+            return False
+        with np.load(self._snapshot_path) as snapshot:
+            keys, values = snapshot["keys"], snapshot["values"]
+        with self._lock:
+            self._keys, self._values = keys, values
+            self._pending.clear()
+            self.loaded = True
+        return True
+
+    def save_snapshot(self) -> None:
+        """Writes the index to the snapshot file, if one is configured."""
+        if self._snapshot_path is None:
+            return
+        with self._lock:
+            self._merge_pending()
+            np.savez(self._snapshot_path, keys=self._keys, values=self._values)
+
+    def classify(
+        self, ids: pd.Series, values: pd.DataFrame
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compares rows against the index.
+
+        Args:
+        - ids (pd.Series): Row IDs, without duplicates.
+        - values (pd.DataFrame): Mutable columns of the rows.
+
+        Returns:
+        - tuple: Masks of the new and the changed rows, and the ID and value
+        hashes to pass to `record` once the rows are stored.
+        """
+        keys = self.hash_ids(ids)
+        hashes = self.hash_values(values)
+        with self._lock:
+            self._merge_pending()
+            positions = np.searchsorted(self._keys, keys)
+            found = positions < len(self._keys)
+            found[found] = self._keys[positions[found]] == keys[found]
+            changed = found.copy()
+            changed[found] = self._values[positions[found]] != hashes[found]
+        return ~found, changed, keys, hashes
+
+    def record(self, keys: np.ndarray, hashes: np.ndarray) -> None:
+        """
+        Adds stored rows to the index. They are merged in on the next lookup,
+        so recording many small batches stays cheap.
+        """
+        with self._lock:
+            self._pending.append((keys, hashes))
+
+    def _merge_pending(self) -> None:
+        if not self._pending:
+            return
+        keys = np.concatenate([self._keys] + [keys for keys, _ in self._pending])
+        values = np.concatenate(
+            [self._values] + [values for _, values in self._pending]
+        )
+        self._pending.clear()
+        # Later entries win: keep the last occurrence of every key.
+        reversed_keys = keys[::-1]
+        unique, first = np.unique(reversed_keys, return_index=True)
+        self._keys = unique
+        self._values = values[::-1][first]
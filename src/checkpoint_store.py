@@ -0,0 +1,208 @@
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional
+
+from .logger import setup_logger
+
+
+class CheckpointStore:
+    """
+    Local SQLite store of the progress of a run, to resume it after a crash.
+
+    Per pipeline it records the batches committed to the database and the
+    keys, e.g. post IDs of a comment crawl, whose records all were
+    committed. A pipeline that finished is marked as such, and it can save
+    outputs that the next pipeline needs, e.g. the number of comments of
+    every post kept.
+
+    Every run has its own checkpoints. A new run starts from scratch, a
+    resumed one continues the last run that did not finish.
+    """
+
+    def __init__(self, path: str = "checkpoints.sqlite", resume: bool = False):
+        """
+        Initializes the CheckpointStore object.
+
+        Parameters:
+        - path (str): SQLite file holding the checkpoints.
+        - resume (bool): Continue the last unfinished run instead of
+        starting a new one.
+
+        Returns:
+        - None
+        """
+        self._logger = setup_logger("EcoPulse")
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS committed_batches (
+                run_id INTEGER NOT NULL,
+                pipeline TEXT NOT NULL,
+                batch INTEGER NOT NULL,
+                rows INTEGER NOT NULL,
+                committed_at REAL NOT NULL,
+                PRIMARY KEY (run_id, pipeline, batch)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS completed_keys (
+                run_id INTEGER NOT NULL,
+                pipeline TEXT NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (run_id, pipeline, key)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS outputs (
+                run_id INTEGER NOT NULL,
+                pipeline TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value INTEGER,
+                PRIMARY KEY (run_id, pipeline, key)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS finished_pipelines (
+                run_id INTEGER NOT NULL,
+                pipeline TEXT NOT NULL,
+                PRIMARY KEY (run_id, pipeline)
+            ) WITHOUT ROWID;
+            """
+        )
+        row = None
+        if resume:
+            row = self._connection.execute(
+                "SELECT id FROM runs WHERE finished_at IS NULL "
+                "ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self._logger.warning("No unfinished run to resume, starting a new one")
+        if row is None:
+            with self._connection:
+                cursor = self._connection.execute(
+                    "INSERT INTO runs (started_at) VALUES (?)", (time.time(),)
+                )
+            self.run_id = cursor.lastrowid
+        else:
+            self.run_id = row[0]
+            self._logger.info(f"Resuming run {self.run_id}")
+
+    def committed_batches(self, pipeline: str) -> set[int]:
+        """Returns the numbers of the batches a pipeline committed."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT batch FROM committed_batches WHERE run_id = ? AND pipeline = ?",
+                (self.run_id, pipeline),
+            ).fetchall()
+        return {batch for (batch,) in rows}
+
+    def next_batch(self, pipeline: str) -> int:
+        """Returns the number following the last batch a pipeline committed."""
+        return max(self.committed_batches(pipeline), default=-1) + 1
+
+    def completed_keys(self, pipeline: str) -> set[str]:
+        """Returns the keys whose records a pipeline all committed."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT key FROM completed_keys WHERE run_id = ? AND pipeline = ?",
+                (self.run_id, pipeline),
+            ).fetchall()
+        return {key for (key,) in rows}
+
+    def commit_batch(
+        self,
+        pipeline: str,
+        batch: int,
+        rows: int,
+        keys: Iterable[str] = (),
+        outputs: Optional[dict[str, int]] = None,
+    ) -> None:
+        """
+        Records a committed batch, the keys it completed and its outputs, in
+        one transaction.
+
+        Parameters:
+        - pipeline (str): Name of the pipeline.
+        - batch (int): Number of the batch within the run.
+        - rows (int): Number of rows stored.
+        - keys (Iterable[str]): Keys whose last records were in the batch.
+        - outputs (dict[str, int] | None): Outputs of the batch, see
+        `save_outputs`.
+
+        Returns:
+        - None
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO committed_batches VALUES (?, ?, ?, ?, ?)",
+                (self.run_id, pipeline, batch, rows, time.time()),
+            )
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO completed_keys VALUES (?, ?, ?)",
+                [(self.run_id, pipeline, key) for key in keys],
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?)",
+                [
+                    (self.run_id, pipeline, key, int(value))
+                    for key, value in (outputs or {}).items()
+                ],
+            )
+
+    def complete_keys(self, pipeline: str, keys: Iterable[str]) -> None:
+        """Records keys whose records were all committed."""
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO completed_keys VALUES (?, ?, ?)",
+                [(self.run_id, pipeline, key) for key in keys],
+            )
+
+    def save_outputs(self, pipeline: str, values: dict[str, int]) -> None:
+        """Saves outputs of a pipeline, e.g. comment counts by post ID."""
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?)",
+                [
+                    (self.run_id, pipeline, key, int(value))
+                    for key, value in values.items()
+                ],
+            )
+
+    def outputs(self, pipeline: str) -> dict[str, int]:
+        """Returns the outputs a pipeline saved in this run."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT key, value FROM outputs WHERE run_id = ? AND pipeline = ?",
+                (self.run_id, pipeline),
+            ).fetchall()
+        return dict(rows)
+
+    def finish_pipeline(self, pipeline: str) -> None:
+        """Marks a pipeline as finished."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO finished_pipelines VALUES (?, ?)",
+                (self.run_id, pipeline),
+            )
+
+    def pipeline_finished(self, pipeline: str) -> bool:
+        """Returns whether a pipeline finished in this run."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM finished_pipelines WHERE run_id = ? AND pipeline = ?",
+                (self.run_id, pipeline),
+            ).fetchone()
+        return row is not None
+
+    def finish(self) -> None:
+        """Marks the run as finished, it is not resumed anymore."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE runs SET finished_at = ? WHERE id = ?",
+                (time.time(), self.run_id),
+            )
+
+    def close(self) -> None:
+        """Closes the checkpoint store."""
+        self._connection.close()
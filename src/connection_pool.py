@@ -0,0 +1,103 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Union
+
+from sqlalchemy import URL, create_engine, make_url
+from sqlalchemy.pool import QueuePool
+
+
+class ConnectionPool:
+    """
+    Pool of database connections shared by all database managers.
+
+    Connections are checked for liveness before they are handed out and
+    replaced when the server dropped them. Checkouts and the time spent
+    waiting for a free connection are counted.
+    """
+
+    def __init__(
+        self,
+        db_url: Union[str, URL],
+        pool_size: int = 5,
+        pool_recycle: int = 3600,
+        load_data_infile: bool = False,
+    ) -> None:
+        """
+        Initializes the ConnectionPool object.
+
+        Parameters:
+        - db_url (str | URL): SQLAlchemy database URL.
+        - pool_size (int): Number of connections, i.e. concurrent writers.
+        - pool_recycle (int): Seconds after which a connection is replaced.
+        - load_data_infile (bool): Allow LOAD DATA LOCAL INFILE (MySQL).
+
+        Returns:
+        - None
+        """
+        url = make_url(db_url)
+        connect_args: dict[str, Any] = {}
+        if url.get_backend_name() == "sqlite":
+            connect_args["check_same_thread"] = False
+        elif load_data_infile:
+            connect_args["allow_local_infile"] = True
+
+        self.engine = create_engine(
+            url,
+            poolclass=QueuePool,
+            pool_size=pool_size,
+            max_overflow=0,
+            pool_pre_ping=True,
+            pool_recycle=pool_recycle,
+            connect_args=connect_args,
+        )
+        self.dialect = self.engine.dialect.name
+        self.placeholder = "?" if self.engine.dialect.paramstyle == "qmark" else "%s"
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_time = 0.0
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """
+        Checks out a DB-API connection and returns it to the pool afterwards.
+
+        Returns:
+        - Iterator[Any]: The checked out connection.
+        """
+        started = time.perf_counter()
+        connection = self.engine.raw_connection()
+        waited = time.perf_counter() - started
+        with self._lock:
+            self.checkouts += 1
+            self.wait_time += waited
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def metrics(self) -> dict[str, Any]:
+        """
+        Returns the pool usage counters.
+
+        Returns:
+        - dict[str, Any]: Checkouts, total and mean wait time in seconds and
+        the number of connections currently checked out.
+        """
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "wait_time": self.wait_time,
+                "mean_wait_time": self.wait_time / max(self.checkouts, 1),
+                "checked_out": self.engine.pool.checkedout(),
+            }
+
+    def close(self) -> None:
+        """Closes all pooled connections."""
+        self.engine.dispose()
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
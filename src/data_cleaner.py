@@ -1,13 +1,52 @@
-import pandas as pd
 import re
+import string
+
+import numpy as np
+import pandas as pd
 from .data_processor import DataProcessor
+from .schema import fill_missing
+
+# URLs, @mentions and #hashtags in a single pass. A mention or hashtag stops
+# where a URL starts, so "@userwww.x" loses both parts just as it would when
+# URLs are removed before mentions.
+_URLS_MENTIONS_HASHTAGS = re.compile(
+    r"(?:http|www)\S+|[@#](?:[^\Whw]|h(?!ttp\S)|w(?!ww\S))+"
+)
+_SPECIAL_CHARACTERS = re.compile(r"[^a-zA-Z0-9\s.,!?]+")
+# ASCII bytes outside the whitelist, for the bytes.translate fast path.
+_ASCII_SPECIAL_CHARACTERS = bytes(
+    c
+    for c in range(128)
+    if chr(c) not in string.ascii_letters + string.digits + ".,!?"
+    and not chr(c).isspace()
+)
 
 
 class RedditCleaner(DataProcessor):
-    """Base class for cleaning Reddit data (posts & comments)."""
+    """
+    Base class for cleaning Reddit data (posts & comments).
+
+    The rows to keep are found with one combined mask and selected once,
+    every other change is assigned column by column to that selection.
+    Unless `inplace` is set the input frame is never modified; with it the
+    frame is owned by the cleaner and, if no row is dropped, cleaned
+    without any copy.
+    """
+
+    # Text column cleaned and required to hold an existing text.
+    _text_column: str = ""
+    _DELETED = ("[deleted]", "[removed]")
 
-    def __init__(self):
+    def __init__(self, inplace: bool = False):
+        """
+        Initializes the RedditCleaner object.
+
+        Parameters:
+        - inplace (bool): Allow modifying the frame passed to `run`, for
+        callers that do not use it afterwards.
+        """
         super().__init__()
+        self._inplace = inplace
 
     @staticmethod
     def _clean_text(text: str):
@@ -20,95 +59,87 @@ class RedditCleaner(DataProcessor):
         if not isinstance(text, str) or text.strip() == "":
             return "Content unavailable"
 
-        text = text.lower().strip()
-        text = re.sub(r"http\S+|www\S+", "", text)  # Remove URLs
-        text = re.sub(r"@\w+", "", text)  # Remove @mentions
-        text = re.sub(r"#\w+", "", text)  # Remove hashtags
-        text = re.sub(r"[^a-zA-Z0-9\s.,!?]", "", text)  # Remove special characters
-        text = re.sub(r"\s+", " ", text).strip()  # Remove extra spaces
+        text = text.lower()
+        if "http" in text or "www" in text or "@" in text or "#" in text:
+            text = _URLS_MENTIONS_HASHTAGS.sub("", text)  # Remove URLs, tags
+        if text.isascii():
+            text = text.encode().translate(None, _ASCII_SPECIAL_CHARACTERS).decode()
+        else:
+            text = _SPECIAL_CHARACTERS.sub("", text)  # Remove special characters
 
-        return text
+        return " ".join(text.split())  # Remove extra spaces
 
-    def run(self, data: pd.DataFrame) -> pd.DataFrame:
+    @classmethod
+    def _clean_texts(cls, texts: pd.Series) -> pd.Series:
         """
-        Cleans common fields across all Reddit data.
+        Cleans a whole text column, see `_clean_text`.
 
         Args:
-        - data (pd.DataFrame): Raw Reddit data.
+        - texts (pd.Series): Raw titles or comment bodies.
 
         Returns:
-        - pd.DataFrame: Cleaned data.
+        - pd.Series: Cleaned texts with the index of `texts`.
         """
-        self._logger.info("Cleaning data...")
-
-        data = data.copy()
-        data = data.fillna(
-            {
-                "author": "Anonymous",
-                "score": 0,
-                "created_utc": int(pd.Timestamp.now().timestamp()),
-            }
+        clean_text = cls._clean_text
+        # Arrow-backed string columns stay string columns.
+        dtype = texts.dtype if isinstance(texts.dtype, pd.StringDtype) else object
+        return pd.Series(
+            [clean_text(text) for text in texts], index=texts.index, dtype=dtype
         )
 
-        return data
-
-
-class RedditPostCleaner(RedditCleaner):
-    """Cleans Reddit post data before database insertion."""
-
-    def __init__(self):
-        super().__init__()
+    def _keep_mask(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Returns the rows whose text column holds an existing text.
+        """
+        if not self._text_column:
+            return np.ones(len(data), dtype=bool)
+        texts = data[self._text_column]
+        return (texts.notna() & ~texts.isin(self._DELETED)).to_numpy(dtype=bool)
 
     def run(self, data: pd.DataFrame) -> pd.DataFrame:
         """
-        Cleans Reddit posts by:
-        - Removing missing/deleted titles.
-        - Cleaning title text.
+        Cleans Reddit data by:
+        - Removing rows with a missing/deleted text.
+        - Filling missing authors, scores and creation times.
+        - Cleaning the text column.
 
         Args:
-        - data (pd.DataFrame): Raw Reddit post data.
+        - data (pd.DataFrame): Raw Reddit data.
 
         Returns:
-        - pd.DataFrame: Cleaned post data.
+        - pd.DataFrame: Cleaned data, the input frame itself if `inplace` is
+        set and no row was removed.
         """
-        data = super().run(data)
-
-        data = data[data["title"].notna()].copy()
-        data = data[~data["title"].isin(["[deleted]", "[removed]"])].copy()
-
-        data.loc[:, "title"] = data["title"].apply(self._clean_text)
-        data.loc[:, "title"] = data["title"].fillna("Content unavailable")
+        self._logger.info("Cleaning data...")
 
-        self._logger.info(f"Remaining records: {data.shape[0]}")
+        keep = self._keep_mask(data)
+        if not (self._inplace and keep.all()):
+            # The only copy: the kept rows, in a frame of their own.
+            data = data.take(np.flatnonzero(keep))
+
+        defaults = {
+            "author": "Anonymous",
+            "score": 0,
+            "created_utc": int(pd.Timestamp.now().timestamp()),
+        }
+        for column, value in defaults.items():
+            if column in data and data[column].hasnans:
+                data[column] = fill_missing(data[column], value)
+
+        if self._text_column:
+            column = self._text_column
+            data[column] = self._clean_texts(data[column])
+            self._logger.info(f"Remaining records: {data.shape[0]}")
         return data
 
 
-class RedditCommentCleaner(RedditCleaner):
-    """Cleans Reddit comment data before database insertion."""
-
-    def __init__(self):
-        super().__init__()
-
-    def run(self, data: pd.DataFrame) -> pd.DataFrame:
-        """
-        Cleans Reddit comments by:
-        - Removing missing/deleted comments.
-        - Cleaning comment text.
-        - Ensuring MySQL-safe data types.
-
-        Args:
-        - data (pd.DataFrame): Raw Reddit comment data.
+class RedditPostCleaner(RedditCleaner):
+    """Cleans Reddit post data, the titles, before database insertion."""
 
-        Returns:
-        - pd.DataFrame: Cleaned comment data.
-        """
-        data = super().run(data)
+    _text_column = "title"
 
-        data = data[data["body"].notna()].copy()
-        data = data[~data["body"].isin(["[deleted]", "[removed]"])].copy()
 
-        data.loc[:, "body"] = data["body"].apply(self._clean_text)
-        data.loc[:, "body"] = data["body"].fillna("Content unavailable")
+class RedditCommentCleaner(RedditCleaner):
+    """Cleans Reddit comment data, the bodies, before database insertion."""
 
-        self._logger.info(f"Remaining records: {data.shape[0]}")
-        return data
+    _text_column = "body"
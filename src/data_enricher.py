@@ -1,25 +1,100 @@
-from pandas import DataFrame
-from textblob import TextBlob
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
 from .data_processor import DataProcessor
-from datetime import datetime
+from .schema import SENTIMENT
+from .sentiment import SentimentBackend, TextBlobBackend
+from .sentiment_cache import SentimentCache
+
+# Backend of the current worker process, set by the pool initializer.
+_worker_backend: Optional[SentimentBackend] = None
+
+
+def _init_sentiment_worker(backend: SentimentBackend) -> None:
+    """Loads the sentiment backend once per worker process."""
+    global _worker_backend
+    _worker_backend = backend
+    backend.score(["warm up"])
+
+
+def _score_chunk(texts: list[str]) -> list[float]:
+    """Scores a chunk of texts inside a worker process."""
+    return _worker_backend.score(texts).tolist()
 
 
 class DataEnricher(DataProcessor):
-    def __init__(self):
+    # Text column whose sentiment is scored and the score given to empty
+    # texts, None to leave them without a score.
+    _text_column: str
+    _empty_score: Optional[float] = None
+
+    def __init__(
+        self,
+        sentiment_cache: Optional[SentimentCache] = None,
+        parallel: bool = False,
+        max_workers: Optional[int] = None,
+        chunk_size: int = 2000,
+        sentiment_backend: Optional[SentimentBackend] = None,
+        lazy_sentiment: bool = False,
+    ):
+        """
+        Initializes the DataEnricher object.
+
+        Parameters:
+        - sentiment_cache (SentimentCache | None): Cache of previously
+        computed sentiment scores, shared between enrichers.
+        - parallel (bool): Score texts on a process pool instead of the
+        current process.
+        - max_workers (int | None): Number of worker processes, defaults to
+        the number of CPUs.
+        - chunk_size (int): Number of texts sent to a worker at once.
+        - sentiment_backend (SentimentBackend | None): Scorer of the texts,
+        TextBlob by default. A shared cache must be created for the same
+        backend.
+        - lazy_sentiment (bool): Leave `sentiment_score` missing in `run`,
+        the rows that need a score get it from `score_missing`, e.g. called
+        by the filter and the database manager.
+        """
         super().__init__()
+        self._sentiment_cache = sentiment_cache
+        self._parallel = parallel
+        self._max_workers = max_workers
+        self._chunk_size = chunk_size
+        self._executor = None
+        self._lazy_sentiment = lazy_sentiment
+        self._sentiment_backend = sentiment_backend or TextBlobBackend()
+        if (
+            sentiment_cache is not None
+            and sentiment_cache.namespace != self._sentiment_backend.name
+        ):
+            raise ValueError(
+                f"Sentiment cache of {sentiment_cache.namespace!r} used with the "
+                f"{self._sentiment_backend.name!r} backend"
+            )
 
-    def _format_datetime(self, utc_timestamp: int) -> str:
+    def close(self) -> None:
+        """Shuts down the worker processes of the parallel mode."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _to_datetime(self, utc_timestamps: Series) -> Series:
         """
-        Converts a Unix timestamp (int) to a human-readable datetime
-        string (str).
+        Converts a column of Unix timestamps to UTC datetimes.
+
+        Fractions of a second are dropped, as the database stores whole
+        seconds.
 
         Parameters:
-        - utc_timestamp (int): Unix timestamp
+        - utc_timestamps (pd.Series): Unix timestamps
 
         Returns:
-        - str: Human-readable datetime string in the format %Y-%m-%d %H:%M:%S
+        - pd.Series: datetime64 column in UTC
         """
-        return datetime.utcfromtimestamp(utc_timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        return pd.to_datetime(utc_timestamps, unit="s", utc=True).dt.floor("s")
 
     def _get_sentiment_score(self, text: str) -> float | None:
         """
@@ -37,20 +112,123 @@ class DataEnricher(DataProcessor):
         """
         if not text or text == "":
             return None
-        return TextBlob(text).sentiment.polarity
+        return float(self._sentiment_backend.score([text])[0])
+
+    def _get_sentiment_scores(self, texts: Series) -> Series:
+        """
+        Calculates the sentiment scores for a column of texts.
+
+        Every distinct text is scored once, scores found in the sentiment
+        cache are not computed again.
+
+        Parameters:
+        - texts (pd.Series): Text strings to analyze.
+
+        Returns:
+        - pd.Series: Sentiment scores with the index of `texts`.
+        """
+        unique_texts = [
+            text for text in texts.unique() if isinstance(text, str) and text
+        ]
+        scores = {}
+        if self._sentiment_cache is not None:
+            scores = self._sentiment_cache.get_many(unique_texts)
+
+        computed = self._compute_sentiment_scores(
+            [text for text in unique_texts if text not in scores]
+        )
+        if self._sentiment_cache is not None:
+            self._sentiment_cache.put_many(computed)
+            self._sentiment_cache.flush()
+            self._logger.info(
+                f"Sentiment cache: {self._sentiment_cache.hits} hits, "
+                f"{self._sentiment_cache.misses} misses"
+            )
+
+        scores.update(computed)
+        return texts.map(scores)
+
+    def _sentiment_column(self, data: DataFrame) -> Series:
+        """
+        Returns the `sentiment_score` column of `data`, all missing in the
+        lazy mode.
+        """
+        if self._lazy_sentiment:
+            return Series(np.nan, index=data.index, dtype=SENTIMENT)
+        scores = self._get_sentiment_scores(data[self._text_column])
+        if self._empty_score is not None:
+            scores = scores.fillna(self._empty_score)
+        return scores.astype(SENTIMENT)
+
+    def score_missing(self, data: DataFrame, rows: np.ndarray) -> None:
+        """
+        Scores the sentiment of the selected rows that have no score yet,
+        in place.
+
+        Parameters:
+        - data (pd.DataFrame): Enriched data.
+        - rows (np.ndarray): Boolean mask of the rows that need a score.
+
+        Returns:
+        - None
+        """
+        scores = data["sentiment_score"].to_numpy(dtype=SENTIMENT, copy=True)
+        missing = np.flatnonzero(rows & np.isnan(scores))
+        if not len(missing):
+            return
+        texts = data[self._text_column].iloc[missing]
+        computed = self._get_sentiment_scores(texts)
+        if self._empty_score is not None:
+            computed = computed.fillna(self._empty_score)
+        scores[missing] = computed.to_numpy(dtype=SENTIMENT, na_value=np.nan)
+        data["sentiment_score"] = scores
+        self._logger.info(f"Scored the sentiment of {len(missing)} more rows")
+
+    def _compute_sentiment_scores(self, texts: list[str]) -> dict[str, float]:
+        """
+        Scores non-empty texts, in chunks on the process pool when the
+        parallel mode is enabled.
+
+        Parameters:
+        - texts (list[str]): Distinct, non-empty texts to analyze.
+
+        Returns:
+        - dict[str, float]: Sentiment scores by text.
+        """
+        if not self._parallel or len(texts) <= self._chunk_size:
+            if not texts:
+                return {}
+            return dict(zip(texts, self._sentiment_backend.score(texts).tolist()))
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                initializer=_init_sentiment_worker,
+                initargs=(self._sentiment_backend,),
+            )
+        chunks = [
+            texts[start : start + self._chunk_size]
+            for start in range(0, len(texts), self._chunk_size)
+        ]
+        # Executor.map yields the chunk results in submission order.
+        scores = [
+            score
+            for chunk_scores in self._executor.map(_score_chunk, chunks)
+            for score in chunk_scores
+        ]
+        return dict(zip(texts, scores))
 
 
 class RedditCommentEnricher(DataEnricher):
-    def __init__(self):
-        super().__init__()
+    _text_column = "body"
+    _empty_score = 0.0
 
     def run(self, data: DataFrame) -> DataFrame:
         """
         Enriches a Pandas DataFrame containing Reddit comment data.
 
         Adds two new columns to the DataFrame:
-        - `created_datetime`: A human-readable datetime string in the
-        format %Y-%m-%d %H:%M:%S
+        - `created_datetime`: The creation time as a UTC datetime
         - `sentiment_score`: A float from -1.0 (very negative sentiment) to
         1.0 (very positive sentiment)
 
@@ -61,25 +239,22 @@ class RedditCommentEnricher(DataEnricher):
         - pd.DataFrame: A Pandas DataFrame with the enriched columns.
         """
         self._logger.info("Enrich data...")
-        data["created_datetime"] = data["created_utc"].apply(self._format_datetime)
+        data["created_datetime"] = self._to_datetime(data["created_utc"])
 
-        data["sentiment_score"] = data["body"].apply(self._get_sentiment_score)
-        data["sentiment_score"] = data["sentiment_score"].fillna(0).astype(float)
+        data["sentiment_score"] = self._sentiment_column(data)
 
         return data
 
 
 class RedditPostEnricher(DataEnricher):
-    def __init__(self):
-        super().__init__()
+    _text_column = "title"
 
     def run(self, data: DataFrame) -> DataFrame:
         """
         Enriches a Pandas DataFrame containing Reddit post data.
 
         Adds two new columns to the DataFrame:
-        - `created_datetime`: A human-readable datetime string in the
-        format %Y-%m-%d %H:%M:%S
+        - `created_datetime`: The creation time as a UTC datetime
         - `sentiment_score`: A float from -1.0 (very negative sentiment)
         to 1.0 (very positive sentiment)
 
@@ -89,6 +264,6 @@ class RedditPostEnricher(DataEnricher):
         Returns:
         - pd.DataFrame: A Pandas DataFrame with the enriched columns.
         """
-        data["created_datetime"] = data["created_utc"].apply(self._format_datetime)
-        data["sentiment_score"] = data["title"].apply(self._get_sentiment_score)
+        data["created_datetime"] = self._to_datetime(data["created_utc"])
+        data["sentiment_score"] = self._sentiment_column(data)
         return data
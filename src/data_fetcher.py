@@ -1,10 +1,46 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Iterable,
+    Iterator,
+    Optional,
+    Sized,
+    TypeVar,
+)
+
 import praw
+import prawcore
 from .data_processor import DataProcessor
-from typing import Any
+from .fetch_state import FetchStateStore
+from .rate_limiter import TokenBucket
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 class RedditDataFetcher(DataProcessor):
-    def __init__(self, client_id: str, client_secret: str, user_agent: str) -> None:
+    # Errors worth another attempt: network failures, 5xx and 429 responses.
+    _RETRYABLE_ERRORS = (
+        prawcore.exceptions.RequestException,
+        prawcore.exceptions.ServerError,
+        prawcore.exceptions.TooManyRequests,
+    )
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        user_agent: str,
+        max_workers: int = 1,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        raise_errors: bool = False,
+    ) -> None:
         """
         Initializes the Fetcher object.
 
@@ -12,15 +48,118 @@ class RedditDataFetcher(DataProcessor):
         - client_id (str): Reddit API client ID
         - client_secret (str): Reddit API client secret
         - user_agent (str): Reddit API user agent string
+        - max_workers (int): Number of threads issuing requests concurrently.
+        - rate_limiter (TokenBucket | None): Limiter shared by all fetchers
+        using the same API credentials.
+        - max_retries (int): Retries of a request after a transient error.
+        - retry_backoff (float): Seconds to wait before the first retry,
+        doubled for every further retry.
+        - raise_errors (bool): Raise requests that failed for good rather
+        than log them and go on without their records.
 
         Returns:
         - None
         """
         super().__init__()
 
-        self._reddit = praw.Reddit(
-            client_id=client_id, client_secret=client_secret, user_agent=user_agent
-        )
+        self._credentials = {
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "user_agent": user_agent,
+        }
+        # Clients are created on first use, see `_client`.
+        self._local = threading.local()
+        self._max_workers = max_workers
+        self._rate_limiter = rate_limiter
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+        self._raise_errors = raise_errors
+
+    def _client(self) -> praw.Reddit:
+        """
+        Returns the Reddit instance of the calling thread, created on first
+        use, PRAW instances must not be shared between threads.
+        """
+        reddit = getattr(self._local, "reddit", None)
+        if reddit is None:
+            reddit = self._local.reddit = praw.Reddit(**self._credentials)
+        return reddit
+
+    def _request(self, request: Callable[[], R], cost: int = 1) -> R:
+        """
+        Runs an API request under the rate limit, retrying transient errors
+        with exponential backoff.
+
+        Args:
+        - request (Callable): Function performing the request(s).
+        - cost (int): Number of API calls the request makes.
+
+        Returns:
+        - The result of `request`.
+        """
+        for attempt in range(self._max_retries + 1):
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire(cost)
+            try:
+                return request()
+            except self._RETRYABLE_ERRORS as e:
+                if attempt == self._max_retries:
+                    raise
+                delay = self._retry_backoff * 2**attempt
+                self._logger.warning(f"Request failed ({e}), retrying in {delay}s")
+                time.sleep(delay)
+
+    def _map_concurrently(
+        self, function: Callable[[T], R], items: Iterable[T]
+    ) -> Iterator[R]:
+        """
+        Applies `function` to every item on a bounded thread pool and yields
+        the results as soon as they complete.
+
+        With a single worker the items are processed in order on the calling
+        thread.
+
+        Args:
+        - function (Callable): Function to apply.
+        - items (Iterable): Items to process, consumed lazily.
+
+        Returns:
+        - Iterator: Results in completion order.
+        """
+        if self._max_workers <= 1:
+            for item in items:
+                yield function(item)
+            return
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            pending = set()
+            for item in items:
+                pending.add(executor.submit(function, item))
+                if len(pending) >= 2 * self._max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def stream(self) -> Iterator[dict[str, Any]]:
+        """
+        Yields the fetched records one by one, fetchers that can produce
+        records before the whole fetch has finished override this.
+
+        Returns:
+        - Iterator[dict[str, Any]]: Fetched records.
+        """
+        yield from self.run()
+
+    def committed(self, keys: list[str]) -> None:
+        """
+        Called by the pipeline once all records of the given checkpoint keys
+        were stored. Fetchers record what they fetched only then, so that
+        records that were never stored are fetched again.
+        """
 
     @staticmethod
     def _print_progress(index: int, previous_progress: int, length_data: int):
@@ -50,7 +189,15 @@ class RedditCommentFetcher(RedditDataFetcher):
         client_secret,
         user_agent,
         more_comments_limit,
-        post_ids: list[str],
+        post_ids: Iterable[str],
+        max_workers: int = 1,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        num_comments: Optional[dict[str, int]] = None,
+        fetch_state: Optional[FetchStateStore] = None,
+        completed_post_ids: Optional[Collection[str]] = None,
+        raise_errors: bool = False,
     ):
         """
         Initializes the CommentFetcher object.
@@ -60,52 +207,269 @@ class RedditCommentFetcher(RedditDataFetcher):
         - client_secret (str): Reddit API client secret
         - user_agent (str): Reddit API user agent string
         - more_comments_limit (int): The limit for fetching more comments.
-        - post_ids (list[str]): List of post IDs.
+        - post_ids (Iterable[str]): Post IDs, consumed lazily unless they
+        are a sized collection.
+        - max_workers (int): Number of posts fetched concurrently.
+        - rate_limiter (TokenBucket | None): Shared API rate limiter.
+        - max_retries (int): Retries per post after a transient error.
+        - retry_backoff (float): Initial retry delay in seconds.
+        - num_comments (dict[str, int] | None): Current number of comments
+        per post ID.
+        - fetch_state (FetchStateStore | None): Store of previous fetches,
+        posts whose number of comments did not change are skipped.
+        - completed_post_ids (Collection[str] | None): Posts whose comments
+        a checkpointed run already stored, they are skipped.
+        - raise_errors (bool): Raise errors fetching a post rather than skip
+        the post.
+
+        A post is recorded in the fetch state once its comments were
+        stored, see `committed`, rather than fetched.
 
         Returns:
         - None
         """
-        super().__init__(client_id, client_secret, user_agent)
+        super().__init__(
+            client_id,
+            client_secret,
+            user_agent,
+            max_workers=max_workers,
+            rate_limiter=rate_limiter,
+            max_retries=max_retries,
+            retry_backoff=retry_backoff,
+            raise_errors=raise_errors,
+        )
         self._post_ids = post_ids
         self._more_comments_limit = more_comments_limit
+        self._num_comments = num_comments
+        self._fetch_state = fetch_state
+        self._completed_post_ids = completed_post_ids
 
-    def run(self) -> list[dict[str, Any]]:
+    def _changed_post_ids(self) -> Iterator[str]:
         """
-        Fetches comments for a list of Reddit posts.
+        Yields the IDs of the posts whose number of comments changed since
+        their comments were last fetched.
+
+        The post IDs are consumed lazily, so they may still be produced
+        while comments are being fetched.
+        """
+        completed = self._completed_post_ids or ()
+        if self._fetch_state is None or self._num_comments is None:
+            yield from (
+                post_id for post_id in self._post_ids if post_id not in completed
+            )
+            return
+
+        skipped = 0
+        for post_id in self._post_ids:
+            if post_id in completed:
+                continue
+            fetched_count = self._fetch_state.get_comment_counts([post_id])
+            if fetched_count.get(post_id) == self._num_comments.get(post_id):
+                skipped += 1
+                continue
+            yield post_id
+        self._logger.info(f"Skipped {skipped} posts without new comments")
+
+    def _fetch_post_comments(self, post_id: str) -> list[dict[str, Any]]:
+        """
+        Fetches all comments of a single post.
 
         Args:
-            post_ids (list[str]): List of post IDs.
-            limit (int): Number of comments to fetch per post.
+            post_id (str): ID of the post.
 
         Returns:
-            list[dict[str, Any]]: List of dictionaries containing comment data.
+            list[dict[str, Any]]: Comment data, empty if the post could
+            not be fetched.
+        """
+
+        def request() -> list[dict[str, Any]]:
+            post = self._client().submission(id=post_id)
+            post.comments.replace_more(limit=self._more_comments_limit)
+            return [
+                {
+                    "id": comment.id,
+                    "post_id": post_id,
+                    "author": getattr(comment.author, "name", None),
+                    "subreddit": post.subreddit.display_name,
+                    "body": comment.body,
+                    "score": comment.score,
+                    "created_utc": comment.created_utc,
+                }
+                for comment in post.comments.list()
+            ]
+
+        try:
+            comments = self._request(request, cost=1 + (self._more_comments_limit or 0))
+        except self._RETRYABLE_ERRORS as e:
+            if self._raise_errors:
+                raise
+            self._logger.error(f"Error fetching comments of post {post_id}: {e}")
+            return []
+
+        if not comments:
+            # Nothing to store, the post is not passed to `committed`.
+            self._record_comment_counts([post_id])
+        return comments
+
+    def _record_comment_counts(self, post_ids: Iterable[str]) -> None:
+        """Records the number of comments of fetched posts, if incremental."""
+        if self._fetch_state is None or self._num_comments is None:
+            return
+        for post_id in post_ids:
+            num_comments = self._num_comments.get(post_id)
+            if num_comments is not None:
+                self._fetch_state.update_comment_count(post_id, num_comments)
+
+    def committed(self, keys: list[str]) -> None:
+        """Records the comment counts of the posts whose comments were stored."""
+        self._record_comment_counts(keys)
+
+    def stream(self) -> Iterator[dict[str, Any]]:
+        """
+        Fetches comments for a list of Reddit posts, yielding the comments
+        of each post as soon as it has been fetched.
+
+        Returns:
+            Iterator[dict[str, Any]]: Comment data.
         """
         self._logger.info("Fetching Comment Data...")
-        comments = []
+        fetched = 0
         previous_progress = -1
+        post_ids = self._changed_post_ids()
+        total = None
+        if isinstance(self._post_ids, Sized):
+            post_ids = list(post_ids)
+            total = len(post_ids)
 
-        for index, post_id in enumerate(self._post_ids):
-            previous_progress = self._print_progress(
-                index, previous_progress, len(self._post_ids)
-            )
-
-            post = self._reddit.submission(id=post_id)
-            post.comments.replace_more(limit=self._more_comments_limit)
-            for comment in post.comments.list():
-                comments.append(
-                    {
-                        "id": comment.id,
-                        "post_id": post_id,
-                        "author": getattr(comment.author, "name", None),
-                        "subreddit": post.subreddit.display_name,
-                        "body": comment.body,
-                        "score": comment.score,
-                        "created_utc": comment.created_utc,
-                    }
+        post_comments = self._map_concurrently(self._fetch_post_comments, post_ids)
+        for index, comments in enumerate(post_comments):
+            if total:
+                previous_progress = self._print_progress(
+                    index, previous_progress, total
                 )
+            fetched += len(comments)
+            yield from comments
+
+        self._logger.info(f"Fetched Data: #{fetched}")
+
+    def run(self) -> list[dict[str, Any]]:
+        """
+        Fetches comments for a list of Reddit posts.
+
+        With more than one worker the comments are grouped by post in the
+        order the posts finished.
+
+        Returns:
+            list[dict[str, Any]]: List of dictionaries containing comment data.
+        """
+        return list(self.stream())
 
-        self._logger.info(f"Fetched Data: #{len(comments)}")
-        return comments
+
+class SearchCheckpoints:
+    """
+    What previous runs found per (subreddit, keyword) search, for the sync
+    and the async post fetchers.
+
+    A search is recorded in the fetch state once all posts it found were
+    stored, see `committed`, so that posts that were never stored are
+    found again by the next run.
+    """
+
+    def __init__(
+        self,
+        fetch_state: Optional[FetchStateStore],
+        sort_filter: str,
+        completed_post_ids: Optional[Collection[str]] = None,
+    ) -> None:
+        """
+        Initializes the SearchCheckpoints object.
+
+        Parameters:
+        - fetch_state (FetchStateStore | None): Store of previous fetches,
+        None to return every post found.
+        - sort_filter (str): Sort order of the searches.
+        - completed_post_ids (Collection[str] | None): Posts a checkpointed
+        run already stored, they are not returned again.
+
+        Returns:
+        - None
+        """
+        self._fetch_state = fetch_state
+        # Results sorted by "new" are newest first, a search stops at the
+        # first post a previous run already saw.
+        self.newest_first = sort_filter == "new"
+        self._completed_post_ids = completed_post_ids or ()
+        # Posts of every search to record once they all were stored, and
+        # the IDs of those not stored yet.
+        self._uncommitted: dict[
+            tuple[str, str], tuple[list[dict[str, Any]], set[str]]
+        ] = {}
+        self._lock = threading.Lock()
+
+    def get(self, subreddit: str, keyword: str) -> tuple[Optional[float], set[str]]:
+        """
+        Returns the newest `created_utc` and the post IDs a search saw,
+        (None, set()) if it never ran.
+        """
+        if self._fetch_state is None:
+            return None, set()
+        return self._fetch_state.get_search_checkpoint(subreddit, keyword)
+
+    def seen(
+        self, submission: Any, checkpoint: tuple[Optional[float], set[str]]
+    ) -> bool:
+        """
+        Returns whether a previous run already saw a search result, given
+        the checkpoint of its search. Newest first, anything older than the
+        high-water mark was seen too.
+        """
+        newest_created_utc, seen = checkpoint
+        if submission.id in seen:
+            return True
+        return (
+            self.newest_first
+            and newest_created_utc is not None
+            and submission.created_utc < newest_created_utc
+        )
+
+    def found(
+        self, subreddit: str, keyword: str, posts: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """
+        Tracks the posts a search found until they were stored.
+
+        Returns:
+        - list[dict[str, Any]]: The posts not stored by a checkpointed run
+        yet.
+        """
+        uncommitted = {
+            post["id"] for post in posts if post["id"] not in self._completed_post_ids
+        }
+        if self._fetch_state is not None and posts:
+            if uncommitted:
+                with self._lock:
+                    self._uncommitted[(subreddit, keyword)] = (posts, uncommitted)
+            else:
+                self._fetch_state.update_search_checkpoint(subreddit, keyword, posts)
+        return [post for post in posts if post["id"] in uncommitted]
+
+    def committed(self, post_ids: Iterable[str]) -> None:
+        """
+        Records the searches whose posts all were stored, which advances
+        their high-water marks.
+        """
+        if self._fetch_state is None:
+            return
+        stored = set(post_ids)
+        completed = []
+        with self._lock:
+            for search, (posts, uncommitted) in list(self._uncommitted.items()):
+                uncommitted -= stored
+                if not uncommitted:
+                    completed.append((search, posts))
+                    del self._uncommitted[search]
+        for (subreddit, keyword), posts in completed:
+            self._fetch_state.update_search_checkpoint(subreddit, keyword, posts)
 
 
 class RedditPostFetcher(RedditDataFetcher):
@@ -118,70 +482,193 @@ class RedditPostFetcher(RedditDataFetcher):
         post_limit: int,
         time_filter: str,
         sort_filter: str,
+        max_workers: int = 1,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        fetch_state: Optional[FetchStateStore] = None,
+        completed_post_ids: Optional[Collection[str]] = None,
+        raise_errors: bool = False,
     ):
-        super().__init__(client_id, client_secret, user_agent)
+        """
+        Initializes the PostFetcher object.
+
+        Parameters:
+        - client_id (str): Reddit API client ID
+        - client_secret (str): Reddit API client secret
+        - user_agent (str): Reddit API user agent string
+        - categories (dict): Subreddits and keywords per category.
+        - post_limit (int): Number of posts to fetch per keyword.
+        - time_filter (str): Time window of the searches.
+        - sort_filter (str): Sort order of the searches.
+        - max_workers (int): Number of searches run concurrently.
+        - rate_limiter (TokenBucket | None): Shared API rate limiter.
+        - max_retries (int): Retries per search after a transient error.
+        - retry_backoff (float): Initial retry delay in seconds.
+        - fetch_state (FetchStateStore | None): Store of previous fetches,
+        posts already found by a search are not returned again. A search is
+        recorded once all posts it found were stored, see `committed`.
+        - completed_post_ids (Collection[str] | None): Posts a checkpointed
+        run already stored, they are not returned again.
+        - raise_errors (bool): Raise errors of a search rather than go on
+        without its posts.
+
+        Returns:
+        - None
+        """
+        super().__init__(
+            client_id,
+            client_secret,
+            user_agent,
+            max_workers=max_workers,
+            rate_limiter=rate_limiter,
+            max_retries=max_retries,
+            retry_backoff=retry_backoff,
+            raise_errors=raise_errors,
+        )
         self._categories = categories
         self._post_limit = post_limit
         self._time_filter = time_filter
         self._sort_filter = sort_filter
+        self._searches = SearchCheckpoints(fetch_state, sort_filter, completed_post_ids)
+
+    def _search_tasks(self) -> list[tuple[str, str, str]]:
+        """
+        Lists every (category, subreddit, keyword) search in config order.
+        """
+        tasks = []
+        for category in self._categories:
+            keywords = self._categories[category]["keywords"]
+            for subreddit in self._categories[category]["subreddits"]:
+                self._logger.info(f"Searching in {subreddit} for keywords: {keywords}")
+                tasks.extend((category, subreddit, keyword) for keyword in keywords)
+        return tasks
+
+    def _search(
+        self, task: tuple[int, tuple[str, str, str]]
+    ) -> tuple[int, list[dict[str, Any]]]:
+        """
+        Runs a single keyword search in a subreddit.
+
+        Args:
+            task (tuple): Index of the search and its (category, subreddit,
+            keyword).
+
+        Returns:
+            tuple[int, list[dict[str, Any]]]: Index of the search and the
+            data of the posts it found.
+        """
+        index, (category, subreddit, keyword) = task
+        checkpoint = self._searches.get(subreddit, keyword)
+
+        def request() -> list[Any]:
+            submissions = []
+            for submission in (
+                self._client()
+                .subreddit(subreddit)
+                .search(
+                    keyword,
+                    sort=self._sort_filter,
+                    time_filter=self._time_filter,
+                    limit=self._post_limit,
+                )
+            ):
+                if self._searches.seen(submission, checkpoint):
+                    if self._searches.newest_first:
+                        break
+                    continue
+                submissions.append(submission)
+            return submissions
+
+        try:
+            # Listings are paged by 100 submissions per request.
+            submissions = self._request(
+                request, cost=max(1, -(-(self._post_limit or 0) // 100))
+            )
+        except Exception as e:
+            if self._raise_errors:
+                raise
+            self._logger.error(
+                f"Error fetching {keyword} in subreddit: {subreddit}: {e}"
+            )
+            return index, []
+
+        posts = [
+            self._post_record(submission, category, keyword)
+            for submission in submissions
+        ]
+        return index, self._searches.found(subreddit, keyword, posts)
+
+    @staticmethod
+    def _post_record(submission: Any, category: str, keyword: str) -> dict[str, Any]:
+        """Returns the data of a submission a keyword search found."""
+        return {
+            "id": submission.id,
+            "title": submission.title,
+            "author": (submission.author.name if submission.author else None),
+            "subreddit": submission.subreddit.display_name,
+            "content": submission.selftext,
+            "created_utc": submission.created_utc,
+            "score": submission.score,
+            "url": submission.url,
+            "num_comments": submission.num_comments,
+            "category": category,
+            "keyword": keyword,
+        }
+
+    def committed(self, keys: list[str]) -> None:
+        """Records the searches whose posts, by ID, all were stored."""
+        self._searches.committed(keys)
+
+    @staticmethod
+    def _merge_matches(results: list[list[dict[str, Any]]]) -> list[dict[str, Any]]:
+        """
+        Merges the results of all searches into one record per post.
+
+        A post keeps the category and keyword of its first match, every
+        matching (category, keyword) pair is listed under `matches`.
+
+        Args:
+            results (list[list[dict[str, Any]]]): Post data per search, in
+            config order.
+
+        Returns:
+            list[dict[str, Any]]: Deduplicated post data.
+        """
+        posts: dict[str, dict[str, Any]] = {}
+        for search_results in results:
+            for post in search_results:
+                match = {"category": post["category"], "keyword": post["keyword"]}
+                merged = posts.setdefault(post["id"], {**post, "matches": []})
+                if match not in merged["matches"]:
+                    merged["matches"].append(match)
+        return list(posts.values())
 
     def run(self) -> list[dict[str, Any]]:
         """
         Fetches Reddit posts based on keywords.
 
-        Args:
-            categories (list[dict[str, list[str]]]): List of categories,
-            each containing subreddits and keywords.
-            limit (int): Number of posts to fetch per keyword.
+        The searches run concurrently when more than one worker is
+        configured, posts found by several searches are returned once.
 
         Returns:
             list[dict[str, any]]: List of dictionaries containing post data.
         """
         self._logger.info("Fetching Post data...")
-        posts = []
+        tasks = self._search_tasks()
+        results: list[list[dict[str, Any]]] = [[] for _ in tasks]
         previous_progress = -1
 
-        for index, category in enumerate(self._categories):
-            subreddits = self._categories[category]["subreddits"]
-            for subreddit in subreddits:
-                keywords = self._categories[category]["keywords"]
-                self._logger.info(f"Searching in {subreddit} for keywords: {keywords}")
-
-                for keyword in keywords:
-                    try:
-                        for submission in self._reddit.subreddit(subreddit).search(
-                            keyword,
-                            sort=self._sort_filter,
-                            time_filter=self._time_filter,
-                            limit=self._post_limit,
-                        ):
-                            posts.append(
-                                {
-                                    "id": submission.id,
-                                    "title": submission.title,
-                                    "author": (
-                                        submission.author.name
-                                        if submission.author
-                                        else None
-                                    ),
-                                    "subreddit": submission.subreddit.display_name,
-                                    "content": submission.selftext,
-                                    "created_utc": submission.created_utc,
-                                    "score": submission.score,
-                                    "url": submission.url,
-                                    "num_comments": submission.num_comments,
-                                    "category": category,
-                                    "keyword": keyword,
-                                }
-                            )
-                    except Exception as e:
-                        self._logger.error(
-                            f"Error fetching {keyword} in subreddtit: {subreddit}: {e}"
-                        )
-
+        searches = self._map_concurrently(self._search, enumerate(tasks))
+        for completed, (index, posts) in enumerate(searches):
+            results[index] = posts
             previous_progress = self._print_progress(
-                index, previous_progress, len(self._categories)
+                completed, previous_progress, len(tasks)
             )
 
-        self._logger.info(f"Fetched Data: #{len(posts)}")
+        posts = self._merge_matches(results)
+        duplicates = sum(map(len, results)) - len(posts)
+        self._logger.info(
+            f"Fetched Data: #{len(posts)} ({duplicates} duplicate matches merged)"
+        )
         return posts
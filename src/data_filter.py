@@ -1,4 +1,7 @@
-from pandas import DataFrame
+from typing import Callable, Optional
+
+import numpy as np
+from pandas import DataFrame, Series
 from .data_processor import DataProcessor
 
 
@@ -9,6 +12,8 @@ class DataFilter(DataProcessor):
         min_comments: int = 5,
         min_words: int = 20,
         sentiment_threshold: float = 0.3,
+        vectorized: bool = True,
+        sentiment_scorer: Optional[Callable[[DataFrame, np.ndarray], None]] = None,
     ) -> None:
         super().__init__()
         """
@@ -22,11 +27,19 @@ class DataFilter(DataProcessor):
         low-value content.
         :param sentiment_threshold: float - Threshold for strong sentiment
         (positive or negative).
+        :param vectorized: bool - Evaluate the criteria column-wise with
+        boolean masks instead of row by row.
+        :param sentiment_scorer: Callable - Scores the sentiment of the
+        selected rows in place, e.g. `DataEnricher.score_missing` of a lazy
+        enricher. With it the sentiment is only computed for the rows that
+        the other criteria rejected.
         """
         self.min_upvotes = min_upvotes
         self.min_comments = min_comments
         self.min_words = min_words
         self.sentiment_threshold = sentiment_threshold
+        self.vectorized = vectorized
+        self.sentiment_scorer = sentiment_scorer
 
     def _is_valuable(self, data: DataFrame) -> bool:
         """
@@ -50,29 +63,99 @@ class DataFilter(DataProcessor):
         the minimum upvotes threshold, False otherwise.
         """
 
-        return data["score"] >= self.min_upvotes
+        return bool(data["score"] >= self.min_upvotes)
 
     def _is_informative(self, data: DataFrame) -> bool:
         pass
 
     def _strong_opinion(self, data: DataFrame) -> bool:
-        return (
+        return bool(
             data["sentiment_score"] >= self.sentiment_threshold
             or data["sentiment_score"] <= -1 * self.sentiment_threshold
         )
 
+    def _valuable_mask(self, df: DataFrame) -> Series:
+        """
+        Column-wise counterpart of `_is_valuable`.
+
+        The criteria are evaluated from the cheapest to the most expensive,
+        each just for the rows the previous ones rejected. The word count
+        has to scan the text, so it comes after the numeric criteria; with
+        a `sentiment_scorer` the sentiment is not computed yet and comes
+        last.
+
+        :param df: DataFrame containing Reddit post or comment data.
+        :return: Boolean Series that is True for every valuable row.
+        """
+        mask = self._engaging_mask(df)
+        if self.sentiment_scorer is None:
+            mask |= self._strong_opinion_mask(df)
+        undecided = ~mask
+        if undecided.any():
+            mask[undecided] = self._informative_mask(df[undecided]).to_numpy()
+        if self.sentiment_scorer is not None:
+            undecided = ~mask.to_numpy(dtype=bool)
+            if undecided.any():
+                self.sentiment_scorer(df, undecided)
+                mask |= self._strong_opinion_mask(df)
+        return mask
+
+    def _engaging_mask(self, df: DataFrame) -> Series:
+        return (df["score"] >= self.min_upvotes).fillna(False)
+
+    def _informative_mask(self, df: DataFrame) -> Series:
+        return Series(False, index=df.index)
+
+    def _strong_opinion_mask(self, df: DataFrame) -> Series:
+        return (df["sentiment_score"].abs() >= self.sentiment_threshold).fillna(False)
+
+    def _word_count_mask(self, text: Series) -> Series:
+        """
+        Checks the word count of a text column against `min_words`.
+
+        Counting runs of non-whitespace characters yields the same number
+        as `len(text.split())`.
+        """
+        word_counts = text.str.count(r"\S+").fillna(0)
+        return word_counts >= self.min_words
+
     def run(self, df: DataFrame) -> DataFrame:
         self._logger.info("Filtering data...")
-        df = df[df.apply(lambda row: self._is_valuable(row), axis=1)]
+        if self.vectorized:
+            df = df[self._valuable_mask(df).to_numpy(dtype=bool)]
+        else:
+            if self.sentiment_scorer is not None:
+                self.sentiment_scorer(df, np.ones(len(df), dtype=bool))
+            df = df[df.apply(lambda row: self._is_valuable(row), axis=1)]
         self._logger.info(f"Remaining records: #{df.shape[0]}")
         return df
 
 
 class RedditPostFilter(DataFilter):
+    def _is_engaging(self, data: DataFrame) -> bool:
+        """
+        Posts are also engaging when they attracted enough comments.
+        """
+        return super()._is_engaging(data) or bool(
+            data.get("num_comments", 0) >= self.min_comments
+        )
+
     def _is_informative(self, data: DataFrame) -> bool:
         return len(data["title"].split()) >= self.min_words
 
+    def _engaging_mask(self, df: DataFrame) -> Series:
+        mask = super()._engaging_mask(df)
+        if "num_comments" in df:
+            mask |= (df["num_comments"] >= self.min_comments).fillna(False)
+        return mask
+
+    def _informative_mask(self, df: DataFrame) -> Series:
+        return self._word_count_mask(df["title"])
+
 
 class RedditCommentFilter(DataFilter):
     def _is_informative(self, data: DataFrame) -> bool:
         return len(data["body"].split()) >= self.min_words
+
+    def _informative_mask(self, df: DataFrame) -> Series:
+        return self._word_count_mask(df["body"])
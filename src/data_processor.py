@@ -15,3 +15,16 @@ class DataProcessor(ABC):
     def run(self, data: Optional[Any] = None) -> Any:
         """Abstract method to be implemented by subclasses."""
         pass
+
+
+class AsyncDataProcessor(ABC):
+    """Abstract base class for data processing tasks run on an event loop."""
+
+    def __init__(self, name="EcoPulse"):
+        self.name = name
+        self._logger = setup_logger(self.name)
+
+    @abstractmethod
+    async def run(self, data: Optional[Any] = None) -> Any:
+        """Abstract method to be implemented by subclasses."""
+        pass
@@ -1,84 +1,321 @@
-from sqlalchemy import create_engine
-import mysql
+import csv
+import os
+import tempfile
+import time
+from itertools import chain
+from typing import Any, Callable, Optional
+
+import numpy as np
+from pandas import DataFrame, Series
+from pandas.api.types import is_datetime64_any_dtype, is_object_dtype
+
+from .change_detector import ChangeDetector
+from .connection_pool import ConnectionPool
+from .logger import setup_logger
 
 
 class DatabaseManager:
-    def __init__(self, db_url, host, user, password, database):
-        self.engine = create_engine(db_url)
+    # Target table, its columns in insert order, the columns stored as empty
+    # strings when they are missing from the data and the columns refreshed
+    # when a row already exists.
+    _table: str
+    _columns: tuple[str, ...]
+    _optional_columns: tuple[str, ...] = ()
+    _update_columns: tuple[str, ...]
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        batch_size: int = 1000,
+        load_data_infile: bool = False,
+        change_detector: Optional[ChangeDetector] = None,
+        sentiment_scorer: Optional[Callable[[DataFrame, np.ndarray], None]] = None,
+    ):
+        """
+        Initializes the DatabaseManager object.
 
-        self.connection = mysql.connector.connect(
-            host=host, user=user, password=password, database=database
+        Parameters:
+        - pool (ConnectionPool): Connection pool shared with the other
+        database managers.
+        - batch_size (int): Rows per INSERT statement and transaction.
+        - load_data_infile (bool): Load the rows into a staging table with
+        LOAD DATA LOCAL INFILE and upsert them from there (MySQL only).
+        - change_detector (ChangeDetector | None): Index of the stored rows,
+        rows that did not change since they were stored are not sent again.
+        - sentiment_scorer (Callable | None): Scores the sentiment of the
+        selected rows in place, see `DataEnricher.score_missing`. Called
+        for every row written, a changed row may be missing from the table,
+        e.g. after a failed store, and is inserted then.
+        """
+        self._logger = setup_logger("EcoPulse")
+        self._pool = pool
+        self._batch_size = batch_size
+        self._load_data_infile = load_data_infile
+        self._change_detector = change_detector
+        self._sentiment_scorer = sentiment_scorer
+        if load_data_infile and pool.dialect != "mysql":
+            raise ValueError("LOAD DATA LOCAL INFILE is only supported on MySQL")
+
+    @staticmethod
+    def _to_python_datetimes(data: DataFrame) -> DataFrame:
+        """
+        Converts datetime64 columns to naive UTC datetime objects, which is
+        what mysql.connector accepts for DATETIME columns.
+        """
+        converted = {}
+        for column in data.columns:
+            values = data[column]
+            if not is_datetime64_any_dtype(values):
+                continue
+            if values.dt.tz is not None:
+                values = values.dt.tz_convert(None)
+            converted[column] = Series(
+                values.to_numpy(dtype="datetime64[us]").tolist(),
+                index=values.index,
+                dtype=object,
+            )
+
+        return data.assign(**converted) if converted else data
+
+    def close_connection(self) -> None:
+        """
+        Logs the pool usage and saves the change detection snapshot.
+        Connections are only held while a batch is written, the shared pool
+        is closed by its owner.
+        """
+        if self._change_detector is not None:
+            self._change_detector.save_snapshot()
+        metrics = self._pool.metrics()
+        self._logger.info(
+            f"{self._table}: {metrics['checkouts']} pool checkouts, "
+            f"{metrics['mean_wait_time'] * 1000:.1f}ms mean wait"
         )
-        self.cursor = self.connection.cursor()
 
+    def __enter__(self) -> "DatabaseManager":
+        return self
 
-class CommentDataBaseManager(DatabaseManager):
-    def run(self, comments: list[dict[str, any]]):
-        """Insert Reddit comments into the database."""
-        query = """
-        INSERT INTO comments (id, post_id, author,
-        subreddit, body, score, created_utc, created_datetime, sentiment_score)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE score = VALUES(score);
-        """
-
-        comments_list = comments.to_dict(orient="records")
-
-        data = [
-            (
-                comment["id"],
-                comment["post_id"],
-                comment["author"],
-                comment["subreddit"],
-                comment["body"],
-                comment["score"],
-                comment.get("created_utc", ""),
-                comment.get("created_datetime", ""),
-                comment.get("sentiment_score", ""),
+    def __exit__(self, *exc_info) -> None:
+        self.close_connection()
+
+    def _column_values(self, batch: DataFrame, column: str) -> list[Any]:
+        """
+        Returns a column of a batch as Python objects, missing values as None.
+        """
+        if column not in batch and column in self._optional_columns:
+            return [""] * len(batch)
+        values = batch[column]
+        if is_datetime64_any_dtype(values):
+            return self._to_python_datetimes(batch[[column]])[column].tolist()
+        return values.astype(object).where(values.notna(), None).tolist()
+
+    def _upsert_query(self, rows: int) -> str:
+        """
+        Builds a multi-row upsert of `rows` rows in the connection's dialect.
+        """
+        row = f"({', '.join([self._pool.placeholder] * len(self._columns))})"
+        query = (
+            f"INSERT INTO {self._table} ({', '.join(self._columns)}) "
+            f"VALUES {', '.join([row] * rows)} "
+        )
+        if self._pool.dialect == "sqlite":
+            updates = ", ".join(f"{c} = excluded.{c}" for c in self._update_columns)
+            return query + f"ON CONFLICT (id) DO UPDATE SET {updates}"
+        updates = ", ".join(f"{c} = VALUES({c})" for c in self._update_columns)
+        return query + f"ON DUPLICATE KEY UPDATE {updates}"
+
+    def _load_change_index(self) -> None:
+        """
+        Loads the change detection index from its snapshot, or else from the
+        mutable columns of the stored rows.
+        """
+        if self._change_detector.load_snapshot():
+            return
+        columns = ", ".join(("id",) + self._update_columns)
+        with self._pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(f"SELECT {columns} FROM {self._table}")
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        self._change_detector.load(
+            DataFrame(rows, columns=["id", *self._update_columns])
+        )
+        self._logger.info(
+            f"Loaded {len(self._change_detector)} {self._table} into the change index"
+        )
+
+    def _changed_rows(self, data: DataFrame) -> tuple[DataFrame, Any, Any]:
+        """
+        Drops duplicate IDs, keeping the last row, and with change detection
+        the rows that are stored unchanged.
+
+        Returns:
+        - tuple: The rows to write and the ID and value hashes of all rows,
+        None without change detection.
+        """
+        duplicates = data["id"].duplicated(keep="last")
+        if duplicates.any():
+            data = data.take(np.flatnonzero(~duplicates.to_numpy()))
+        if self._change_detector is None:
+            self._logger.info(
+                f"{self._table}: {len(data)} rows to upsert, "
+                f"{int(duplicates.sum())} duplicate IDs dropped"
             )
-            for comment in comments_list
-        ]
+            self._score_sentiment(data)
+            return data, None, None
 
-        self.cursor.executemany(query, data)
-        self.connection.commit()
+        if not self._change_detector.loaded:
+            self._load_change_index()
+        new, changed, keys, hashes = self._change_detector.classify(
+            data["id"], data[list(self._update_columns)]
+        )
+        self._logger.info(
+            f"{self._table}: {int(new.sum())} inserted, {int(changed.sum())} "
+            f"updated, {int((~new & ~changed).sum())} unchanged skipped, "
+            f"{int(duplicates.sum())} duplicate IDs dropped"
+        )
+        send = new | changed
+        data = data.take(np.flatnonzero(send))
+        self._score_sentiment(data)
+        return data, keys[send], hashes[send]
 
-    def close_connection(self):
-        """Close database connection."""
-        self.cursor.close()
-        self.connection.close()
+    def _score_sentiment(self, data: DataFrame) -> None:
+        """Scores the rows to write that have no sentiment score yet."""
+        if self._sentiment_scorer is not None:
+            self._sentiment_scorer(data, np.ones(len(data), dtype=bool))
 
+    def _bulk_upsert(self, data: DataFrame) -> None:
+        """
+        Upserts the rows of a DataFrame in batches, one transaction per batch.
 
-class PostDataBaseManager(DatabaseManager):
-    def run(self, posts: list[dict[str, any]]):
-        """Insert Reddit posts into the database."""
-        query = """
-        INSERT INTO posts (id, title, author, subreddit, content,
-        created_datetime, score, num_comments, url, category,
-        keyword, sentiment_score)
-        VALUES (%s, %s, %s, %s,%s, %s, %s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE score = VALUES(score),
-        num_comments = VALUES(num_comments);
-        """
-
-        posts_list = posts.to_dict(orient="records")
-
-        data = [
-            (
-                post["id"],
-                post["title"],
-                post["author"],
-                post["subreddit"],
-                post["content"],
-                post["created_datetime"],
-                post["score"],
-                post["num_comments"],
-                post["url"],
-                post.get("category", ""),
-                post.get("keyword", ""),
-                post.get("sentiment_score", ""),
+        Args:
+        - data (pd.DataFrame): Rows to store.
+        """
+        if data.empty:
+            return
+        write_batch = (
+            self._load_batch_infile if self._load_data_infile else self._insert_batch
+        )
+        data, keys, hashes = self._changed_rows(data)
+        for start in range(0, len(data), self._batch_size):
+            end = start + self._batch_size
+            batch = data.iloc[start:end]
+            started = time.perf_counter()
+            with self._pool.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    write_batch(cursor, batch)
+                    connection.commit()
+                except Exception:
+                    connection.rollback()
+                    raise
+                finally:
+                    cursor.close()
+            if keys is not None:
+                self._change_detector.record(keys[start:end], hashes[start:end])
+            elapsed = time.perf_counter() - started
+            self._logger.info(
+                f"Stored {len(batch)} rows in {self._table} "
+                f"({len(batch) / max(elapsed, 1e-9):.0f} rows/s)"
             )
-            for post in posts_list
-        ]
 
-        self.cursor.executemany(query, data)
-        self.connection.commit()
+    def _insert_batch(self, cursor: Any, batch: DataFrame) -> None:
+        columns = [self._column_values(batch, column) for column in self._columns]
+        params = list(chain.from_iterable(zip(*columns)))
+        cursor.execute(self._upsert_query(len(batch)), params)
+
+    def _load_batch_infile(self, cursor: Any, batch: DataFrame) -> None:
+        """
+        Loads a batch into a temporary staging table with LOAD DATA LOCAL
+        INFILE, then upserts it into the target table with one statement.
+        """
+        staging = f"{self._table}_staging"
+        columns = ", ".join(self._columns)
+        updates = ", ".join(f"{c} = VALUES({c})" for c in self._update_columns)
+
+        export = DataFrame(
+            {column: self._column_values(batch, column) for column in self._columns}
+        )
+        # Backslashes start escape sequences in LOAD DATA, \N is NULL.
+        for column in export.columns:
+            if is_object_dtype(export[column]):
+                export[column] = export[column].map(
+                    lambda v: v.replace("\\", "\\\\") if isinstance(v, str) else v
+                )
+
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False, encoding="utf-8", newline=""
+        ) as file:
+            export.to_csv(
+                file,
+                index=False,
+                header=False,
+                na_rep="\\N",
+                quoting=csv.QUOTE_MINIMAL,
+                lineterminator="\n",
+            )
+        try:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE IF NOT EXISTS {staging} LIKE {self._table}"
+            )
+            cursor.execute(f"DELETE FROM {staging}")
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {staging} "
+                "CHARACTER SET utf8mb4 FIELDS TERMINATED BY ',' "
+                "OPTIONALLY ENCLOSED BY '\"' LINES TERMINATED BY '\\n' "
+                f"({columns})",
+                (file.name,),
+            )
+            cursor.execute(
+                f"INSERT INTO {self._table} ({columns}) "
+                f"SELECT {columns} FROM {staging} "
+                f"ON DUPLICATE KEY UPDATE {updates}"
+            )
+        finally:
+            os.remove(file.name)
+
+
+class CommentDataBaseManager(DatabaseManager):
+    _table = "comments"
+    _columns = (
+        "id",
+        "post_id",
+        "author",
+        "subreddit",
+        "body",
+        "score",
+        "created_utc",
+        "created_datetime",
+        "sentiment_score",
+    )
+    _optional_columns = ("created_utc", "created_datetime", "sentiment_score")
+    _update_columns = ("score",)
+
+    def run(self, comments: DataFrame):
+        """Insert Reddit comments into the database."""
+        self._bulk_upsert(comments)
+
+
+class PostDataBaseManager(DatabaseManager):
+    _table = "posts"
+    _columns = (
+        "id",
+        "title",
+        "author",
+        "subreddit",
+        "content",
+        "created_datetime",
+        "score",
+        "num_comments",
+        "url",
+        "category",
+        "keyword",
+        "sentiment_score",
+    )
+    _optional_columns = ("category", "keyword", "sentiment_score")
+    _update_columns = ("score", "num_comments")
+
+    def run(self, posts: DataFrame):
+        """Insert Reddit posts into the database."""
+        self._bulk_upsert(posts)
@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+from typing import Any, Iterable, Optional
+
+
+class FetchStateStore:
+    """
+    Local SQLite store of what previous runs already fetched.
+
+    For every (subreddit, keyword) search it keeps the newest `created_utc`
+    seen and the IDs of the posts found, for every post the number of
+    comments it had when its comments were fetched.
+    """
+
+    _SQLITE_MAX_VARIABLES = 500
+
+    def __init__(self, path: str = "fetch_state.sqlite") -> None:
+        """
+        Initializes the FetchStateStore object.
+
+        Parameters:
+        - path (str): SQLite file holding the checkpoints.
+
+        Returns:
+        - None
+        """
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS search_checkpoints (
+                subreddit TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                newest_created_utc REAL NOT NULL,
+                PRIMARY KEY (subreddit, keyword)
+            );
+            CREATE TABLE IF NOT EXISTS seen_posts (
+                subreddit TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                post_id TEXT NOT NULL,
+                PRIMARY KEY (subreddit, keyword, post_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS comment_checkpoints (
+                post_id TEXT PRIMARY KEY,
+                num_comments INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def get_search_checkpoint(
+        self, subreddit: str, keyword: str
+    ) -> tuple[Optional[float], set[str]]:
+        """
+        Returns the newest `created_utc` and the post IDs seen by a search,
+        (None, set()) if it never ran.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT newest_created_utc FROM search_checkpoints "
+                "WHERE subreddit = ? AND keyword = ?",
+                (subreddit, keyword),
+            ).fetchone()
+            seen = self._connection.execute(
+                "SELECT post_id FROM seen_posts WHERE subreddit = ? AND keyword = ?",
+                (subreddit, keyword),
+            ).fetchall()
+        return (row[0] if row else None), {post_id for (post_id,) in seen}
+
+    def update_search_checkpoint(
+        self, subreddit: str, keyword: str, posts: list[dict[str, Any]]
+    ) -> None:
+        """
+        Records the posts a search found and advances its high-water mark.
+        """
+        if not posts:
+            return
+        newest = max(post["created_utc"] for post in posts)
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                INSERT INTO search_checkpoints VALUES (?, ?, ?)
+                ON CONFLICT (subreddit, keyword) DO UPDATE SET newest_created_utc =
+                MAX(newest_created_utc, excluded.newest_created_utc)
+                """,
+                (subreddit, keyword, newest),
+            )
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO seen_posts VALUES (?, ?, ?)",
+                [(subreddit, keyword, post["id"]) for post in posts],
+            )
+
+    def get_comment_counts(self, post_ids: Iterable[str]) -> dict[str, int]:
+        """
+        Returns the number of comments each post had at its last fetch.
+        """
+        post_ids = list(post_ids)
+        counts = {}
+        with self._lock:
+            for start in range(0, len(post_ids), self._SQLITE_MAX_VARIABLES):
+                chunk = post_ids[start : start + self._SQLITE_MAX_VARIABLES]
+                placeholders = ", ".join("?" * len(chunk))
+                counts.update(
+                    self._connection.execute(
+                        "SELECT post_id, num_comments FROM comment_checkpoints "
+                        f"WHERE post_id IN ({placeholders})",
+                        chunk,
+                    ).fetchall()
+                )
+        return counts
+
+    def update_comment_count(self, post_id: str, num_comments: int) -> None:
+        """
+        Records the number of comments a post had when it was fetched.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO comment_checkpoints VALUES (?, ?)",
+                (post_id, int(num_comments)),
+            )
+
+    def close(self) -> None:
+        """Closes the state store."""
+        self._connection.close()
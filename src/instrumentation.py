@@ -0,0 +1,219 @@
+import json
+import os
+import secrets
+import threading
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Optional, TypeVar
+
+from .logger import setup_logger
+
+R = TypeVar("R")
+
+
+@dataclass
+class StageMetrics:
+    """Measurements of a single stage call."""
+
+    pipeline: str
+    stage: str
+    wall_seconds: float
+    cpu_seconds: float
+    rows_in: int
+    rows_out: int
+    rows_per_second: float
+    peak_memory_bytes: Optional[int]
+    status: str
+
+
+def _rows(data: Any) -> int:
+    try:
+        return len(data)
+    except TypeError:
+        return 0
+
+
+class Instrumentation:
+    """
+    Measures the stages of the pipelines and exports the measurements.
+
+    Every measured call is logged as a structured record. Optionally the
+    totals per stage are kept in a Prometheus text-format file, e.g. for the
+    node_exporter textfile collector, and every call is appended to a JSONL
+    file as an OpenTelemetry-style span.
+
+    CPU time is the time of the calling thread, work a stage hands to other
+    processes is not included. Memory is traced process-wide, so with
+    stages running concurrently the peaks overlap.
+    """
+
+    def __init__(
+        self,
+        trace_memory: bool = False,
+        prometheus_path: Optional[str] = None,
+        spans_path: Optional[str] = None,
+    ) -> None:
+        """
+        Initializes the Instrumentation object.
+
+        Parameters:
+        - trace_memory (bool): Record the peak of the memory allocated during
+        each stage with tracemalloc, which slows allocations down.
+        - prometheus_path (str | None): Prometheus text-format file
+        rewritten after every measurement.
+        - spans_path (str | None): JSONL file every measurement is appended
+        to as a span.
+
+        Returns:
+        - None
+        """
+        self._logger = setup_logger("EcoPulse")
+        self._trace_memory = trace_memory
+        self._prometheus_path = prometheus_path
+        self._spans_path = spans_path
+        self._trace_id = secrets.token_hex(16)
+        self._lock = threading.Lock()
+        self._totals: dict[tuple[str, str], dict[str, float]] = {}
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def measure(
+        self, pipeline: str, stage: str, function: Callable[[Any], R], data: Any
+    ) -> R:
+        """
+        Runs a stage on `data` and records its measurements.
+
+        Args:
+        - pipeline (str): Name of the pipeline.
+        - stage (str): Name of the stage.
+        - function (Callable): The stage, called with `data`.
+        - data (Any): Input of the stage, rows are counted with `len`.
+
+        Returns:
+        - The output of the stage.
+        """
+        if self._trace_memory:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        started = time.time_ns()
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        status, result = "ok", None
+        try:
+            result = function(data)
+            return result
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            wall = time.perf_counter() - wall_started
+            rows_in, rows_out = _rows(data), _rows(result)
+            peak = None
+            if self._trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - memory_before
+            self._record(
+                StageMetrics(
+                    pipeline=pipeline,
+                    stage=stage,
+                    wall_seconds=wall,
+                    cpu_seconds=time.thread_time() - cpu_started,
+                    rows_in=rows_in,
+                    rows_out=rows_out,
+                    rows_per_second=max(rows_in, rows_out) / max(wall, 1e-9),
+                    peak_memory_bytes=peak,
+                    status=status,
+                ),
+                started,
+            )
+
+    def _record(self, metrics: StageMetrics, started_ns: int) -> None:
+        record = asdict(metrics)
+        self._logger.info(
+            f"Stage metrics: {json.dumps(record)}", extra={"stage_metrics": record}
+        )
+        with self._lock:
+            totals = self._totals.setdefault(
+                (metrics.pipeline, metrics.stage),
+                {
+                    "calls": 0,
+                    "errors": 0,
+                    "wall_seconds": 0.0,
+                    "cpu_seconds": 0.0,
+                    "rows_in": 0,
+                    "rows_out": 0,
+                    "peak_memory_bytes": 0,
+                },
+            )
+            totals["calls"] += 1
+            totals["errors"] += metrics.status == "error"
+            totals["wall_seconds"] += metrics.wall_seconds
+            totals["cpu_seconds"] += metrics.cpu_seconds
+            totals["rows_in"] += metrics.rows_in
+            totals["rows_out"] += metrics.rows_out
+            totals["peak_memory_bytes"] = max(
+                totals["peak_memory_bytes"], metrics.peak_memory_bytes or 0
+            )
+            if self._spans_path is not None:
+                self._write_span(metrics, started_ns)
+            if self._prometheus_path is not None:
+                self._write_prometheus()
+
+    def totals(self) -> dict[tuple[str, str], dict[str, float]]:
+        """Returns the totals per (pipeline, stage)."""
+        with self._lock:
+            return {key: dict(totals) for key, totals in self._totals.items()}
+
+    def _write_span(self, metrics: StageMetrics, started_ns: int) -> None:
+        span = {
+            "name": f"{metrics.pipeline}.{metrics.stage}",
+            "trace_id": self._trace_id,
+            "span_id": secrets.token_hex(8),
+            "start_time_unix_nano": started_ns,
+            "end_time_unix_nano": started_ns + int(metrics.wall_seconds * 1e9),
+            "status": {"code": "ERROR" if metrics.status == "error" else "OK"},
+            "attributes": {
+                f"ecopulse.{key}": value
+                for key, value in asdict(metrics).items()
+                if key != "status" and value is not None
+            },
+        }
+        with open(self._spans_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(span) + "\n")
+
+    # Prometheus metric, type and help text per total.
+    _PROMETHEUS_METRICS = {
+        "calls": ("ecopulse_stage_calls_total", "counter", "Stage calls."),
+        "errors": ("ecopulse_stage_errors_total", "counter", "Failed stage calls."),
+        "wall_seconds": (
+            "ecopulse_stage_wall_seconds_total",
+            "counter",
+            "Wall time spent in the stage.",
+        ),
+        "cpu_seconds": (
+            "ecopulse_stage_cpu_seconds_total",
+            "counter",
+            "CPU time of the calling thread spent in the stage.",
+        ),
+        "rows_in": ("ecopulse_stage_rows_in_total", "counter", "Rows received."),
+        "rows_out": ("ecopulse_stage_rows_out_total", "counter", "Rows produced."),
+        "peak_memory_bytes": (
+            "ecopulse_stage_peak_memory_bytes",
+            "gauge",
+            "Largest memory peak of a stage call, 0 if not traced.",
+        ),
+    }
+
+    def _write_prometheus(self) -> None:
+        lines = []
+        for key, (name, kind, help_text) in self._PROMETHEUS_METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (pipeline, stage), totals in sorted(self._totals.items()):
+                labels = f'pipeline="{pipeline}",stage="{stage}"'
+                lines.append(f"{name}{{{labels}}} {totals[key]}")
+        # Written aside and renamed, scrapers never see a partial file.
+        temporary_path = f"{self._prometheus_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(temporary_path, self._prometheus_path)
@@ -1,14 +1,42 @@
+import argparse
+import asyncio
 import os
 import json
+import socket
+from concurrent.futures import ThreadPoolExecutor
 
 from dotenv import load_dotenv
+from sqlalchemy import URL
 
 from .data_fetcher import RedditPostFetcher, RedditCommentFetcher
+from .change_detector import ChangeDetector
+from .connection_pool import ConnectionPool
 from .database_manager import CommentDataBaseManager, PostDataBaseManager
+from .parquet_store import ParquetStore
 from .pipeline_manager import PipelineManager
+from .stage_cache import StageCache
 from .data_cleaner import RedditPostCleaner, RedditCommentCleaner
 from .data_enricher import RedditCommentEnricher, RedditPostEnricher
 from .data_filter import RedditCommentFilter, RedditPostFilter
+from .schema import COMMENT_SCHEMA, POST_SCHEMA
+from .sentiment import create_backend
+from .sentiment_cache import SentimentCache
+from .rate_limiter import TokenBucket
+from .fetch_state import FetchStateStore
+from .instrumentation import Instrumentation
+from .logger import setup_logger
+from .async_data_fetcher import AsyncRedditCommentFetcher, AsyncRedditPostFetcher
+from .async_database_manager import (
+    AsyncCommentDataBaseManager,
+    AsyncConnectionPool,
+    AsyncPostDataBaseManager,
+)
+from .async_pipeline_manager import AsyncPipelineManager
+from .checkpoint_store import CheckpointStore
+from .near_duplicate_filter import NearDuplicateFilter
+from .sharded_crawl import CrawlWorker, seed, wait_until_finished
+from .work_queue import WorkQueue
+from .staged_executor import ClosableQueue
 
 load_dotenv()
 
@@ -24,23 +52,338 @@ DATABASE_NAME = os.getenv("DATABASE_NAME")
 with open("_config.json") as config_file:
     config = json.load(config_file)
 
-DB_URL = config["database"]["url"]
-DB_URL = f"""mysql+mysqlconnector://
-{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST}/{DATABASE_NAME}"""
+DB_BATCH_SIZE = config["database"]["batch_size"]
+DB_LOAD_DATA_INFILE = config["database"]["load_data_infile"]
+DB_POOL_SIZE = config["database"]["pool_size"]
+DB_POOL_RECYCLE = config["database"]["pool_recycle"]
+DB_CHANGE_DETECTION = config["database"]["change_detection"]
+DB_CHANGE_SNAPSHOT_DIR = config["database"]["change_snapshot_dir"]
+DB_URL = URL.create(
+    "mysql+mysqlconnector",
+    username=DATABASE_USER,
+    password=DATABASE_PASSWORD,
+    host=DATABASE_HOST,
+    database=DATABASE_NAME,
+)
 
 CATEGORIES = config["categories"]
 POST_LIMIT = config["fetcher_settings"]["post_limit"]
 MORE_COMMENTS_LIMIT = config["fetcher_settings"]["more_comments_limit"]
 TIME_FILTER = config["fetcher_settings"]["time_filter"]
 SORT_FILTER = config["fetcher_settings"]["sort_filter"]
+FETCHER_MAX_WORKERS = config["fetcher_settings"]["max_workers"]
+REQUESTS_PER_MINUTE = config["fetcher_settings"]["requests_per_minute"]
+MAX_RETRIES = config["fetcher_settings"]["max_retries"]
+RETRY_BACKOFF = config["fetcher_settings"]["retry_backoff"]
+INCREMENTAL = config["fetcher_settings"]["incremental"]
+FETCH_STATE_PATH = config["fetcher_settings"]["state_path"]
 
 MIN_UPVOTES = config["filter_settings"]["min_upvotes"]
 MIN_COMMENTS = config["filter_settings"]["min_comments"]
 MIN_WORDS = config["filter_settings"]["min_words"]
 SENTIMENT_THRESHOLD = config["filter_settings"]["sentiment_threshold"]
+LAZY_SENTIMENT = config["filter_settings"]["lazy_sentiment"]
 
+CHUNK_SIZE = config["pipeline_settings"]["chunk_size"]
+PIPELINED = config["pipeline_settings"]["pipelined"]
+QUEUE_SIZE = config["pipeline_settings"]["queue_size"]
+STAGE_CACHE_PATH = config["pipeline_settings"]["stage_cache_path"]
+CHECKPOINT_PATH = config["pipeline_settings"]["checkpoint_path"]
+
+ASYNC_MODE = config["async_settings"]["enabled"]
+ASYNC_MAX_CONCURRENCY = config["async_settings"]["max_concurrency"]
+ASYNC_MAX_PENDING_WRITES = config["async_settings"]["max_pending_writes"]
+ASYNC_POOL_SIZE = config["async_settings"]["pool_size"]
+PIPELINE_GRAPH = config["pipeline_graph"]
+
+CRAWL_QUEUE_PATH = config["crawl_settings"]["queue_path"]
+CRAWL_LEASE_SECONDS = config["crawl_settings"]["lease_seconds"]
+CRAWL_MAX_ATTEMPTS = config["crawl_settings"]["max_attempts"]
+CRAWL_COMMENT_SHARD_SIZE = config["crawl_settings"]["comment_shard_size"]
+CRAWL_POLL_INTERVAL = config["crawl_settings"]["poll_interval"]
+
+LANDING_ZONE_PATH = config["landing_zone_settings"]["path"]
+LANDING_ZONE_COMPRESSION = config["landing_zone_settings"]["compression"]
+REPLAY_FROM = config["landing_zone_settings"]["replay_from"]
+REPLAY_DATES = (
+    config["landing_zone_settings"]["replay_start_date"],
+    config["landing_zone_settings"]["replay_end_date"],
+)
+
+TRACE_MEMORY = config["instrumentation_settings"]["trace_memory"]
+PROMETHEUS_PATH = config["instrumentation_settings"]["prometheus_path"]
+SPANS_PATH = config["instrumentation_settings"]["spans_path"]
+
+SENTIMENT_CACHE_PATH = config["enricher_settings"]["sentiment_cache_path"]
+SENTIMENT_CACHE_MEMORY_ITEMS = config["enricher_settings"][
+    "sentiment_cache_memory_items"
+]
+ENRICHER_PARALLEL = config["enricher_settings"]["parallel"]
+ENRICHER_MAX_WORKERS = config["enricher_settings"]["max_workers"]
+ENRICHER_CHUNK_SIZE = config["enricher_settings"]["chunk_size"]
+SENTIMENT_BACKEND = config["enricher_settings"]["sentiment_backend"]
+SENTIMENT_LEXICON_PATH = config["enricher_settings"]["sentiment_lexicon_path"]
+
+DEDUPLICATION = config["deduplication_settings"]["enabled"]
+DEDUPLICATION_STATE_DIR = config["deduplication_settings"]["state_dir"]
+DEDUPLICATION_THRESHOLD = config["deduplication_settings"]["threshold"]
+DEDUPLICATION_NUM_PERM = config["deduplication_settings"]["num_perm"]
+DEDUPLICATION_BANDS = config["deduplication_settings"]["bands"]
+DEDUPLICATION_SHINGLE_SIZE = config["deduplication_settings"]["shingle_size"]
+DEDUPLICATION_MIN_LENGTH = config["deduplication_settings"]["min_length"]
+
+
+def make_change_detector(table, owner=None):
+    """
+    Returns the change detector of a table, None if detection is disabled.
+    Every owner, e.g. a crawl worker, keeps a snapshot of its own.
+    """
+    if not DB_CHANGE_DETECTION:
+        return None
+    if DB_CHANGE_SNAPSHOT_DIR is None:
+        return ChangeDetector()
+    name = f"{table}_index.npz" if owner is None else f"{table}_index_{owner}.npz"
+    return ChangeDetector(os.path.join(DB_CHANGE_SNAPSHOT_DIR, name))
+
+
+def make_landing_zone(dataset):
+    """Returns the Parquet landing zone of a dataset, None if disabled."""
+    if LANDING_ZONE_PATH is None:
+        return None
+    return ParquetStore(
+        os.path.join(LANDING_ZONE_PATH, dataset), compression=LANDING_ZONE_COMPRESSION
+    )
+
+
+def make_stage_cache(dataset):
+    """Returns the stage cache of a dataset, None if disabled."""
+    if STAGE_CACHE_PATH is None:
+        return None
+    return StageCache(os.path.join(STAGE_CACHE_PATH, dataset))
+
+
+def make_deduplicator(dataset, text_column):
+    """Returns the near-duplicate filter of a dataset, None if disabled."""
+    if not DEDUPLICATION:
+        return None
+    return NearDuplicateFilter(
+        text_column,
+        os.path.join(DEDUPLICATION_STATE_DIR, f"{dataset}_near_duplicates.sqlite"),
+        threshold=DEDUPLICATION_THRESHOLD,
+        num_perm=DEDUPLICATION_NUM_PERM,
+        bands=DEDUPLICATION_BANDS,
+        shingle_size=DEDUPLICATION_SHINGLE_SIZE,
+        min_length=DEDUPLICATION_MIN_LENGTH,
+    )
+
+
+def reddit_credentials(prefix=None):
+    """
+    Returns the Reddit API client ID, secret and user agent, read from the
+    environment variables prefixed with `prefix`_ if one is given.
+    """
+    prefix = f"{prefix}_" if prefix else ""
+    names = ("REDDIT_CLIENT_ID", "REDDIT_CLIENT_SECRET", "REDDIT_USER_AGENT")
+    if not prefix:
+        return REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT
+    missing = [prefix + name for name in names if not os.getenv(prefix + name)]
+    if missing:
+        raise ValueError(f"Missing credentials: {', '.join(missing)}")
+    return tuple(os.getenv(prefix + name) for name in names)
+
+
+def make_processors(
+    dataset,
+    sentiment_backend,
+    sentiment_cache,
+    db_pool,
+    owner=None,
+    asynchronous=False,
+):
+    """
+    Builds the processors and the database manager of the post or comment
+    pipeline, an async database manager for the async mode.
+    """
+    enricher_class = RedditPostEnricher if dataset == "posts" else RedditCommentEnricher
+    enricher = enricher_class(
+        sentiment_cache,
+        parallel=ENRICHER_PARALLEL,
+        max_workers=ENRICHER_MAX_WORKERS,
+        chunk_size=ENRICHER_CHUNK_SIZE,
+        sentiment_backend=sentiment_backend,
+        lazy_sentiment=LAZY_SENTIMENT,
+    )
+    # Lazily enriched rows are scored by the filter and the DB writer.
+    scorer = enricher.score_missing if LAZY_SENTIMENT else None
+    if dataset == "posts":
+        # The pipelines hand every fetched chunk to the cleaner and drop it.
+        cleaner = RedditPostCleaner(inplace=True)
+        filter = RedditPostFilter(
+            min_upvotes=MIN_UPVOTES,
+            min_comments=MIN_COMMENTS,
+            min_words=MIN_WORDS,
+            sentiment_threshold=SENTIMENT_THRESHOLD,
+            sentiment_scorer=scorer,
+        )
+    else:
+        cleaner = RedditCommentCleaner(inplace=True)
+        filter = RedditCommentFilter(sentiment_scorer=scorer)
+    return {
+        "cleaner": cleaner,
+        "deduplicator": make_deduplicator(
+            dataset, "title" if dataset == "posts" else "body"
+        ),
+        "enricher": enricher,
+        "filter": filter,
+        "db_manager": make_db_manager(
+            dataset, db_pool, make_change_detector(dataset, owner), scorer, asynchronous
+        ),
+    }
+
+
+def make_db_manager(dataset, db_pool, change_detector, scorer, asynchronous):
+    """Builds the database manager of the post or comment table."""
+    if asynchronous:
+        db_manager_class = (
+            AsyncPostDataBaseManager
+            if dataset == "posts"
+            else AsyncCommentDataBaseManager
+        )
+        return db_manager_class(
+            db_pool,
+            batch_size=DB_BATCH_SIZE,
+            change_detector=change_detector,
+            sentiment_scorer=scorer,
+        )
+    db_manager_class = (
+        PostDataBaseManager if dataset == "posts" else CommentDataBaseManager
+    )
+    return db_manager_class(
+        db_pool,
+        batch_size=DB_BATCH_SIZE,
+        load_data_infile=DB_LOAD_DATA_INFILE,
+        change_detector=change_detector,
+        sentiment_scorer=scorer,
+    )
+
+
+def close_processors(processors):
+    """Releases what the processors of a pipeline hold."""
+    processors["enricher"].close()
+    processors["db_manager"].close_connection()
+    if processors["deduplicator"] is not None:
+        processors["deduplicator"].close()
+
+
+def make_pipeline(
+    dataset,
+    fetcher,
+    processors,
+    instrumentation,
+    replay=True,
+    checkpoint=None,
+    raise_store_errors=False,
+):
+    """
+    Builds the post or comment pipeline around a fetcher. Posts are
+    committed by ID, comments by the ID of their post.
+    """
+    return PipelineManager(
+        fetcher=fetcher,
+        cleaner=processors["cleaner"],
+        enricher=processors["enricher"],
+        filter=processors["filter"],
+        db_manager=processors["db_manager"],
+        chunk_size=CHUNK_SIZE,
+        pipelined=PIPELINED,
+        queue_size=QUEUE_SIZE,
+        landing_zone=make_landing_zone(dataset),
+        replay_from=REPLAY_FROM if replay else None,
+        replay_dates=REPLAY_DATES,
+        instrumentation=instrumentation,
+        name=dataset,
+        schema=POST_SCHEMA if dataset == "posts" else COMMENT_SCHEMA,
+        deduplicator=processors["deduplicator"],
+        graph=PIPELINE_GRAPH,
+        stage_cache=make_stage_cache(dataset),
+        checkpoint=checkpoint,
+        checkpoint_key="id" if dataset == "posts" else "post_id",
+        checkpoint_output="num_comments" if dataset == "posts" else None,
+        raise_store_errors=raise_store_errors,
+    )
+
+
+def make_shared_resources(asynchronous=False):
+    """
+    Builds what both pipelines share: the sentiment backend and cache, the
+    fetch state, the instrumentation and the database connection pool, an
+    aiomysql pool for the async mode.
+    """
+    sentiment_backend = create_backend(SENTIMENT_BACKEND, SENTIMENT_LEXICON_PATH)
+    return {
+        "sentiment_backend": sentiment_backend,
+        "sentiment_cache": SentimentCache(
+            SENTIMENT_CACHE_PATH,
+            max_memory_items=SENTIMENT_CACHE_MEMORY_ITEMS,
+            namespace=sentiment_backend.name,
+        ),
+        "fetch_state": FetchStateStore(FETCH_STATE_PATH) if INCREMENTAL else None,
+        "instrumentation": Instrumentation(
+            trace_memory=TRACE_MEMORY,
+            prometheus_path=PROMETHEUS_PATH,
+            spans_path=SPANS_PATH,
+        ),
+        # One pool serves the post and the comment writers.
+        "db_pool": (
+            AsyncConnectionPool(
+                DB_URL, pool_size=ASYNC_POOL_SIZE, pool_recycle=DB_POOL_RECYCLE
+            )
+            if asynchronous
+            else ConnectionPool(
+                DB_URL,
+                pool_size=DB_POOL_SIZE,
+                pool_recycle=DB_POOL_RECYCLE,
+                load_data_infile=DB_LOAD_DATA_INFILE,
+            )
+        ),
+    }
+
+
+def close_shared_resources(resources):
+    resources["db_pool"].close()
+    resources["sentiment_cache"].close()
+    if resources["fetch_state"] is not None:
+        resources["fetch_state"].close()
+
+
+def run_pipelines(resume=False):
+    """
+    Crawls every configured category in this process. A resumed run
+    continues the last one that did not finish from its checkpoints.
+    """
+    if CHECKPOINT_PATH is None:
+        if resume:
+            raise ValueError("Resuming requires pipeline_settings.checkpoint_path")
+        checkpoint = None
+    else:
+        checkpoint = CheckpointStore(CHECKPOINT_PATH, resume=resume)
+    resources = make_shared_resources()
+    fetch_state = resources["fetch_state"]
+    instrumentation = resources["instrumentation"]
+    rate_limiter = TokenBucket(REQUESTS_PER_MINUTE)
+    post_processors = make_processors(
+        "posts",
+        resources["sentiment_backend"],
+        resources["sentiment_cache"],
+        resources["db_pool"],
+    )
+    comment_processors = make_processors(
+        "comments",
+        resources["sentiment_backend"],
+        resources["sentiment_cache"],
+        resources["db_pool"],
+    )
 
-def main():
     post_fetcher = RedditPostFetcher(
         REDDIT_CLIENT_ID,
         REDDIT_CLIENT_SECRET,
@@ -49,50 +392,365 @@ def main():
         POST_LIMIT,
         TIME_FILTER,
         SORT_FILTER,
+        max_workers=FETCHER_MAX_WORKERS,
+        rate_limiter=rate_limiter,
+        max_retries=MAX_RETRIES,
+        retry_backoff=RETRY_BACKOFF,
+        fetch_state=fetch_state,
+        completed_post_ids=(
+            None if checkpoint is None else checkpoint.completed_keys("posts")
+        ),
+    )
+    post_pipeline = make_pipeline(
+        "posts", post_fetcher, post_processors, instrumentation, checkpoint=checkpoint
     )
 
-    post_cleaner = RedditPostCleaner()
-    post_enricher = RedditPostEnricher()
-    post_filter = RedditPostFilter(
-        min_upvotes=MIN_UPVOTES,
-        min_comments=MIN_COMMENTS,
-        min_words=MIN_WORDS,
-        sentiment_threshold=SENTIMENT_THRESHOLD,
+    post_ids = ClosableQueue()
+    num_comments: dict[str, int] = {}
+
+    def publish(counts):
+        new_counts = {
+            post_id: count
+            for post_id, count in counts.items()
+            if post_id not in num_comments
+        }
+        num_comments.update(new_counts)
+        for post_id in new_counts:
+            post_ids.put(post_id)
+
+    def publish_post_ids():
+        """Hands the IDs of the filtered posts to the comment fetcher."""
+        try:
+            if checkpoint is not None:
+                # Posts kept before the run was interrupted.
+                publish(checkpoint.outputs("posts"))
+                if checkpoint.pipeline_finished("posts"):
+                    return
+            # Saved to the checkpoint with their batch by the pipeline.
+            for post_chunk in post_pipeline.stream():
+                publish(
+                    dict(
+                        zip(
+                            post_chunk.get("id", []),
+                            post_chunk.get("num_comments", []),
+                        )
+                    )
+                )
+        finally:
+            post_ids.close()
+            post_processors["enricher"].close()
+
+    post_executor = ThreadPoolExecutor(max_workers=1)
+    post_run = post_executor.submit(publish_post_ids)
+    try:
+        if PIPELINED:
+            # Comments are fetched while the post pipeline is still running.
+            comment_post_ids = post_ids
+        else:
+            post_run.result()
+            comment_post_ids = list(post_ids)
+
+        comment_fetcher = RedditCommentFetcher(
+            REDDIT_CLIENT_ID,
+            REDDIT_CLIENT_SECRET,
+            REDDIT_USER_AGENT,
+            MORE_COMMENTS_LIMIT,
+            comment_post_ids,
+            max_workers=FETCHER_MAX_WORKERS,
+            rate_limiter=rate_limiter,
+            max_retries=MAX_RETRIES,
+            retry_backoff=RETRY_BACKOFF,
+            num_comments=num_comments,
+            fetch_state=fetch_state,
+            completed_post_ids=(
+                None if checkpoint is None else checkpoint.completed_keys("comments")
+            ),
+        )
+        comment_pipeline = make_pipeline(
+            "comments",
+            comment_fetcher,
+            comment_processors,
+            instrumentation,
+            checkpoint=checkpoint,
+        )
+        # The filtered comments are not needed afterwards, so they are not kept.
+        for _ in comment_pipeline.stream():
+            pass
+        post_run.result()
+        if checkpoint is not None:
+            checkpoint.finish()
+    finally:
+        # Waits for the post pipeline, which uses the processors too.
+        post_executor.shutdown()
+        close_processors(post_processors)
+        close_processors(comment_processors)
+        close_shared_resources(resources)
+        if checkpoint is not None:
+            checkpoint.close()
+
+
+def make_async_pipeline(dataset, fetcher, processors):
+    """Builds the post or comment pipeline of the async mode."""
+    return AsyncPipelineManager(
+        fetcher=fetcher,
+        cleaner=processors["cleaner"],
+        enricher=processors["enricher"],
+        filter=processors["filter"],
+        db_manager=processors["db_manager"],
+        chunk_size=CHUNK_SIZE,
+        max_pending_writes=ASYNC_MAX_PENDING_WRITES,
+        name=dataset,
+        schema=POST_SCHEMA if dataset == "posts" else COMMENT_SCHEMA,
+        deduplicator=processors["deduplicator"],
+        graph=PIPELINE_GRAPH,
+        checkpoint_key="id" if dataset == "posts" else "post_id",
     )
-    post_db_manager = PostDataBaseManager(
-        DB_URL, DATABASE_HOST, DATABASE_USER, DATABASE_PASSWORD, DATABASE_NAME
+
+
+async def crawl_async():
+    """
+    Crawls every configured category on an event loop. Comments are
+    fetched while the post pipeline still runs.
+    """
+    resources = make_shared_resources(asynchronous=True)
+    db_pool = resources["db_pool"]
+    await db_pool.open()
+    fetch_state = resources["fetch_state"]
+    rate_limiter = TokenBucket(REQUESTS_PER_MINUTE)
+    post_processors, comment_processors = (
+        make_processors(
+            dataset,
+            resources["sentiment_backend"],
+            resources["sentiment_cache"],
+            db_pool,
+            asynchronous=True,
+        )
+        for dataset in ("posts", "comments")
     )
 
-    post_pipeline = PipelineManager(
-        fetcher=post_fetcher,
-        cleaner=post_cleaner,
-        enricher=post_enricher,
-        filter=post_filter,
-        db_manager=post_db_manager,
+    post_fetcher = AsyncRedditPostFetcher(
+        REDDIT_CLIENT_ID,
+        REDDIT_CLIENT_SECRET,
+        REDDIT_USER_AGENT,
+        CATEGORIES,
+        POST_LIMIT,
+        TIME_FILTER,
+        SORT_FILTER,
+        max_concurrency=ASYNC_MAX_CONCURRENCY,
+        rate_limiter=rate_limiter,
+        max_retries=MAX_RETRIES,
+        retry_backoff=RETRY_BACKOFF,
+        fetch_state=fetch_state,
     )
-    post_filtered_data = post_pipeline.run()
+    post_ids: asyncio.Queue = asyncio.Queue()
+    num_comments: dict[str, int] = {}
 
-    comment_fetcher = RedditCommentFetcher(
+    async def publish_post_ids():
+        """Hands the IDs of the filtered posts to the comment fetcher."""
+        try:
+            post_pipeline = make_async_pipeline("posts", post_fetcher, post_processors)
+            async for post_chunk in post_pipeline.stream():
+                ids = post_chunk.get("id", [])
+                num_comments.update(zip(ids, post_chunk.get("num_comments", [])))
+                for post_id in ids:
+                    post_ids.put_nowait(post_id)
+        finally:
+            post_ids.put_nowait(None)
+
+    async def queued_post_ids():
+        while (post_id := await post_ids.get()) is not None:
+            yield post_id
+
+    comment_fetcher = AsyncRedditCommentFetcher(
         REDDIT_CLIENT_ID,
         REDDIT_CLIENT_SECRET,
         REDDIT_USER_AGENT,
         MORE_COMMENTS_LIMIT,
-        post_filtered_data["id"],
-    )
-    comment_cleaner = RedditCommentCleaner()
-    comment_enricher = RedditCommentEnricher()
-    comment_filter = RedditCommentFilter()
-    comment_db_mananger = CommentDataBaseManager(
-        DB_URL, DATABASE_HOST, DATABASE_USER, DATABASE_PASSWORD, DATABASE_NAME
-    )
-    comment_pipeline = PipelineManager(
-        fetcher=comment_fetcher,
-        cleaner=comment_cleaner,
-        enricher=comment_enricher,
-        filter=comment_filter,
-        db_manager=comment_db_mananger,
-    )
-    comment_pipeline.run()
+        queued_post_ids(),
+        max_concurrency=ASYNC_MAX_CONCURRENCY,
+        rate_limiter=rate_limiter,
+        max_retries=MAX_RETRIES,
+        retry_backoff=RETRY_BACKOFF,
+        num_comments=num_comments,
+        fetch_state=fetch_state,
+    )
+
+    async def store_comments():
+        comment_pipeline = make_async_pipeline(
+            "comments", comment_fetcher, comment_processors
+        )
+        # The filtered comments are not needed afterwards, so they are not kept.
+        async for _ in comment_pipeline.stream():
+            pass
+
+    try:
+        await asyncio.gather(publish_post_ids(), store_comments())
+    finally:
+        await post_fetcher.close()
+        await comment_fetcher.close()
+        close_processors(post_processors)
+        close_processors(comment_processors)
+        close_shared_resources(resources)
+        await db_pool.wait_closed()
+
+
+def run_coordinator(wait):
+    """Splits the crawl into shards, optionally waits for the workers."""
+    logger = setup_logger("EcoPulse")
+    queue = WorkQueue(CRAWL_QUEUE_PATH, max_attempts=CRAWL_MAX_ATTEMPTS)
+    added = seed(queue, CATEGORIES)
+    logger.info(f"Added {added} post shards to {CRAWL_QUEUE_PATH}: {queue.counts()}")
+    if wait:
+        wait_until_finished(queue, CRAWL_POLL_INTERVAL)
+    queue.close()
+
+
+def run_worker(worker_id, credentials_prefix):
+    """
+    Runs shards of the crawl until none is left. Every worker has its own
+    rate limit, with credentials of its own the quota adds up. Failed
+    requests and writes fail the shard, the queue hands it out again.
+    """
+    client_id, client_secret, user_agent = reddit_credentials(credentials_prefix)
+    resources = make_shared_resources()
+    fetch_state = resources["fetch_state"]
+    instrumentation = resources["instrumentation"]
+    rate_limiter = TokenBucket(REQUESTS_PER_MINUTE)
+    post_processors, comment_processors = (
+        make_processors(
+            dataset,
+            resources["sentiment_backend"],
+            resources["sentiment_cache"],
+            resources["db_pool"],
+            owner=worker_id,
+        )
+        for dataset in ("posts", "comments")
+    )
+
+    def run_posts(payload):
+        categories = {
+            payload["category"]: {
+                "subreddits": [payload["subreddit"]],
+                "keywords": payload["keywords"],
+            }
+        }
+        fetcher = RedditPostFetcher(
+            client_id,
+            client_secret,
+            user_agent,
+            categories,
+            POST_LIMIT,
+            TIME_FILTER,
+            SORT_FILTER,
+            max_workers=FETCHER_MAX_WORKERS,
+            rate_limiter=rate_limiter,
+            max_retries=MAX_RETRIES,
+            retry_backoff=RETRY_BACKOFF,
+            fetch_state=fetch_state,
+            raise_errors=True,
+        )
+        posts = make_pipeline(
+            "posts",
+            fetcher,
+            post_processors,
+            instrumentation,
+            replay=False,
+            raise_store_errors=True,
+        ).run()
+        return dict(zip(posts.get("id", []), posts.get("num_comments", [])))
+
+    def run_comments(payload):
+        fetcher = RedditCommentFetcher(
+            client_id,
+            client_secret,
+            user_agent,
+            MORE_COMMENTS_LIMIT,
+            payload["post_ids"],
+            max_workers=FETCHER_MAX_WORKERS,
+            rate_limiter=rate_limiter,
+            max_retries=MAX_RETRIES,
+            retry_backoff=RETRY_BACKOFF,
+            num_comments=payload["num_comments"],
+            fetch_state=fetch_state,
+            raise_errors=True,
+        )
+        pipeline = make_pipeline(
+            "comments",
+            fetcher,
+            comment_processors,
+            instrumentation,
+            replay=False,
+            raise_store_errors=True,
+        )
+        for _ in pipeline.stream():
+            pass
+
+    queue = WorkQueue(CRAWL_QUEUE_PATH, max_attempts=CRAWL_MAX_ATTEMPTS)
+    try:
+        CrawlWorker(
+            queue,
+            worker_id,
+            run_posts,
+            run_comments,
+            lease_seconds=CRAWL_LEASE_SECONDS,
+            comment_shard_size=CRAWL_COMMENT_SHARD_SIZE,
+            poll_interval=CRAWL_POLL_INTERVAL,
+        ).run()
+    finally:
+        queue.close()
+        close_processors(post_processors)
+        close_processors(comment_processors)
+        close_shared_resources(resources)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Fetches, processes and stores Reddit data. Without a "
+        "mode every category is crawled by this process."
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the last crawl that did not finish from its checkpoints",
+    )
+    modes = parser.add_subparsers(dest="mode")
+    coordinator = modes.add_parser(
+        "coordinator", help="split the crawl into shards for the workers"
+    )
+    coordinator.add_argument(
+        "--wait", action="store_true", help="report progress until the crawl is done"
+    )
+    worker = modes.add_parser("worker", help="run shards of a sharded crawl")
+    worker.add_argument(
+        "--worker-id",
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="unique ID of the worker, host and process ID by default",
+    )
+    worker.add_argument(
+        "--credentials",
+        metavar="PREFIX",
+        help="read the API credentials from PREFIX_REDDIT_CLIENT_ID, "
+        "PREFIX_REDDIT_CLIENT_SECRET and PREFIX_REDDIT_USER_AGENT",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.mode == "coordinator":
+        run_coordinator(args.wait)
+    elif args.mode == "worker":
+        run_worker(args.worker_id, args.credentials)
+    elif ASYNC_MODE:
+        if args.resume or CHECKPOINT_PATH is not None:
+            # Rejected rather than silently crawling without checkpoints.
+            raise ValueError(
+                "The async mode does not checkpoint, unset "
+                "pipeline_settings.checkpoint_path and run without --resume"
+            )
+        asyncio.run(crawl_async())
+    else:
+        run_pipelines(args.resume)
 
 
 if __name__ == "__main__":
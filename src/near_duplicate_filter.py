@@ -0,0 +1,342 @@
+import json
+import sqlite3
+import threading
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .data_processor import DataProcessor
+from .schema import COUNT
+
+
+class NearDuplicateFilter(DataProcessor):
+    """
+    Collapses near-duplicate texts, like copy-paste bot replies and reposted
+    titles, to the first row seen with that text.
+
+    Every text is reduced to a MinHash signature of its character shingles
+    and the signature is split into bands; texts sharing a band are
+    candidates, and a candidate whose signatures agree on at least
+    `threshold` of their values (the estimated Jaccard similarity of the
+    shingle sets) is a near-duplicate. Only the candidates are compared, so
+    the work grows with the number of rows rather than with its square.
+
+    The signatures and bands of the canonical rows, the near-duplicates
+    found and the number of duplicates per canonical row are kept in a
+    SQLite file, so duplicates of rows from previous runs are found as
+    well. A row whose ID was seen before is never a duplicate of itself: a
+    canonical row fetched again passes, a duplicate fetched again is
+    dropped without being counted twice.
+    """
+
+    _SQLITE_MAX_VARIABLES = 500
+    _SEED = 0x5EED
+
+    def __init__(
+        self,
+        text_column: str,
+        path: str = "near_duplicates.sqlite",
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        min_length: int = 20,
+    ) -> None:
+        """
+        Initializes the NearDuplicateFilter object.
+
+        Parameters:
+        - text_column (str): Cleaned text compared, "title" or "body".
+        - path (str): SQLite file holding the state, ":memory:" to keep it
+        for the lifetime of the object only.
+        - threshold (float): Estimated Jaccard similarity from which two
+        texts are near-duplicates.
+        - num_perm (int): Number of hash functions of a signature.
+        - bands (int): Number of bands a signature is split into, more
+        bands find candidates of lower similarity.
+        - shingle_size (int): Characters per shingle.
+        - min_length (int): Texts shorter than this are never duplicates,
+        short replies like "thank you" are repeated legitimately.
+
+        Returns:
+        - None
+        """
+        super().__init__()
+        if num_perm % bands:
+            raise ValueError(
+                f"num_perm ({num_perm}) must be a multiple of bands ({bands})"
+            )
+        self._text_column = text_column
+        self._threshold = threshold
+        self._num_perm = num_perm
+        self._bands = bands
+        self._shingle_size = shingle_size
+        self._min_length = min_length
+
+        rng = np.random.default_rng(self._SEED)
+        # Multiply-shift hashing, the multipliers have to be odd.
+        self._multipliers = rng.integers(0, 2**64, num_perm, dtype=np.uint64) | 1
+        self._increments = rng.integers(0, 2**64, num_perm, dtype=np.uint64)
+        self._band_multipliers = (
+            rng.integers(0, 2**64, num_perm // bands, dtype=np.uint64) | 1
+        )
+        self._powers = np.uint64(257) ** np.arange(shingle_size, dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS minhash_settings (
+                name TEXT PRIMARY KEY, value TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS canonical_texts (
+                id TEXT PRIMARY KEY,
+                signature BLOB NOT NULL,
+                duplicate_count INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS lsh_buckets (
+                bucket INTEGER NOT NULL,
+                band INTEGER NOT NULL,
+                id TEXT NOT NULL,
+                PRIMARY KEY (bucket, band, id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS near_duplicates (
+                id TEXT PRIMARY KEY, canonical_id TEXT NOT NULL
+            ) WITHOUT ROWID;
+            """
+        )
+        self._check_settings()
+
+    def _check_settings(self) -> None:
+        """
+        Stores the signature settings with new state, refuses state whose
+        signatures were computed with different ones.
+        """
+        settings = json.dumps(
+            {
+                "num_perm": self._num_perm,
+                "bands": self._bands,
+                "shingle_size": self._shingle_size,
+                "seed": self._SEED,
+            },
+            sort_keys=True,
+        )
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM minhash_settings WHERE name = 'signature'"
+            ).fetchone()
+            if row is None:
+                self._connection.execute(
+                    "INSERT INTO minhash_settings (name, value) "
+                    "VALUES ('signature', ?)",
+                    (settings,),
+                )
+                self._connection.commit()
+            elif row[0] != settings:
+                raise ValueError(
+                    f"The near-duplicate state was built with {row[0]}, "
+                    f"not {settings}"
+                )
+
+    def _shingles(self, text: str) -> np.ndarray:
+        """Returns the hashes of the character shingles of a text."""
+        encoded = np.frombuffer(text.encode(), dtype=np.uint8)
+        if len(encoded) > self._shingle_size:
+            windows = sliding_window_view(encoded, self._shingle_size)
+        else:
+            windows = encoded[np.newaxis, :]
+        return windows.astype(np.uint64) @ self._powers[: windows.shape[1]]
+
+    def signatures(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Computes the MinHash signatures of texts.
+
+        Parameters:
+        - texts (Iterable[str]): Cleaned texts.
+
+        Returns:
+        - np.ndarray: uint32 array with one row of `num_perm` values per text.
+        """
+        shingles = [self._shingles(text) for text in texts]
+        signatures = np.empty((len(shingles), self._num_perm), dtype=np.uint32)
+        if not shingles:
+            return signatures
+        lengths = np.fromiter(map(len, shingles), dtype=np.int64, count=len(shingles))
+        starts = np.cumsum(lengths) - lengths
+        hashes = np.concatenate(shingles)
+        for i, (multiplier, increment) in enumerate(
+            zip(self._multipliers, self._increments)
+        ):
+            # The high half of the product is the well mixed one.
+            permuted = (hashes * multiplier + increment) >> np.uint64(32)
+            signatures[:, i] = np.minimum.reduceat(permuted, starts)
+        return signatures
+
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """Returns the bucket of every band of every signature as int64."""
+        rows = signatures.reshape(
+            len(signatures), self._bands, self._num_perm // self._bands
+        ).astype(np.uint64)
+        return (rows * self._band_multipliers).sum(axis=2).view(np.int64)
+
+    def _select(self, query: str, values: list) -> list[tuple]:
+        """Runs a query with an IN (...) clause in chunks of `values`."""
+        rows = []
+        for start in range(0, len(values), self._SQLITE_MAX_VARIABLES):
+            chunk = values[start : start + self._SQLITE_MAX_VARIABLES]
+            placeholders = ", ".join("?" * len(chunk))
+            rows.extend(
+                self._connection.execute(
+                    query.format(placeholders=placeholders), chunk
+                ).fetchall()
+            )
+        return rows
+
+    def run(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Drops the near-duplicates of rows seen before and adds the number
+        of duplicates found so far to every row as `duplicate_count`.
+
+        Args:
+        - data (pd.DataFrame): Cleaned posts or comments with an `id`.
+
+        Returns:
+        - pd.DataFrame: The rows that are not near-duplicates.
+        """
+        ids = data["id"].astype(str).tolist()
+        texts = data[self._text_column].fillna("").astype(str)
+        eligible = np.flatnonzero((texts.str.len() >= self._min_length).to_numpy())
+        signatures = self.signatures(texts.iloc[eligible])
+        band_keys = self._band_keys(signatures)
+
+        with self._lock:
+            keep, counts = self._deduplicate(ids, eligible, signatures, band_keys)
+            stored_counts = dict(
+                self._select(
+                    "SELECT id, duplicate_count FROM canonical_texts "
+                    "WHERE id IN ({placeholders})",
+                    list(set(ids)),
+                )
+            )
+
+        dropped = len(data) - int(keep.sum())
+        self._logger.info(
+            f"Near-duplicates: {dropped} of {len(data)} rows dropped, "
+            f"{len(counts)} canonical rows with new duplicates"
+        )
+        # Adding a column to a shallow copy leaves the input frame alone.
+        data = data.take(np.flatnonzero(keep)) if dropped else data.copy(deep=False)
+        data["duplicate_count"] = np.array(
+            [stored_counts.get(id_, 0) for id_ in data["id"].astype(str)],
+            dtype=COUNT,
+        )
+        return data
+
+    def _deduplicate(
+        self,
+        ids: list[str],
+        eligible: np.ndarray,
+        signatures: np.ndarray,
+        band_keys: np.ndarray,
+    ) -> tuple[np.ndarray, dict[str, int]]:
+        """
+        Finds the near-duplicates of a batch and stores the new state.
+
+        Returns:
+        - tuple[np.ndarray, dict[str, int]]: Whether to keep every row and
+        the new duplicates per canonical ID.
+        """
+        eligible_ids = [ids[i] for i in eligible]
+        canonical = {
+            id_
+            for (id_,) in self._select(
+                "SELECT id FROM canonical_texts WHERE id IN ({placeholders})",
+                eligible_ids,
+            )
+        }
+        duplicate_of = dict(
+            self._select(
+                "SELECT id, canonical_id FROM near_duplicates "
+                "WHERE id IN ({placeholders})",
+                eligible_ids,
+            )
+        )
+        buckets: dict[tuple[int, int], list[str]] = {}
+        for bucket, band, id_ in self._select(
+            "SELECT bucket, band, id FROM lsh_buckets WHERE bucket IN ({placeholders})",
+            np.unique(band_keys).tolist(),
+        ):
+            buckets.setdefault((band, bucket), []).append(id_)
+        stored_signatures = {
+            id_: np.frombuffer(signature, dtype=np.uint32)
+            for id_, signature in self._select(
+                "SELECT id, signature FROM canonical_texts WHERE id IN ({placeholders})",
+                list({id_ for bucket in buckets.values() for id_ in bucket}),
+            )
+        }
+
+        keep = np.ones(len(ids), dtype=bool)
+        counts: dict[str, int] = {}
+        new_canonical, new_duplicates = [], []
+        for row, (i, id_) in enumerate(zip(eligible, eligible_ids)):
+            if id_ in duplicate_of:
+                keep[i] = False
+                continue
+            if id_ in canonical:
+                continue
+            signature = signatures[row]
+            keys = [(band, int(key)) for band, key in enumerate(band_keys[row])]
+            candidates = {c for key in keys for c in buckets.get(key, ())}
+            best, best_similarity = None, self._threshold
+            for candidate in candidates:
+                similarity = np.mean(stored_signatures[candidate] == signature)
+                if similarity >= best_similarity:
+                    best, best_similarity = candidate, similarity
+            if best is not None:
+                keep[i] = False
+                duplicate_of[id_] = best
+                counts[best] = counts.get(best, 0) + 1
+                new_duplicates.append((id_, best))
+                continue
+            canonical.add(id_)
+            stored_signatures[id_] = signature
+            for key in keys:
+                buckets.setdefault(key, []).append(id_)
+            new_canonical.append((id_, signature, keys))
+
+        self._connection.executemany(
+            "INSERT INTO canonical_texts (id, signature) VALUES (?, ?)",
+            ((id_, signature.tobytes()) for id_, signature, _ in new_canonical),
+        )
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO lsh_buckets (bucket, band, id) VALUES (?, ?, ?)",
+            ((key, band, id_) for id_, _, keys in new_canonical for band, key in keys),
+        )
+        self._connection.executemany(
+            "INSERT INTO near_duplicates (id, canonical_id) VALUES (?, ?)",
+            new_duplicates,
+        )
+        self._connection.executemany(
+            "UPDATE canonical_texts SET duplicate_count = duplicate_count + ? "
+            "WHERE id = ?",
+            ((count, id_) for id_, count in counts.items()),
+        )
+        self._connection.commit()
+        return keep, counts
+
+    def duplicate_counts(self) -> dict[str, int]:
+        """Returns the number of near-duplicates per canonical ID, if any."""
+        with self._lock:
+            return dict(
+                self._connection.execute(
+                    "SELECT id, duplicate_count FROM canonical_texts "
+                    "WHERE duplicate_count > 0"
+                ).fetchall()
+            )
+
+    def close(self) -> None:
+        """Closes the state file."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,157 @@
+import os
+import uuid
+from typing import Iterator, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    ds = None
+
+
+class ParquetStore:
+    """
+    Landing zone keeping the output of the pipeline stages as Parquet.
+
+    Every stage is written to its own directory, partitioned Hive-style by
+    creation date, subreddit and category:
+    `<path>/<stage>/date=2024-01-31/subreddit=solar/category=energy/*.parquet`.
+    Reading a stage back allows replaying the pipeline without the Reddit
+    API.
+    """
+
+    STAGES = ("raw", "cleaned", "enriched")
+    _PARTITION_COLUMNS = ("date", "subreddit", "category")
+
+    def __init__(self, path: str, compression: str = "zstd") -> None:
+        """
+        Initializes the ParquetStore object.
+
+        Parameters:
+        - path (str): Root directory of the landing zone.
+        - compression (str): Parquet compression codec.
+
+        Returns:
+        - None
+        """
+        if pa is None:
+            raise ImportError(
+                "ParquetStore requires pyarrow, install it with `pip install pyarrow`"
+            )
+        self._path = path
+        self._compression = compression
+
+    def _partitioning(self, columns: list[str]) -> "ds.Partitioning":
+        schema = pa.schema([(column, pa.string()) for column in columns])
+        return ds.partitioning(schema, flavor="hive")
+
+    def write(self, stage: str, data: pd.DataFrame) -> None:
+        """
+        Appends records to a stage.
+
+        Args:
+        - stage (str): One of `STAGES`.
+        - data (pd.DataFrame): Records with a `created_utc` column.
+        """
+        if stage not in self.STAGES:
+            raise ValueError(f"Unknown stage {stage!r}, expected one of {self.STAGES}")
+        if data.empty:
+            return
+
+        dates = pd.to_datetime(data["created_utc"], unit="s", utc=True)
+        data = data.assign(date=dates.dt.strftime("%Y-%m-%d"))
+        columns = [c for c in self._PARTITION_COLUMNS if c in data]
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        ds.write_dataset(
+            table,
+            os.path.join(self._path, stage),
+            format="parquet",
+            partitioning=self._partitioning(columns),
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=ds.ParquetFileFormat().make_write_options(
+                compression=self._compression
+            ),
+        )
+
+    def read(
+        self,
+        stage: str,
+        batch_size: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Reads the records of a stage back.
+
+        Args:
+        - stage (str): One of `STAGES`.
+        - batch_size (int | None): Records per yielded DataFrame, None to
+        read everything at once.
+        - start_date (str | None): First creation date to read, YYYY-MM-DD.
+        - end_date (str | None): Last creation date to read, YYYY-MM-DD.
+
+        Returns:
+        - Iterator[pd.DataFrame]: Records of the stage.
+        """
+        path = os.path.join(self._path, stage)
+        if not os.path.isdir(path):
+            return
+
+        partitions = [
+            c for c in self._PARTITION_COLUMNS if self._is_partitioned(path, c)
+        ]
+        dataset = ds.dataset(
+            path, format="parquet", partitioning=self._partitioning(partitions)
+        )
+        # Chunks can disagree on types, e.g. a column that was all null once.
+        schema = pa.unify_schemas(
+            [dataset.schema]
+            + [fragment.physical_schema for fragment in dataset.get_fragments()],
+            promote_options="permissive",
+        )
+        dataset = ds.dataset(
+            path,
+            schema=schema,
+            format="parquet",
+            partitioning=self._partitioning(partitions),
+        )
+
+        condition = None
+        if start_date is not None:
+            condition = ds.field("date") >= start_date
+        if end_date is not None:
+            upper = ds.field("date") <= end_date
+            condition = upper if condition is None else condition & upper
+        columns = [name for name in schema.names if name != "date"]
+        scanner = dataset.scanner(columns=columns, filter=condition)
+
+        if batch_size is None:
+            table = scanner.to_table()
+            if table.num_rows:
+                yield table.to_pandas()
+            return
+
+        batches, rows = [], 0
+        for batch in scanner.to_batches():
+            batches.append(batch)
+            rows += batch.num_rows
+            while rows >= batch_size:
+                table = pa.Table.from_batches(batches)
+                yield table.slice(0, batch_size).to_pandas()
+                rest = table.slice(batch_size)
+                batches, rows = rest.to_batches(), rest.num_rows
+        if rows:
+            table = pa.Table.from_batches(batches, schema=scanner.projected_schema)
+            yield table.to_pandas()
+
+    @staticmethod
+    def _is_partitioned(path: str, column: str) -> bool:
+        """Returns whether a directory level of the stage is `column=...`."""
+        for _, directories, _ in os.walk(path):
+            if any(d.startswith(f"{column}=") for d in directories):
+                return True
+        return False
@@ -0,0 +1,158 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .data_processor import DataProcessor
+
+# Name of the input of the first node: the fetched or replayed records.
+SOURCE = "source"
+
+# The graph of a pipeline unless one is configured: clean, drop
+# near-duplicates, enrich and filter; the enriched records are stored.
+DEFAULT_DEFINITION: dict[str, Any] = {
+    "nodes": [
+        {"name": "clean", "processor": "cleaner", "land_as": "cleaned"},
+        {"name": "deduplicate", "processor": "deduplicator"},
+        {"name": "enrich", "processor": "enricher", "land_as": "enriched"},
+        {"name": "filter", "processor": "filter"},
+    ],
+    "store": "enrich",
+    "output": "filter",
+}
+
+
+def config_hash(processor: DataProcessor) -> str:
+    """
+    Returns a hash of the class and settings of a processor.
+
+    The settings are the attributes holding plain values; of every other
+    attribute only the type counts, and its `name` if it has one, which
+    tells sentiment backends apart.
+    """
+    settings: dict[str, Any] = {}
+    for attribute, value in sorted(vars(processor).items()):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            settings[attribute] = value
+        elif isinstance(value, (tuple, list)) and all(
+            isinstance(item, (bool, int, float, str)) for item in value
+        ):
+            settings[attribute] = list(value)
+        else:
+            name = getattr(value, "name", None)
+            settings[attribute] = [
+                type(value).__qualname__,
+                name if isinstance(name, str) else None,
+            ]
+    description = json.dumps(
+        [type(processor).__module__, type(processor).__qualname__, settings],
+        sort_keys=True,
+    )
+    return hashlib.blake2b(description.encode(), digest_size=16).hexdigest()
+
+
+@dataclass
+class Node:
+    """A stage of a pipeline graph, running a processor on one input."""
+
+    name: str
+    processor: DataProcessor
+    input: str = SOURCE
+    # Landing zone stage the output is written to.
+    land_as: Optional[str] = None
+    cache: bool = True
+
+    def __post_init__(self) -> None:
+        self.config_hash = config_hash(self.processor)
+
+
+class PipelineGraph:
+    """
+    Directed acyclic graph of the stages a pipeline runs on every chunk.
+
+    Every node runs a `DataProcessor` on the output of another node, or on
+    the fetched records. One node's output is stored in the database, the
+    output of another is the result of the pipeline.
+    """
+
+    def __init__(self, nodes: list[Node], store: str, output: str) -> None:
+        """
+        Initializes the PipelineGraph object.
+
+        Parameters:
+        - nodes (list[Node]): Nodes in topological order, every node after
+        its input.
+        - store (str): Node whose output is stored.
+        - output (str): Node whose output is the result of the pipeline.
+
+        Returns:
+        - None
+        """
+        defined = {SOURCE}
+        for node in nodes:
+            if node.name in defined:
+                raise ValueError(f"Duplicate node {node.name!r}")
+            if node.input not in defined:
+                raise ValueError(
+                    f"Node {node.name!r} reads {node.input!r}, which is not "
+                    "defined before it"
+                )
+            defined.add(node.name)
+        for role, name in (("store", store), ("output", output)):
+            if name not in defined:
+                raise ValueError(f"Unknown {role} node {name!r}")
+        self.nodes = nodes
+        self.store = store
+        self.output = output
+
+    @classmethod
+    def from_definition(
+        cls,
+        definition: dict[str, Any],
+        processors: dict[str, Optional[DataProcessor]],
+    ) -> "PipelineGraph":
+        """
+        Builds a graph from its declarative definition, e.g. the
+        `pipeline_graph` section of config.json.
+
+        A node is a mapping with its "name", the "processor" it runs and
+        optionally its "input" (the previous node by default), the landing
+        zone stage it is written to as "land_as" and "cache": false to never
+        read it from the stage cache. A node whose processor is None, like
+        a disabled deduplicator, is left out and passes its input through.
+
+        Parameters:
+        - definition (dict[str, Any]): "nodes", "store" and "output".
+        - processors (dict[str, DataProcessor | None]): Processor by name.
+
+        Returns:
+        - PipelineGraph: The graph.
+        """
+        nodes: list[Node] = []
+        # Skipped nodes stand for their input.
+        aliases: dict[str, str] = {}
+        previous = SOURCE
+        for spec in definition["nodes"]:
+            if spec["processor"] not in processors:
+                raise ValueError(
+                    f"Unknown processor {spec['processor']!r} of node "
+                    f"{spec['name']!r}"
+                )
+            upstream = spec.get("input", previous)
+            upstream = aliases.get(upstream, upstream)
+            previous = spec["name"]
+            processor = processors[spec["processor"]]
+            if processor is None:
+                aliases[spec["name"]] = upstream
+                continue
+            nodes.append(
+                Node(
+                    name=spec["name"],
+                    processor=processor,
+                    input=upstream,
+                    land_as=spec.get("land_as"),
+                    cache=spec.get("cache", True),
+                )
+            )
+        store, output = definition["store"], definition["output"]
+        return cls(nodes, aliases.get(store, store), aliases.get(output, output))
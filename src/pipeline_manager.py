@@ -1,10 +1,65 @@
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
 from pandas import DataFrame
 from .logger import setup_logger
+from .checkpoint_store import CheckpointStore
 from .data_cleaner import RedditCleaner
+from .data_processor import DataProcessor
 from .data_enricher import DataEnricher
 from .data_filter import DataFilter
 from .data_fetcher import RedditDataFetcher
 from .database_manager import DatabaseManager
+from .instrumentation import Instrumentation
+from .near_duplicate_filter import NearDuplicateFilter
+from .parquet_store import ParquetStore
+from .pipeline_graph import DEFAULT_DEFINITION, SOURCE, PipelineGraph
+from .schema import apply_schema, concat
+from .stage_cache import StageCache
+from .staged_executor import Stage, StagedExecutor
+
+R = TypeVar("R")
+
+
+def chunk_keys(
+    data: DataFrame, column: str, pending_key: Optional[str]
+) -> tuple[list[str], list[str], Optional[str]]:
+    """
+    Works out the checkpoint keys of a chunk of records, whose records of a
+    key are contiguous: only the last key may continue in the next chunk.
+
+    Args:
+        data (DataFrame): Chunk of records.
+        column (str): Column holding the keys.
+        pending_key (str | None): Last key of the previous chunk.
+
+    Returns:
+        tuple: The keys of the chunk, the keys whose records all are in it
+        or an earlier chunk, and the last key, now pending.
+    """
+    if not len(data):
+        return [], [], pending_key
+    keys = [str(key) for key in data[column].unique()]
+    completed = [
+        key
+        for key in dict.fromkeys([pending_key, *keys[:-1]])
+        if key is not None and key != keys[-1]
+    ]
+    return keys, completed, keys[-1]
+
+
+@dataclass
+class _Batch:
+    """A chunk of records on its way through the pipeline."""
+
+    number: int
+    data: DataFrame
+    # Checkpoint keys of the records in this batch.
+    keys: list[str] = field(default_factory=list)
+    # Checkpoint keys whose records all are in this batch or an earlier one.
+    completed_keys: list[str] = field(default_factory=list)
+    filtered: Optional[DataFrame] = None
 
 
 class PipelineManager:
@@ -15,6 +70,23 @@ class PipelineManager:
         enricher: DataEnricher,
         filter: DataFilter,
         db_manager: DatabaseManager,
+        chunk_size: Optional[int] = None,
+        pipelined: bool = False,
+        queue_size: int = 4,
+        landing_zone: Optional[ParquetStore] = None,
+        replay_from: Optional[str] = None,
+        replay_dates: tuple[Optional[str], Optional[str]] = (None, None),
+        instrumentation: Optional[Instrumentation] = None,
+        name: str = "pipeline",
+        schema: Optional[dict[str, Any]] = None,
+        deduplicator: Optional[NearDuplicateFilter] = None,
+        graph: Optional[dict[str, Any]] = None,
+        processors: Optional[dict[str, DataProcessor]] = None,
+        stage_cache: Optional[StageCache] = None,
+        checkpoint: Optional[CheckpointStore] = None,
+        checkpoint_key: Optional[str] = None,
+        checkpoint_output: Optional[str] = None,
+        raise_store_errors: bool = False,
     ) -> None:
         """
         Initializes a PipelineManager object with the given fetcher,
@@ -27,41 +99,352 @@ class PipelineManager:
         to clean the fetched data.
         - db_manager (BaseDBManager): The db_manager object that will be used
         to store the cleaned data.
+        - chunk_size (int | None): Number of fetched records processed and
+        stored at a time, None to process the whole fetch at once.
+        - pipelined (bool): Overlap fetching, processing and storing by
+        running each on its own thread.
+        - queue_size (int): Number of chunks buffered between two stages in
+        pipelined mode.
+        - landing_zone (ParquetStore | None): Store the raw, cleaned and
+        enriched records are written to as Parquet.
+        - replay_from (str | None): Stage of the landing zone to start from
+        instead of fetching; records replayed are not written again.
+        - replay_dates (tuple): First and last creation date (YYYY-MM-DD) to
+        replay, None for no bound.
+        - instrumentation (Instrumentation | None): Measures every stage.
+        - name (str): Name of the pipeline in the measurements.
+        - schema (dict[str, Any] | None): dtype per column applied to the
+        fetched or replayed records, see `schema.POST_SCHEMA`.
+        - deduplicator (NearDuplicateFilter | None): Drops near-duplicates of
+        the cleaned records before they are enriched.
+        - graph (dict[str, Any] | None): Declarative definition of the
+        stages run on every chunk, see `PipelineGraph.from_definition`;
+        `pipeline_graph.DEFAULT_DEFINITION` by default. Its nodes run the
+        "cleaner", "deduplicator", "enricher" and "filter" given here and
+        any of `processors`.
+        - processors (dict[str, DataProcessor] | None): Further processors
+        the graph can run, by name.
+        - stage_cache (StageCache | None): Memo of the stage outputs, a
+        stage whose input and configuration are unchanged is not run again.
+        - checkpoint (CheckpointStore | None): Records every committed
+        batch, a resumed run skips what was committed. Errors storing a
+        batch are raised rather than logged, as the run has to be resumed.
+        - checkpoint_key (str | None): Column whose values a run completes
+        in order, e.g. "post_id" of the comments fetched post by post. Once
+        the last record of a key was stored, the key is checkpointed and
+        passed to the fetcher's `committed`, with or without a checkpoint
+        store. Keys of a batch that failed to store are never passed.
+        - checkpoint_output (str | None): Column of the records that passed
+        the filter saved, by "id", as outputs of the committed batch, e.g.
+        "num_comments" of the posts kept.
+        - raise_store_errors (bool): Raise errors storing a batch rather than
+        log them, e.g. so that the shard of a sharded crawl is retried.
+        Always on with a checkpoint store.
         """
+        if replay_from is not None:
+            if landing_zone is None:
+                raise ValueError("Replaying requires a landing zone")
+            if replay_from not in ParquetStore.STAGES:
+                raise ValueError(
+                    f"Unknown stage {replay_from!r}, "
+                    f"expected one of {ParquetStore.STAGES}"
+                )
         self._logger = setup_logger("EcoPulse")
         self._fetcher = fetcher
         self._enricher = enricher
         self._filter = filter
         self._cleaner = cleaner
         self._db_manager = db_manager
+        self._chunk_size = chunk_size
+        self._pipelined = pipelined
+        self._queue_size = queue_size
+        self._landing_zone = landing_zone
+        self._replay_from = replay_from
+        self._replay_dates = replay_dates
+        self._instrumentation = instrumentation
+        self._name = name
+        self._schema = schema
+        self._graph = PipelineGraph.from_definition(
+            graph or DEFAULT_DEFINITION,
+            {
+                "cleaner": cleaner,
+                "deduplicator": deduplicator,
+                "enricher": enricher,
+                "filter": filter,
+                **(processors or {}),
+            },
+        )
+        # Nodes whose output is what is replayed, they are not run again.
+        self._replayed_nodes: set[str] = set()
+        if replay_from not in (None, "raw"):
+            landed = [node.land_as for node in self._graph.nodes]
+            if replay_from not in landed:
+                raise ValueError(f"No stage of the graph is landed as {replay_from!r}")
+            self._replayed_nodes = {
+                node.name for node in self._graph.nodes[: landed.index(replay_from) + 1]
+            }
+        self._stage_cache = stage_cache
+        self._checkpoint = checkpoint
+        self._checkpoint_key = checkpoint_key
+        self._checkpoint_output = checkpoint_output
+        self._raise_store_errors = raise_store_errors or checkpoint is not None
+        # The last key of the last batch, it may continue in a batch to come.
+        self._pending_key: Optional[str] = None
+        # Keys with records that failed to store.
+        self._failed_keys: set[str] = set()
 
-    def run(self) -> DataFrame:
-        """
-        Runs the pipeline to fetch, clean and store data from Reddit.
+    def _run_stage(self, stage: str, function: Callable[[Any], R], data: Any) -> R:
+        """Runs a stage, measured if instrumentation is configured."""
+        if self._instrumentation is None:
+            return function(data)
+        return self._instrumentation.measure(self._name, stage, function, data)
 
-        The pipeline fetches data from Reddit, cleans it and stores
-        it in the database.
+    def _land(self, stage: str, data: DataFrame) -> None:
+        """Writes the output of a stage to the landing zone, if there is one."""
+        if self._landing_zone is not None and self._replay_from is None:
+            self._landing_zone.write(stage, data)
+
+    def _transform(self, data: DataFrame) -> tuple[DataFrame, DataFrame]:
+        """
+        Runs the stages of the graph, by default cleaning, deduplicating,
+        enriching and filtering, on a batch of fetched records. Replayed
+        records skip the stages they already went through, stages found in
+        the stage cache are read back instead of run.
 
         Args:
-            keywords (list[str]): List of keywords to search for.
-            subreddits (str): Subreddit to search in ("all" for all subreddits).
-            limit (int): Number of posts to fetch per keyword.
+            data (DataFrame): Fetched or replayed records.
 
         Returns:
-            None
+            tuple[DataFrame, DataFrame]: The records to store and the ones
+            that passed the filter.
+        """
+        if self._replay_from is None:
+            self._land("raw", data)
+        outputs = {SOURCE: data}
+        keys = {}
+        if self._stage_cache is not None:
+            keys[SOURCE] = self._stage_cache.fingerprint(data)
+        for node in self._graph.nodes:
+            if node.name in self._replayed_nodes:
+                outputs[node.name] = data
+                keys[node.name] = keys.get(SOURCE)
+                continue
+            upstream = outputs[node.input]
+            cached = key = None
+            if self._stage_cache is not None:
+                key = self._stage_cache.key(
+                    node.name, node.config_hash, keys[node.input]
+                )
+                keys[node.name] = key
+                if node.cache:
+                    cached = self._stage_cache.get(key)
+            if cached is not None:
+                self._logger.info(
+                    f"{self._name}: {node.name} read from the stage cache"
+                )
+                result = cached
+            else:
+                result = self._run_stage(node.name, node.processor.run, upstream)
+                if key is not None and node.cache:
+                    self._stage_cache.put(key, result)
+            # Cached outputs are landed too, the landing zone stays complete.
+            if node.land_as is not None:
+                self._land(node.land_as, result)
+            outputs[node.name] = result
+        return outputs[self._graph.store], outputs[self._graph.output]
+
+    def _process(self, batch: _Batch) -> _Batch:
+        """Runs `_transform` on a batch."""
+        batch.data, batch.filtered = self._transform(batch.data)
+        return batch
+
+    def _store(self, batch: _Batch) -> DataFrame:
         """
-        raw_data = DataFrame(self._fetcher.run())
-        cleaned_data = self._cleaner.run(raw_data)
-        enriched_data = self._enricher.run(cleaned_data)
-        filtered_data = self._filter.run(enriched_data)
+        Stores a batch of enriched records and checkpoints it.
 
+        Args:
+            batch (_Batch): Batch processed by `_process`.
+
+        Returns:
+            DataFrame: The records that passed the filter.
+        """
         try:
-            self._db_manager.run(cleaned_data)
+            self._run_stage("store", self._db_manager.run, batch.data)
         except Exception as e:
+            if self._raise_store_errors:
+                # Not checkpointed, the resumed run stores the batch again.
+                raise
+            # Not committed either, the next incremental run fetches the
+            # records again.
+            self._failed_keys.update(batch.keys)
             self._logger.error(
                 f"""Error occurred while
                                storing post data: {str(e)}"""
             )
+        else:
+            if self._checkpoint is not None:
+                outputs = None
+                if self._checkpoint_output is not None and len(batch.filtered):
+                    outputs = dict(
+                        zip(
+                            batch.filtered["id"].astype(str),
+                            batch.filtered[self._checkpoint_output],
+                        )
+                    )
+                self._checkpoint.commit_batch(
+                    self._name,
+                    batch.number,
+                    len(batch.data),
+                    batch.completed_keys,
+                    outputs,
+                )
+            self._commit(batch.completed_keys)
+
+        return batch.filtered
+
+    def _commit(self, keys: list[str]) -> None:
+        """Passes the keys whose records all were stored to the fetcher."""
+        keys = [key for key in keys if key not in self._failed_keys]
+        if keys and self._replay_from is None:
+            self._fetcher.committed(keys)
+
+    def _raw_chunks(self) -> Iterator[DataFrame]:
+        """
+        Fetches records, or replays them from the landing zone, and groups
+        them into chunks.
+
+        Returns:
+            Iterator[DataFrame]: Fetched records per chunk.
+        """
+        if self._replay_from is not None:
+            yield from self._replayed_chunks()
+            return
+
+        records = self._fetcher.stream()
+
+        def fetch_chunk(_: Any) -> list[dict[str, Any]]:
+            return list(islice(records, self._chunk_size))
+
+        offset = 0
+        while True:
+            chunk = self._run_stage("fetch", fetch_chunk, None)
+            if not chunk:
+                if not offset:
+                    self._logger.info("No new data fetched")
+                break
+            # Continue the index across chunks so that rows stay unique.
+            raw_data = DataFrame(chunk, index=range(offset, offset + len(chunk)))
+            if self._schema is not None:
+                raw_data = apply_schema(raw_data, self._schema)
+            offset += len(chunk)
+            yield raw_data
+            if self._chunk_size is None:
+                break
+
+    def _replayed_chunks(self) -> Iterator[DataFrame]:
+        """
+        Reads the replayed stage from the landing zone chunk by chunk.
+
+        Returns:
+            Iterator[DataFrame]: Replayed records per chunk.
+        """
+        start_date, end_date = self._replay_dates
+        chunks = self._landing_zone.read(
+            self._replay_from,
+            batch_size=self._chunk_size,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        offset = 0
+        while (
+            data := self._run_stage("replay", lambda _: next(chunks, None), None)
+        ) is not None:
+            data.index = range(offset, offset + len(data))
+            if self._schema is not None:
+                data = apply_schema(data, self._schema)
+            offset += len(data)
+            yield data
+        if offset == 0:
+            self._logger.info(f"No {self._replay_from} data to replay")
+        else:
+            self._logger.info(f"Replayed {offset} {self._replay_from} records")
+
+    def _batches(self) -> Iterator[_Batch]:
+        """
+        Numbers the chunks and works out the checkpoint keys each one
+        completes. Resuming a replay skips the committed chunks, which are
+        the same on every run; fetched chunks are numbered on from the last
+        committed one, what was committed is not fetched again.
+
+        Returns:
+            Iterator[_Batch]: Batches to process.
+        """
+        committed: set[int] = set()
+        first = 0
+        if self._checkpoint is not None:
+            if self._replay_from is not None:
+                committed = self._checkpoint.committed_batches(self._name)
+            else:
+                first = self._checkpoint.next_batch(self._name)
+        self._pending_key = None
+        self._failed_keys = set()
+        for number, data in enumerate(self._raw_chunks(), start=first):
+            if number in committed:
+                continue
+            keys, completed = [], []
+            if self._checkpoint_key is not None:
+                keys, completed, self._pending_key = chunk_keys(
+                    data, self._checkpoint_key, self._pending_key
+                )
+            yield _Batch(number, data, keys, completed)
+
+    def _finish_checkpoint(self) -> None:
+        """Commits the last key and marks the pipeline as finished."""
+        if self._pending_key is not None:
+            if self._checkpoint is not None:
+                self._checkpoint.complete_keys(self._name, [self._pending_key])
+            self._commit([self._pending_key])
+            self._pending_key = None
+        if self._checkpoint is not None:
+            self._checkpoint.finish_pipeline(self._name)
+
+    def stream(self) -> Iterator[DataFrame]:
+        """
+        Runs the pipeline chunk by chunk, yielding the filtered records of
+        each chunk once it has been stored.
+
+        Only one chunk of fetched records is held in memory at a time, a
+        few more in pipelined mode. Without a chunk size the whole fetch is
+        a single chunk.
+
+        Returns:
+            Iterator[DataFrame]: Filtered records per chunk.
+        """
+        if not self._pipelined:
+            for batch in self._batches():
+                yield self._store(self._process(batch))
+        else:
+            executor = StagedExecutor(
+                [Stage("process", self._process), Stage("store", self._store)],
+                queue_size=self._queue_size,
+            )
+            yield from executor.run(self._batches())
+        self._finish_checkpoint()
 
+    def run(self) -> DataFrame:
+        """
+        Runs the pipeline to fetch, clean and store data from Reddit.
+
+        The pipeline fetches data from Reddit, cleans it and stores
+        it in the database.
+
+        Returns:
+            DataFrame: The records that passed the filter.
+        """
+        filtered_chunks = list(self.stream())
         self._logger.info("Pipeline executed!")
-        return filtered_data
+        if not filtered_chunks:
+            return DataFrame()
+        if len(filtered_chunks) == 1:
+            return filtered_chunks[0]
+        return concat(filtered_chunks)
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by everything that calls the Reddit API.
+
+    Tokens refill continuously at `requests_per_minute`, so bursts of up to
+    `capacity` requests go out immediately and the long-run rate stays
+    within the quota.
+    """
+
+    def __init__(
+        self, requests_per_minute: float, capacity: Optional[float] = None
+    ) -> None:
+        """
+        Initializes the TokenBucket object.
+
+        Parameters:
+        - requests_per_minute (float): Sustained request rate.
+        - capacity (float | None): Largest burst, defaults to a tenth of the
+        per-minute quota.
+
+        Returns:
+        - None
+        """
+        self._rate = requests_per_minute / 60
+        self._capacity = capacity or max(1.0, requests_per_minute / 10)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens: float) -> float:
+        """
+        Takes `tokens` tokens if they are available.
+
+        Returns:
+        - float: 0 if the tokens were taken, else the seconds until they
+        will be available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._capacity, self._tokens + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self._rate
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Blocks until `tokens` tokens are available and takes them.
+
+        Parameters:
+        - tokens (float): Number of requests about to be made, capped at the
+        bucket capacity.
+
+        Returns:
+        - float: Seconds spent waiting.
+        """
+        tokens = min(tokens, self._capacity)
+        waited = 0.0
+        while delay := self._take(tokens):
+            time.sleep(delay)
+            waited += delay
+        return waited
+
+    async def acquire_async(self, tokens: float = 1) -> float:
+        """
+        Waits without blocking the event loop until `tokens` tokens are
+        available and takes them, see `acquire`.
+        """
+        tokens = min(tokens, self._capacity)
+        waited = 0.0
+        while delay := self._take(tokens):
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
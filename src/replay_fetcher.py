@@ -0,0 +1,191 @@
+import json
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional
+
+import numpy as np
+
+from .data_fetcher import RedditDataFetcher
+
+VOCABULARY = (
+    "climate change carbon footprint solar wind energy renewable emissions "
+    "recycling waste plastic ocean forest biodiversity sustainability green "
+    "policy city transport electric vehicle battery heat drought flood "
+    "the a is of and to in it that this for with on are great terrible love "
+    "hate good bad really very not think people should would could"
+).split()
+
+
+@dataclass
+class TextDistribution:
+    """Shape of the synthetic texts."""
+
+    # Mean number of words, the counts are log-normally distributed.
+    mean_words: float = 25.0
+    sigma: float = 0.8
+    # Zipf exponent of the word frequencies, higher is more repetitive.
+    zipf_exponent: float = 1.1
+    url_ratio: float = 0.1
+    mention_ratio: float = 0.1
+    deleted_ratio: float = 0.05
+    vocabulary: tuple[str, ...] = tuple(VOCABULARY)
+
+
+class _TextGenerator:
+    def __init__(self, distribution: TextDistribution, rng: np.random.Generator):
+        self._distribution = distribution
+        self._rng = rng
+        ranks = np.arange(1, len(distribution.vocabulary) + 1)
+        weights = ranks**-distribution.zipf_exponent
+        self._weights = weights / weights.sum()
+        self._words = np.array(distribution.vocabulary)
+
+    def __call__(self) -> str:
+        d, rng = self._distribution, self._rng
+        if rng.random() < d.deleted_ratio:
+            return "[deleted]"
+        count = max(1, int(rng.lognormal(np.log(d.mean_words), d.sigma)))
+        words = list(rng.choice(self._words, count, p=self._weights))
+        if rng.random() < d.url_ratio:
+            words.insert(int(rng.integers(len(words))), "https://example.com/a?b=1")
+        if rng.random() < d.mention_ratio:
+            words.insert(int(rng.integers(len(words))), "@someone #climate")
+        return " ".join(words)
+
+
+def synthetic_posts(
+    size: int,
+    distribution: Optional[TextDistribution] = None,
+    seed: int = 0,
+    subreddits: Iterable[str] = ("environment", "climate", "sustainability"),
+    categories: Iterable[str] = ("climate_change", "sustainability"),
+) -> Iterator[dict[str, Any]]:
+    """
+    Yields synthetic post records shaped like `RedditPostFetcher` output.
+    """
+    rng = np.random.default_rng(seed)
+    text = _TextGenerator(distribution or TextDistribution(), rng)
+    subreddits, categories = list(subreddits), list(categories)
+    for i in range(size):
+        category = categories[i % len(categories)]
+        yield {
+            "id": f"p{i}",
+            "title": text(),
+            "author": None if rng.random() < 0.05 else f"user{rng.integers(1000)}",
+            "subreddit": subreddits[i % len(subreddits)],
+            "content": text(),
+            "created_utc": 1700000000.0 + i * 60,
+            "score": int(rng.geometric(0.1)),
+            "url": f"https://reddit.com/p{i}",
+            "num_comments": int(rng.geometric(0.2)),
+            "category": category,
+            "keyword": "climate",
+            "matches": [{"category": category, "keyword": "climate"}],
+        }
+
+
+def synthetic_comments(
+    size: int,
+    distribution: Optional[TextDistribution] = None,
+    seed: int = 0,
+    comments_per_post: int = 20,
+) -> Iterator[dict[str, Any]]:
+    """
+    Yields synthetic comment records shaped like `RedditCommentFetcher`
+    output.
+    """
+    rng = np.random.default_rng(seed)
+    text = _TextGenerator(distribution or TextDistribution(mean_words=15), rng)
+    for i in range(size):
+        yield {
+            "id": f"c{i}",
+            "post_id": f"p{i // comments_per_post}",
+            "author": None if rng.random() < 0.05 else f"user{rng.integers(1000)}",
+            "subreddit": "environment",
+            "body": text(),
+            "score": int(rng.geometric(0.1)),
+            "created_utc": 1700000000.0 + i * 10,
+        }
+
+
+def write_jsonl(records: Iterable[dict[str, Any]], path: str) -> int:
+    """
+    Writes records to a JSONL file.
+
+    Returns:
+    - int: Number of records written.
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+
+class ReplayFetcher(RedditDataFetcher):
+    """
+    Fetcher replaying recorded or synthetic records from a JSONL file, so
+    the pipeline runs without the Reddit API.
+    """
+
+    def __init__(self, path: str, size: Optional[int] = None) -> None:
+        """
+        Initializes the ReplayFetcher object.
+
+        Parameters:
+        - path (str): JSONL file with one fetched record per line.
+        - size (int | None): Number of records to return. The file is
+        repeated if it is shorter, IDs get a `-<n>` suffix on the n-th
+        repetition so they stay unique. None returns the file once.
+
+        Returns:
+        - None
+        """
+        # No credentials, nothing is requested from Reddit so no PRAW
+        # client is ever created.
+        super().__init__("", "", "", max_retries=0, retry_backoff=0.0)
+        self._path = path
+        self._size = size
+
+    def _read(self) -> Iterator[dict[str, Any]]:
+        with open(self._path, encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _repeated(self) -> Iterator[dict[str, Any]]:
+        repetition = 0
+        while True:
+            empty = True
+            for record in self._read():
+                empty = False
+                if repetition:
+                    record = {**record, "id": f"{record['id']}-{repetition}"}
+                yield record
+            if empty:
+                return
+            repetition += 1
+
+    def stream(self) -> Iterator[dict[str, Any]]:
+        """
+        Yields the replayed records one by one.
+
+        Returns:
+        - Iterator[dict[str, Any]]: Replayed records.
+        """
+        if self._size is None:
+            yield from self._read()
+        else:
+            yield from islice(self._repeated(), self._size)
+
+    def run(self) -> list[dict[str, Any]]:
+        """
+        Returns the replayed records.
+
+        Returns:
+        - list[dict[str, Any]]: Replayed records.
+        """
+        records = list(self.stream())
+        self._logger.info(f"Replayed Data: #{len(records)}")
+        return records
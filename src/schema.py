@@ -0,0 +1,124 @@
+from typing import Any, Iterable
+
+import pandas as pd
+from pandas.api.types import is_integer_dtype, union_categoricals
+
+try:
+    import pyarrow  # noqa: F401
+
+    TEXT = pd.StringDtype("pyarrow")
+except ImportError:  # pragma: no cover - optional dependency
+    TEXT = pd.StringDtype("python")
+
+# Columns repeating a few values are stored as codes into their categories.
+CATEGORY = "category"
+# Scores and counts of a single post or comment fit into 32 bits, Unix
+# timestamps are kept at 64 bits as they outgrow int32 in 2038.
+COUNT = "int32"
+TIMESTAMP = "int64"
+# Sentiment scores need no more than float32 precision.
+SENTIMENT = "float32"
+
+POST_SCHEMA: dict[str, Any] = {
+    "id": TEXT,
+    "title": TEXT,
+    "author": CATEGORY,
+    "subreddit": CATEGORY,
+    "content": TEXT,
+    "created_utc": TIMESTAMP,
+    "score": COUNT,
+    "url": TEXT,
+    "num_comments": COUNT,
+    "category": CATEGORY,
+    "keyword": CATEGORY,
+}
+
+COMMENT_SCHEMA: dict[str, Any] = {
+    "id": TEXT,
+    "post_id": CATEGORY,
+    "author": CATEGORY,
+    "subreddit": CATEGORY,
+    "body": TEXT,
+    "score": COUNT,
+    "created_utc": TIMESTAMP,
+}
+
+
+def apply_schema(data: pd.DataFrame, schema: dict[str, Any]) -> pd.DataFrame:
+    """
+    Converts the columns of a DataFrame to the dtypes of a schema.
+
+    Columns missing from the data or the schema are left alone. Integer
+    columns with missing values become the nullable variant of their dtype,
+    fractional timestamps are cut to whole seconds.
+
+    Parameters:
+    - data (pd.DataFrame): Records to convert.
+    - schema (dict[str, Any]): dtype per column.
+
+    Returns:
+    - pd.DataFrame: The converted records.
+    """
+    converted = {}
+    for column, dtype in schema.items():
+        if column not in data or data[column].dtype == dtype:
+            continue
+        values = data[column]
+        if is_integer_dtype(pd.api.types.pandas_dtype(dtype)):
+            values = pd.to_numeric(values)
+            if values.isna().any():
+                dtype = dtype.capitalize()
+            elif not is_integer_dtype(values):
+                values = values // 1
+        converted[column] = values.astype(dtype)
+    return data.assign(**converted) if converted else data
+
+
+def fill_missing(values: pd.Series, value: Any) -> pd.Series:
+    """
+    Fills missing values, adding `value` to the categories of a categorical
+    column first.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        if value not in values.cat.categories:
+            values = values.cat.add_categories([value])
+        return values.fillna(value)
+    filled = values.fillna(value)
+    # Without missing values the nullable integer dtype is no longer needed.
+    if is_integer_dtype(values) and hasattr(values.dtype, "numpy_dtype"):
+        return filled.astype(values.dtype.numpy_dtype)
+    return filled
+
+
+def concat(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenates DataFrames without turning categorical columns whose
+    categories differ between the frames into object columns.
+    """
+    frames = list(frames)
+    categorical = [
+        column
+        for column, dtype in frames[0].dtypes.items()
+        if isinstance(dtype, pd.CategoricalDtype)
+        and all(column in frame for frame in frames)
+    ]
+    for column in categorical:
+        categories = union_categoricals(
+            [frame[column] for frame in frames], ignore_order=True
+        ).categories
+        frames = [
+            frame.assign(**{column: frame[column].cat.set_categories(categories)})
+            for frame in frames
+        ]
+    return pd.concat(frames)
+
+
+def memory_report(data: pd.DataFrame) -> dict[str, int]:
+    """
+    Returns the bytes held by every column, counting the Python objects of
+    object columns, and the total under "total".
+    """
+    usage = data.memory_usage(deep=True, index=False)
+    report = {column: int(size) for column, size in usage.items()}
+    report["total"] = int(usage.sum())
+    return report
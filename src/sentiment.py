@@ -0,0 +1,218 @@
+import os
+import re
+import xml.etree.ElementTree as ElementTree
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from itertools import chain
+from typing import Optional, Sequence
+
+import numpy as np
+import textblob
+from textblob import TextBlob
+
+
+class SentimentBackend(ABC):
+    """Scores the polarity of texts, from -1.0 (negative) to 1.0 (positive)."""
+
+    # Identifies the backend, scores of different backends are cached apart.
+    name: str
+
+    @abstractmethod
+    def score(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Scores a batch of texts.
+
+        Parameters:
+        - texts (Sequence[str]): Non-empty texts.
+
+        Returns:
+        - np.ndarray: float64 polarity per text.
+        """
+
+
+class TextBlobBackend(SentimentBackend):
+    """TextBlob's pattern analyzer, one text at a time."""
+
+    name = "textblob"
+
+    def score(self, texts: Sequence[str]) -> np.ndarray:
+        return np.fromiter(
+            (TextBlob(text).sentiment.polarity for text in texts),
+            dtype=np.float64,
+            count=len(texts),
+        )
+
+
+class LexiconBackend(SentimentBackend):
+    """
+    Vectorized lexicon scorer.
+
+    Texts are split into words, every word is looked up once in a
+    precomputed word -> polarity table and the polarities are averaged per
+    text with NumPy. A word following a negation counts with its polarity
+    flipped and halved, one following an intensifier ("very") scaled by the
+    intensifier, like TextBlob does. Unlike TextBlob there is no
+    part-of-speech tagging, no emoticons and no special punctuation rules.
+    """
+
+    name = "lexicon"
+
+    _WORDS = re.compile(r"[a-z]+(?:'[a-z]+)?")
+    # Negations as they appear in cleaned text, which has no apostrophes.
+    NEGATIONS = frozenset(
+        "not no never nor cannot dont doesnt didnt isnt arent wasnt werent "
+        "cant couldnt wont wouldnt shouldnt hasnt havent hadnt "
+        "don't doesn't didn't isn't aren't wasn't weren't can't couldn't "
+        "won't wouldn't shouldn't hasn't haven't hadn't".split()
+    )
+
+    def __init__(
+        self,
+        polarities: dict[str, float],
+        intensifiers: Optional[dict[str, float]] = None,
+        name: str = "lexicon",
+    ) -> None:
+        """
+        Initializes the LexiconBackend object.
+
+        Parameters:
+        - polarities (dict[str, float]): Polarity per lower case word.
+        - intensifiers (dict[str, float] | None): Factor an intensifier
+        applies to the polarity of the next word.
+        - name (str): Backend name, distinguishes lexicons in the cache.
+
+        Returns:
+        - None
+        """
+        self.name = name
+        intensifiers = intensifiers or {}
+        # Index 0 stands for words outside the lexicon.
+        self._index = {word: i for i, word in enumerate(polarities, start=1)}
+        self._polarities = np.array([0.0, *polarities.values()])
+        self._known = np.ones(len(self._polarities), dtype=bool)
+        self._known[0] = False
+        self._intensities = np.ones(len(self._polarities))
+        self._negation = np.zeros(len(self._polarities), dtype=bool)
+        # Modifiers outside the lexicon get an entry that does not count.
+        for word in chain(intensifiers, self.NEGATIONS):
+            if word not in self._index:
+                self._index[word] = len(self._polarities)
+                self._polarities = np.append(self._polarities, 0.0)
+                self._known = np.append(self._known, False)
+                self._intensities = np.append(self._intensities, 1.0)
+                self._negation = np.append(self._negation, False)
+        for word, intensity in intensifiers.items():
+            self._intensities[self._index[word]] = intensity
+        for word in self.NEGATIONS:
+            self._negation[self._index[word]] = True
+        self._modifier = self._negation | (self._intensities != 1.0)
+
+    @classmethod
+    def from_textblob(cls) -> "LexiconBackend":
+        """
+        Builds the backend from the lexicon TextBlob ships with, averaging
+        the polarity of every word over its senses.
+        """
+        path = os.path.join(
+            os.path.dirname(textblob.__file__), "en", "en-sentiment.xml"
+        )
+        polarities: dict[str, list[float]] = defaultdict(list)
+        intensities: dict[str, list[float]] = defaultdict(list)
+        for element in ElementTree.parse(path).getroot().iter("word"):
+            word = element.get("form").lower()
+            polarities[word].append(float(element.get("polarity", 0.0)))
+            if element.get("pos") == "RB":
+                intensities[word].append(float(element.get("intensity", 1.0)))
+
+        averaged = {word: float(np.mean(p)) for word, p in polarities.items()}
+        intensifiers = {
+            word: float(np.mean(i))
+            for word, i in intensities.items()
+            if np.mean(i) != 1.0
+        }
+        # Intensifiers only modify the next word, they carry no polarity.
+        for word in intensifiers:
+            averaged.pop(word, None)
+        return cls(averaged, intensifiers, name="lexicon-textblob")
+
+    @classmethod
+    def from_vader(cls, path: str) -> "LexiconBackend":
+        """
+        Builds the backend from a VADER lexicon file, whose tab-separated
+        lines start with a token and its mean valence from -4 to 4.
+        """
+        polarities = {}
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) >= 2:
+                    polarities[fields[0].lower()] = float(fields[1]) / 4
+        return cls(polarities, name="lexicon-vader")
+
+    @staticmethod
+    def _shift(ids: np.ndarray, by: int, starts: np.ndarray) -> np.ndarray:
+        """
+        Returns the word `by` positions earlier for every word, 0 where that
+        is before the start of the word's text.
+        """
+        shifted = np.zeros_like(ids)
+        if by < len(ids):
+            shifted[by:] = ids[:-by]
+        for offset in range(by):
+            shifted[np.minimum(starts + offset, len(ids) - 1)] = 0
+        return shifted
+
+    def score(self, texts: Sequence[str]) -> np.ndarray:
+        tokens = [self._WORDS.findall(text.lower()) for text in texts]
+        lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+        index = self._index
+        ids = np.fromiter(
+            (index.get(word, 0) for word in chain.from_iterable(tokens)),
+            dtype=np.int64,
+            count=int(lengths.sum()),
+        )
+        text_ids = np.repeat(np.arange(len(texts)), lengths)
+
+        polarity = self._polarities[ids]
+        counted = self._known[ids]
+        # Modifiers apply to the next word of the same text, a negation also
+        # to the word after an intensifier ("not very good").
+        starts = (np.cumsum(lengths) - lengths)[lengths > 0]
+        previous = self._shift(ids, 1, starts)
+        before_previous = self._shift(ids, 2, starts)
+        polarity = polarity * self._intensities[previous]
+        negated = self._negation[previous] | (
+            (self._intensities[previous] != 1.0) & self._negation[before_previous]
+        )
+        polarity = np.where(negated, -0.5 * polarity, polarity)
+        # A modifier followed by a known word is part of that word.
+        modified_next = np.zeros(len(ids), dtype=bool)
+        modified_next[:-1] = self._modifier[ids[:-1]] & counted[1:]
+        modified_next[:-1] &= text_ids[:-1] == text_ids[1:]
+        counted &= ~modified_next
+
+        sums = np.bincount(text_ids, weights=polarity * counted, minlength=len(texts))
+        counts = np.bincount(text_ids, weights=counted, minlength=len(texts))
+        scores = np.divide(sums, counts, out=np.zeros(len(texts)), where=counts > 0)
+        return np.clip(scores, -1.0, 1.0)
+
+
+def create_backend(name: str, lexicon_path: Optional[str] = None) -> SentimentBackend:
+    """
+    Creates the sentiment backend configured by name.
+
+    Parameters:
+    - name (str): "textblob" or "lexicon".
+    - lexicon_path (str | None): VADER lexicon file for the lexicon backend,
+    TextBlob's lexicon is used without one.
+
+    Returns:
+    - SentimentBackend: The backend.
+    """
+    if name == "textblob":
+        return TextBlobBackend()
+    if name == "lexicon":
+        if lexicon_path is not None:
+            return LexiconBackend.from_vader(lexicon_path)
+        return LexiconBackend.from_textblob()
+    raise ValueError(f"Unknown sentiment backend {name!r}")
@@ -0,0 +1,167 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+
+class SentimentCache:
+    """
+    Two-tier cache for sentiment scores keyed by a hash of the text.
+
+    Recently used scores are kept in a bounded in-memory LRU, every score is
+    persisted in a SQLite file so that reruns over the same time window do
+    not score identical text again.
+    """
+
+    _SQLITE_MAX_VARIABLES = 500
+
+    # Scores of this backend keep the keys used before backends existed.
+    _LEGACY_NAMESPACE = "textblob"
+
+    def __init__(
+        self,
+        path: Optional[str] = "sentiment_cache.sqlite",
+        max_memory_items=100_000,
+        namespace: str = "textblob",
+    ) -> None:
+        """
+        Initializes the SentimentCache object.
+
+        Parameters:
+        - path (str | None): SQLite file of the on-disk tier, None to keep
+        the cache in memory only.
+        - max_memory_items (int): Number of scores kept in the LRU tier.
+        - namespace (str): Name of the sentiment backend whose scores are
+        cached, scores of different backends never mix.
+
+        Returns:
+        - None
+        """
+        self.namespace = namespace
+        self._prefix = (
+            b"" if namespace == self._LEGACY_NAMESPACE else namespace.encode() + b"\0"
+        )
+        self._max_memory_items = max_memory_items
+        self._memory: OrderedDict[bytes, float] = OrderedDict()
+        self._pending: dict[bytes, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._connection = None
+        if path is not None:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sentiment_scores (
+                    text_hash BLOB PRIMARY KEY, score REAL NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.blake2b(self._prefix + text.encode(), digest_size=16).digest()
+
+    def _remember(self, key: bytes, score: float) -> None:
+        self._memory[key] = score
+        self._memory.move_to_end(key)
+        if len(self._memory) > self._max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _load(self, keys: list[bytes]) -> dict[bytes, float]:
+        if self._connection is None or not keys:
+            return {}
+
+        found = {}
+        for start in range(0, len(keys), self._SQLITE_MAX_VARIABLES):
+            chunk = keys[start : start + self._SQLITE_MAX_VARIABLES]
+            placeholders = ", ".join("?" * len(chunk))
+            found.update(
+                self._connection.execute(
+                    "SELECT text_hash, score FROM sentiment_scores "
+                    f"WHERE text_hash IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+            )
+        return found
+
+    def get_many(self, texts: Iterable[str]) -> dict[str, float]:
+        """
+        Looks up the scores of several texts at once.
+
+        Parameters:
+        - texts (Iterable[str]): Distinct texts to look up.
+
+        Returns:
+        - dict[str, float]: Scores of the texts that were found in either tier.
+        """
+        with self._lock:
+            found, missing = {}, {}
+            for text in texts:
+                key = self._key(text)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[text] = self._memory[key]
+                elif key in self._pending:
+                    found[text] = self._pending[key]
+                else:
+                    missing[key] = text
+
+            loaded = self._load(list(missing))
+            for key, score in loaded.items():
+                self._remember(key, score)
+                found[missing[key]] = score
+
+            self.hits += len(found)
+            self.misses += len(missing) - len(loaded)
+            return found
+
+    def put_many(self, scores: dict[str, float]) -> None:
+        """
+        Stores freshly computed scores, they are written to disk on `flush`.
+
+        Parameters:
+        - scores (dict[str, float]): Scores by text.
+
+        Returns:
+        - None
+        """
+        with self._lock:
+            for text, score in scores.items():
+                key = self._key(text)
+                self._remember(key, score)
+                if self._connection is not None:
+                    self._pending[key] = score
+
+    def get_or_compute(self, text: str, compute: Callable[[str], float]) -> float:
+        """
+        Returns the cached score of a text, computing and storing it on a miss.
+        """
+        found = self.get_many([text])
+        if text in found:
+            return found[text]
+
+        score = compute(text)
+        self.put_many({text: score})
+        return score
+
+    def flush(self) -> None:
+        """Writes pending scores to the on-disk tier."""
+        with self._lock:
+            if self._connection is None or not self._pending:
+                return
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO sentiment_scores (text_hash, score) "
+                "VALUES (?, ?)",
+                self._pending.items(),
+            )
+            self._connection.commit()
+            self._pending.clear()
+
+    def close(self) -> None:
+        """Flushes pending scores and closes the on-disk tier."""
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,207 @@
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from .logger import setup_logger
+from .work_queue import Shard, WorkQueue
+
+POSTS = "posts"
+COMMENTS = "comments"
+
+
+def plan_post_shards(
+    categories: dict[str, dict[str, list[str]]],
+) -> list[tuple[str, str, dict[str, Any]]]:
+    """
+    Splits the searches of the configured categories into one shard per
+    (category, subreddit), which runs the searches of all its keywords.
+
+    Parameters:
+    - categories (dict): Subreddits and keywords per category, as in
+    config.json.
+
+    Returns:
+    - list[tuple]: ID, kind and payload of every shard.
+    """
+    return [
+        (
+            f"{POSTS}/{category}/{subreddit}",
+            POSTS,
+            {
+                "category": category,
+                "subreddit": subreddit,
+                "keywords": settings["keywords"],
+            },
+        )
+        for category, settings in categories.items()
+        for subreddit in settings["subreddits"]
+    ]
+
+
+def plan_comment_shards(
+    post_shard_id: str, num_comments: dict[str, int], size: int
+) -> list[tuple[str, str, dict[str, Any]]]:
+    """
+    Splits the posts a post shard kept into comment shards of `size` posts.
+
+    The IDs derive from the post shard, so a post shard that is run again
+    does not add its comment shards twice.
+
+    Parameters:
+    - post_shard_id (str): ID of the post shard.
+    - num_comments (dict[str, int]): Number of comments per kept post ID.
+    - size (int): Posts per comment shard.
+
+    Returns:
+    - list[tuple]: ID, kind and payload of every shard.
+    """
+    post_ids = sorted(num_comments)
+    return [
+        (
+            f"{COMMENTS}/{post_shard_id}/{start // size}",
+            COMMENTS,
+            {
+                "post_ids": post_ids[start : start + size],
+                "num_comments": {
+                    post_id: int(num_comments[post_id])
+                    for post_id in post_ids[start : start + size]
+                },
+            },
+        )
+        for start in range(0, len(post_ids), size)
+    ]
+
+
+def seed(queue: WorkQueue, categories: dict[str, dict[str, list[str]]]) -> int:
+    """
+    Adds the post shards of a crawl to the queue, shards already in it are
+    kept as they are.
+
+    Returns:
+    - int: Number of shards added.
+    """
+    return queue.add(plan_post_shards(categories))
+
+
+def wait_until_finished(
+    queue: WorkQueue, poll_interval: float = 10.0
+) -> dict[str, int]:
+    """
+    Logs the progress of a crawl until no shard is pending or leased.
+
+    Returns:
+    - dict[str, int]: Final number of shards per status.
+    """
+    logger = setup_logger("EcoPulse")
+    while True:
+        counts = queue.counts()
+        logger.info(f"Crawl progress: {counts}")
+        if not counts[WorkQueue.PENDING] and not counts[WorkQueue.LEASED]:
+            return counts
+        time.sleep(poll_interval)
+
+
+class CrawlWorker:
+    """
+    Claims shards of a crawl from a `WorkQueue` and runs them.
+
+    A post shard runs the post pipeline on its searches and adds a comment
+    shard per `comment_shard_size` posts the pipeline kept, a comment shard
+    runs the comment pipeline on its posts. The lease of a shard is renewed
+    while it runs. The pipelines upsert, so a shard run twice, e.g. after
+    its lease expired, stores the same rows again.
+    """
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        worker_id: str,
+        run_posts: Callable[[dict[str, Any]], dict[str, int]],
+        run_comments: Callable[[dict[str, Any]], None],
+        lease_seconds: float = 600.0,
+        comment_shard_size: int = 50,
+        poll_interval: float = 5.0,
+    ) -> None:
+        """
+        Initializes the CrawlWorker object.
+
+        Parameters:
+        - queue (WorkQueue): Queue shared with the other workers.
+        - worker_id (str): ID of this worker, unique within the crawl.
+        - run_posts (Callable): Runs a post shard payload, returns the
+        number of comments of every post kept.
+        - run_comments (Callable): Runs a comment shard payload.
+        - lease_seconds (float): Lease of a claimed shard, renewed every
+        third of it.
+        - comment_shard_size (int): Posts per comment shard.
+        - poll_interval (float): Seconds to wait for shards while other
+        workers may still add some.
+
+        Returns:
+        - None
+        """
+        self._logger = setup_logger("EcoPulse")
+        self._queue = queue
+        self._worker_id = worker_id
+        self._runners = {POSTS: run_posts, COMMENTS: run_comments}
+        self._lease_seconds = lease_seconds
+        self._comment_shard_size = comment_shard_size
+        self._poll_interval = poll_interval
+
+    def _renew_until(self, shard: Shard, finished: threading.Event) -> None:
+        """Renews the lease of a shard until it finished."""
+        while not finished.wait(self._lease_seconds / 3):
+            if not self._queue.renew(shard.id, self._worker_id, self._lease_seconds):
+                self._logger.warning(
+                    f"Lost the lease of {shard.id}, another worker may run it"
+                )
+                return
+
+    def run_shard(self, shard: Shard) -> None:
+        """
+        Runs a claimed shard and reports its completion or failure.
+        """
+        self._logger.info(f"Worker {self._worker_id} runs {shard.id}")
+        finished = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._renew_until, args=(shard, finished), daemon=True
+        )
+        heartbeat.start()
+        try:
+            result = self._runners[shard.kind](shard.payload)
+        except Exception as e:
+            self._logger.error(f"Shard {shard.id} failed: {e}")
+            self._queue.fail(shard.id, self._worker_id, repr(e))
+            return
+        finally:
+            finished.set()
+            heartbeat.join()
+
+        children: Iterable[tuple[str, str, dict[str, Any]]] = ()
+        if shard.kind == POSTS:
+            children = plan_comment_shards(shard.id, result, self._comment_shard_size)
+        if not self._queue.complete(shard.id, self._worker_id, children):
+            self._logger.info(f"Shard {shard.id} had already been completed")
+
+    def run(self, max_shards: Optional[int] = None) -> int:
+        """
+        Runs shards until none is left, or `max_shards` ran.
+
+        While other workers hold leases the worker waits, their shards may
+        still add comment shards or be handed out again.
+
+        Returns:
+        - int: Number of shards run.
+        """
+        shards_run = 0
+        while max_shards is None or shards_run < max_shards:
+            shard = self._queue.claim(self._worker_id, self._lease_seconds)
+            if shard is None:
+                if not self._queue.unfinished():
+                    break
+                time.sleep(self._poll_interval)
+                continue
+            self.run_shard(shard)
+            shards_run += 1
+        self._logger.info(f"Worker {self._worker_id} ran {shards_run} shards")
+        return shards_run
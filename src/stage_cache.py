@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from .logger import setup_logger
+
+
+class StageCache:
+    """
+    On-disk memo of the output of pipeline stages.
+
+    An output is keyed by the name and configuration of its stage and by
+    the key of its input, which for the first stage is a fingerprint of the
+    fetched or replayed records. Keys chain from stage to stage, so a stage
+    whose configuration changed invalidates itself and everything
+    downstream, while the stages before it are read back from disk.
+
+    Outputs are pickled, which keeps their dtypes exactly. Nothing is ever
+    evicted, the directory can be removed at any time to start over.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initializes the StageCache object.
+
+        Parameters:
+        - path (str): Directory the outputs are stored in.
+
+        Returns:
+        - None
+        """
+        self._logger = setup_logger("EcoPulse")
+        self._path = path
+        os.makedirs(path, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def _plain(cls, value: Any) -> Any:
+        """
+        Converts arrays to lists and the values in lists and dicts to plain
+        Python values, recursively.
+        """
+        if isinstance(value, dict):
+            return {key: cls._plain(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [cls._plain(item) for item in value]
+        if hasattr(value, "tolist"):
+            return cls._plain(value.tolist())
+        return value
+
+    @classmethod
+    def _hashable(cls, value: Any) -> Any:
+        """
+        Serialises lists, dicts and arrays, e.g. the `matches` of a post,
+        which are numpy arrays when read back from Parquet, which pandas
+        cannot hash.
+        """
+        if isinstance(value, (list, tuple, dict)) or (
+            hasattr(value, "tolist") and not isinstance(value, np.generic)
+        ):
+            return json.dumps(cls._plain(value), sort_keys=True, default=str)
+        return value
+
+    @classmethod
+    def fingerprint(cls, data: pd.DataFrame) -> str:
+        """
+        Returns a hash of the columns, dtypes, index and values of a
+        DataFrame.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(pd.util.hash_pandas_object(data.index).to_numpy())
+        for position, (column, dtype) in enumerate(data.dtypes.items()):
+            digest.update(f"{column}\0{dtype}\0".encode())
+            values = data.iloc[:, position]
+            if pd.api.types.is_object_dtype(dtype):
+                values = values.map(cls._hashable)
+            digest.update(pd.util.hash_pandas_object(values, index=False).to_numpy())
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(stage: str, config_hash: str, input_key: str) -> str:
+        """Returns the key of the output of a stage run on an input."""
+        return hashlib.blake2b(
+            f"{stage}\0{config_hash}\0{input_key}".encode(), digest_size=16
+        ).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self._path, f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Returns the output stored under a key, None if there is none."""
+        try:
+            data = pd.read_pickle(self._file(key))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: pd.DataFrame) -> None:
+        """Stores the output of a stage under a key."""
+        # Written aside and renamed, a crash never leaves a partial output.
+        temporary_path = f"{self._file(key)}.tmp"
+        data.to_pickle(temporary_path)
+        os.replace(temporary_path, self._file(key))
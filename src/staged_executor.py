@@ -0,0 +1,152 @@
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator
+
+# Marks the end of the items flowing through a queue.
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """A step of a staged execution, run by `workers` threads."""
+
+    name: str
+    function: Callable[[Any], Any]
+    workers: int = 1
+
+
+class ClosableQueue:
+    """Unbounded queue that can be iterated until the producer closes it."""
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue = queue.Queue()
+
+    def put(self, item: Any) -> None:
+        self._queue.put(item)
+
+    def close(self) -> None:
+        self._queue.put(_DONE)
+
+    def __iter__(self) -> Iterator[Any]:
+        while (item := self._queue.get()) is not _DONE:
+            yield item
+
+
+class StagedExecutor:
+    """
+    Runs a chain of stages concurrently, each stage on its own threads.
+
+    Stages are connected by bounded queues: a stage that is ahead blocks
+    until the next one caught up. The first error raised by any stage stops
+    all stages and is re-raised to the consumer.
+    """
+
+    _POLL_INTERVAL = 0.1
+
+    def __init__(self, stages: list[Stage], queue_size: int = 4) -> None:
+        """
+        Initializes the StagedExecutor object.
+
+        Parameters:
+        - stages (list[Stage]): Stages in execution order.
+        - queue_size (int): Number of items buffered between two stages.
+
+        Returns:
+        - None
+        """
+        self._stages = stages
+        self._queue_size = queue_size
+
+    def run(self, source: Iterable[Any]) -> Iterator[Any]:
+        """
+        Feeds the items of `source` through all stages.
+
+        `source` is consumed on a thread of its own, so producing items
+        overlaps with processing them. After an error that thread is left to
+        notice the stop on its own, as it may be blocked inside `source`.
+
+        Args:
+            source (Iterable): Items for the first stage.
+
+        Returns:
+            Iterator: Outputs of the last stage, in completion order.
+        """
+        stop = threading.Event()
+        errors: list[BaseException] = []
+        queues = [queue.Queue(self._queue_size) for _ in range(len(self._stages) + 1)]
+
+        def put(target: queue.Queue, item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=self._POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get(source_queue: queue.Queue) -> Any:
+            while not stop.is_set():
+                try:
+                    return source_queue.get(timeout=self._POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+            return _DONE
+
+        def fail(error: BaseException) -> None:
+            errors.append(error)
+            stop.set()
+
+        def feed() -> None:
+            try:
+                for item in source:
+                    if not put(queues[0], item):
+                        return
+            except BaseException as e:
+                fail(e)
+            put(queues[0], _DONE)
+
+        def work(index: int, stage: Stage, finished: list[int]) -> None:
+            lock = finished_locks[index]
+            while (item := get(queues[index])) is not _DONE:
+                try:
+                    result = stage.function(item)
+                except BaseException as e:
+                    fail(e)
+                    return
+                if not put(queues[index + 1], result):
+                    return
+            # Let the other workers of the stage see the end as well, the
+            # last one to finish passes it on to the next stage.
+            put(queues[index], _DONE)
+            with lock:
+                finished[0] += 1
+                if finished[0] == stage.workers:
+                    put(queues[index + 1], _DONE)
+
+        finished_locks = [threading.Lock() for _ in self._stages]
+        threads = [threading.Thread(target=feed, name="feed", daemon=True)]
+        for index, stage in enumerate(self._stages):
+            finished = [0]
+            threads.extend(
+                threading.Thread(
+                    target=work,
+                    args=(index, stage, finished),
+                    name=f"{stage.name}-{worker}",
+                    daemon=True,
+                )
+                for worker in range(stage.workers)
+            )
+        for thread in threads:
+            thread.start()
+
+        try:
+            while (result := get(queues[-1])) is not _DONE:
+                yield result
+        finally:
+            stop.set()
+            for thread in threads[1:]:
+                thread.join()
+
+        if errors:
+            raise errors[0]
@@ -0,0 +1,231 @@
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+
+@dataclass
+class Shard:
+    """A unit of work claimed from a `WorkQueue`."""
+
+    id: str
+    kind: str
+    payload: dict[str, Any]
+    attempts: int
+
+
+class WorkQueue:
+    """
+    Work queue in a local SQLite file, shared by the processes of a crawl.
+
+    A worker claims a shard with a lease. A shard whose lease expires, e.g.
+    because its worker died, is handed out again, one whose work failed
+    `max_attempts` times is given up. Completing a shard is idempotent:
+    shards are identified by their ID, so completing one twice, or adding
+    the shards it produced twice, changes nothing.
+    """
+
+    PENDING = "pending"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, path: str = "crawl_queue.sqlite", max_attempts: int = 3):
+        """
+        Initializes the WorkQueue object.
+
+        Parameters:
+        - path (str): SQLite file of the queue, on a file system all
+        workers can lock, i.e. not a network share.
+        - max_attempts (int): Claims of a shard before it is given up.
+
+        Returns:
+        - None
+        """
+        self._max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # Transactions are begun explicitly, claims need BEGIN IMMEDIATE.
+        self._connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._connection.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS shards (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS shards_status ON shards (status);
+            """
+        )
+
+    def _insert(self, shards: Iterable[tuple[str, str, dict[str, Any]]]) -> int:
+        cursor = self._connection.executemany(
+            "INSERT OR IGNORE INTO shards (id, kind, payload) VALUES (?, ?, ?)",
+            (
+                (shard_id, kind, json.dumps(payload))
+                for shard_id, kind, payload in shards
+            ),
+        )
+        return cursor.rowcount
+
+    def add(self, shards: Iterable[tuple[str, str, dict[str, Any]]]) -> int:
+        """
+        Adds shards that are not in the queue yet.
+
+        Parameters:
+        - shards (Iterable[tuple]): ID, kind and JSON-serializable payload
+        of every shard.
+
+        Returns:
+        - int: Number of shards added.
+        """
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                added = self._insert(shards)
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+            return added
+
+    def claim(self, worker: str, lease_seconds: float) -> Optional[Shard]:
+        """
+        Claims the oldest pending shard, or one whose lease expired.
+
+        Parameters:
+        - worker (str): ID of the claiming worker.
+        - lease_seconds (float): Time the worker has before the shard is
+        handed to another worker, see `renew`.
+
+        Returns:
+        - Shard | None: The claimed shard, None if there is none to claim.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                # Shards whose last attempt ran out of time are given up.
+                self._connection.execute(
+                    "UPDATE shards SET status = 'failed', error = 'lease expired' "
+                    "WHERE status = 'leased' AND lease_expires < ? "
+                    "AND attempts >= ?",
+                    (now, self._max_attempts),
+                )
+                row = self._connection.execute(
+                    "SELECT id, kind, payload, attempts FROM shards "
+                    "WHERE status = 'pending' "
+                    "OR (status = 'leased' AND lease_expires < ?) "
+                    "ORDER BY rowid LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is not None:
+                    self._connection.execute(
+                        "UPDATE shards SET status = 'leased', worker = ?, "
+                        "lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                        (worker, now + lease_seconds, row[0]),
+                    )
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+        if row is None:
+            return None
+        shard_id, kind, payload, attempts = row
+        return Shard(shard_id, kind, json.loads(payload), attempts + 1)
+
+    def renew(self, shard_id: str, worker: str, lease_seconds: float) -> bool:
+        """
+        Extends the lease of a shard.
+
+        Returns:
+        - bool: False if the worker no longer holds the lease.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "UPDATE shards SET lease_expires = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + lease_seconds, shard_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def complete(
+        self,
+        shard_id: str,
+        worker: str,
+        children: Iterable[tuple[str, str, dict[str, Any]]] = (),
+    ) -> bool:
+        """
+        Marks a shard as done and adds the shards its work produced, in one
+        transaction.
+
+        Parameters:
+        - shard_id (str): ID of the shard.
+        - worker (str): ID of the worker that did the work.
+        - children (Iterable[tuple]): Shards to add, see `add`.
+
+        Returns:
+        - bool: False if the shard had already been completed.
+        """
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._connection.execute(
+                    "UPDATE shards SET status = 'done', worker = ?, "
+                    "lease_expires = NULL, error = NULL "
+                    "WHERE id = ? AND status != 'done'",
+                    (worker, shard_id),
+                )
+                completed = cursor.rowcount == 1
+                self._insert(children)
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+            return completed
+
+    def fail(self, shard_id: str, worker: str, error: str) -> None:
+        """
+        Returns a shard whose work failed to the queue, or gives it up after
+        `max_attempts` claims.
+        """
+        with self._lock:
+            self._connection.execute(
+                "UPDATE shards SET "
+                "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, lease_expires = NULL, error = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (self._max_attempts, error, shard_id, worker),
+            )
+
+    def counts(self) -> dict[str, int]:
+        """Returns the number of shards per status."""
+        with self._lock:
+            counts = dict.fromkeys(
+                (self.PENDING, self.LEASED, self.DONE, self.FAILED), 0
+            )
+            counts.update(
+                self._connection.execute(
+                    "SELECT status, COUNT(*) FROM shards GROUP BY status"
+                ).fetchall()
+            )
+            return counts
+
+    def unfinished(self) -> int:
+        """Returns the number of shards that are pending or leased."""
+        counts = self.counts()
+        return counts[self.PENDING] + counts[self.LEASED]
+
+    def close(self) -> None:
+        """Closes the queue file."""
+        with self._lock:
+            self._connection.close()
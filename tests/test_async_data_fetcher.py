@@ -0,0 +1,255 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+from src.async_data_fetcher import AsyncRedditCommentFetcher, AsyncRedditPostFetcher
+from src.fetch_state import FetchStateStore
+
+
+def make_comment_fetcher(post_ids, **kwargs):
+    return AsyncRedditCommentFetcher(
+        "client_id", "client_secret", "user_agent", 0, post_ids, **kwargs
+    )
+
+
+class FakeForest:
+    def __init__(self, comments):
+        self._comments = comments
+
+    async def replace_more(self, limit=None):
+        await asyncio.sleep(0)
+
+    def list(self):
+        return self._comments
+
+
+class FakeReddit:
+    """Stand-in of asyncpraw.Reddit serving posts with two comments each."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def submission(self, id):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        comments = [
+            SimpleNamespace(
+                id=f"{id}_c{i}",
+                author=SimpleNamespace(name="User"),
+                body=f"comment {i}",
+                score=i,
+                created_utc=1700000000.0,
+            )
+            for i in range(2)
+        ]
+        return SimpleNamespace(
+            comments=FakeForest(comments),
+            subreddit=SimpleNamespace(display_name="subreddit1"),
+        )
+
+
+def test_comment_requests_are_bounded_and_ids_consumed_lazily(mocker):
+    """Test that at most max_concurrency posts are fetched at a time."""
+    reddit = FakeReddit()
+
+    async def post_ids():
+        for i in range(10):
+            await asyncio.sleep(0)
+            yield f"p{i}"
+
+    fetcher = make_comment_fetcher(post_ids(), max_concurrency=3)
+    mocker.patch.object(fetcher, "_client", return_value=reddit)
+
+    comments = asyncio.run(fetcher.run())
+
+    assert len(comments) == 20
+    assert {comment["post_id"] for comment in comments} == {f"p{i}" for i in range(10)}
+    assert reddit.max_in_flight == 3
+
+
+def test_completed_posts_are_skipped(mocker):
+    """Test that posts a checkpointed run already stored are not fetched."""
+    reddit = FakeReddit()
+    fetcher = make_comment_fetcher(["p0", "p1", "p2"], completed_post_ids={"p1"})
+    mocker.patch.object(fetcher, "_client", return_value=reddit)
+
+    comments = asyncio.run(fetcher.run())
+
+    assert {comment["post_id"] for comment in comments} == {"p0", "p2"}
+
+
+def test_comment_errors_are_raised_when_asked(mocker):
+    """Test that a post failing for good stops the fetch with raise_errors."""
+    fetcher = make_comment_fetcher(["p0"], max_retries=0, raise_errors=True)
+    error = RuntimeError("503")
+    mocker.patch.object(fetcher, "_RETRYABLE_ERRORS", (RuntimeError,))
+    reddit = mocker.Mock()
+    reddit.submission = mocker.AsyncMock(side_effect=error)
+    mocker.patch.object(fetcher, "_client", return_value=reddit)
+
+    with pytest.raises(RuntimeError, match="503"):
+        asyncio.run(fetcher.run())
+
+
+def test_map_concurrently_yields_in_completion_order():
+    """Test that a slow item does not hold back the ones after it."""
+    fetcher = make_comment_fetcher([], max_concurrency=4)
+
+    async def delayed(item):
+        await asyncio.sleep(item / 100)
+        return item
+
+    async def collect():
+        return [item async for item in fetcher._map_concurrently(delayed, [3, 1, 2])]
+
+    assert asyncio.run(collect()) == [1, 2, 3]
+
+
+class FakeRedditHandler(BaseHTTPRequestHandler):
+    """Serves the OAuth token and a search listing like the Reddit API."""
+
+    def _send(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._send(
+            {
+                "access_token": "token",
+                "token_type": "bearer",
+                "expires_in": 3600,
+                "scope": "*",
+            }
+        )
+
+    def do_GET(self):
+        posts = [
+            {
+                "id": f"post_{i}",
+                "name": f"t3_post_{i}",
+                "title": f"Smog report {i}",
+                "author": "User",
+                "subreddit": "smog",
+                "selftext": "",
+                "created_utc": 1700000000.0 + i,
+                "score": i,
+                "url": "https://example.com",
+                "num_comments": i,
+            }
+            for i in range(2)
+        ]
+        self._send(
+            {
+                "kind": "Listing",
+                "data": {
+                    "children": [{"kind": "t3", "data": post} for post in posts],
+                    "after": None,
+                },
+            }
+        )
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def reddit_server():
+    """Fixture to run a fake Reddit API on a local port."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeRedditHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def make_post_fetcher(reddit_server, **kwargs):
+    return AsyncRedditPostFetcher(
+        "client_id",
+        "client_secret",
+        "user_agent",
+        {"air": {"subreddits": ["smog"], "keywords": ["pm2.5", "ozone"]}},
+        10,
+        "month",
+        "relevance",
+        reddit_settings={
+            "oauth_url": reddit_server,
+            "reddit_url": reddit_server,
+            "check_for_updates": False,
+        },
+        **kwargs,
+    )
+
+
+def fetch_posts(fetcher):
+    async def fetch():
+        try:
+            return await fetcher.run()
+        finally:
+            await fetcher.close()
+
+    return asyncio.run(fetch())
+
+
+def test_post_search_against_local_server(reddit_server):
+    """Test that posts are searched with asyncpraw over HTTP."""
+    pytest.importorskip("asyncpraw")
+
+    posts = fetch_posts(make_post_fetcher(reddit_server))
+
+    assert [post["id"] for post in posts] == ["post_0", "post_1"]
+    assert posts[1]["num_comments"] == 1
+    assert posts[0]["matches"] == [
+        {"category": "air", "keyword": "pm2.5"},
+        {"category": "air", "keyword": "ozone"},
+    ]
+
+
+def test_incremental_post_search_skips_committed_posts(reddit_server, tmp_path):
+    """Test that searches are checkpointed only once their posts are committed."""
+    pytest.importorskip("asyncpraw")
+    fetch_state = FetchStateStore(str(tmp_path / "fetch_state.sqlite"))
+
+    first = fetch_posts(make_post_fetcher(reddit_server, fetch_state=fetch_state))
+    fetcher = make_post_fetcher(reddit_server, fetch_state=fetch_state)
+    again = fetch_posts(fetcher)
+    fetcher.committed([post["id"] for post in again])
+    after_commit = fetch_posts(
+        make_post_fetcher(reddit_server, fetch_state=fetch_state)
+    )
+
+    assert [post["id"] for post in first] == ["post_0", "post_1"]
+    assert [post["id"] for post in again] == ["post_0", "post_1"]
+    assert after_commit == []
+    fetch_state.close()
+
+
+def test_search_errors_are_raised_when_asked(mocker):
+    """Test that a failed search stops the fetch with raise_errors."""
+    fetcher = AsyncRedditPostFetcher(
+        "client_id",
+        "client_secret",
+        "user_agent",
+        {"air": {"subreddits": ["smog"], "keywords": ["ozone"]}},
+        10,
+        "month",
+        "relevance",
+        raise_errors=True,
+    )
+    reddit = mocker.Mock()
+    reddit.subreddit = mocker.AsyncMock(side_effect=RuntimeError("403"))
+    mocker.patch.object(fetcher, "_client", return_value=reddit)
+
+    with pytest.raises(RuntimeError, match="403"):
+        asyncio.run(fetcher.run())
@@ -0,0 +1,154 @@
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+
+import pandas as pd
+import pytest
+from src.async_database_manager import AsyncPostDataBaseManager
+from src.change_detector import ChangeDetector
+
+
+class AsyncSQLiteCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await asyncio.to_thread(self._cursor.close)
+
+    async def execute(self, query, params=()):
+        await asyncio.to_thread(self._cursor.execute, query, params)
+
+    async def fetchall(self):
+        return await asyncio.to_thread(self._cursor.fetchall)
+
+
+class AsyncSQLiteConnection:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self):
+        return AsyncSQLiteCursor(self._connection.cursor())
+
+    async def commit(self):
+        await asyncio.to_thread(self._connection.commit)
+
+    async def rollback(self):
+        await asyncio.to_thread(self._connection.rollback)
+
+
+class AsyncSQLitePool:
+    """Stand-in of the aiomysql pool on an SQLite file, queried off the loop."""
+
+    dialect = "sqlite"
+    placeholder = "?"
+
+    def __init__(self, path):
+        self._path = path
+        self.checkouts = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @asynccontextmanager
+    async def connection(self):
+        self.checkouts += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        connection = await asyncio.to_thread(
+            sqlite3.connect, self._path, timeout=30, check_same_thread=False
+        )
+        try:
+            yield AsyncSQLiteConnection(connection)
+        finally:
+            await asyncio.to_thread(connection.close)
+            self.in_flight -= 1
+
+    def metrics(self):
+        return {"checkouts": self.checkouts, "mean_wait_time": 0.0}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Fixture to provide an SQLite database file with the posts table."""
+    path = tmp_path / "reddit_data.sqlite"
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            """
+            CREATE TABLE posts (
+                id TEXT PRIMARY KEY, title TEXT, author TEXT, subreddit TEXT,
+                content TEXT, created_datetime TEXT, score INTEGER,
+                num_comments INTEGER, url TEXT, category TEXT, keyword TEXT,
+                sentiment_score REAL
+            )
+            """
+        )
+    connection.close()
+    return str(path)
+
+
+def make_posts(ids, score=1, num_comments=0):
+    """Builds enriched post data."""
+    return pd.DataFrame(
+        {
+            "id": ids,
+            "title": [f"title {i}" for i in ids],
+            "author": None,
+            "subreddit": "subreddit1",
+            "content": "",
+            "created_datetime": pd.to_datetime([1700000000] * len(ids), unit="s"),
+            "score": score,
+            "num_comments": num_comments,
+            "url": "https://example.com",
+            "sentiment_score": 0.5,
+        }
+    )
+
+
+def stored_posts(db_path):
+    with sqlite3.connect(db_path) as connection:
+        rows = connection.execute(
+            "SELECT id, score, num_comments FROM posts ORDER BY id"
+        ).fetchall()
+    connection.close()
+    return rows
+
+
+def test_async_upsert_writes_batches_concurrently(db_path):
+    """Test that batches are upserted at once and re-upserts update scores."""
+    pool = AsyncSQLitePool(db_path)
+    manager = AsyncPostDataBaseManager(pool, batch_size=2)
+
+    async def store():
+        await manager.run(make_posts(["a", "b", "c"]))
+        await manager.run(make_posts(["b", "d"], score=7, num_comments=3))
+
+    asyncio.run(store())
+
+    assert stored_posts(db_path) == [
+        ("a", 1, 0),
+        ("b", 7, 3),
+        ("c", 1, 0),
+        ("d", 7, 3),
+    ]
+    assert pool.max_in_flight == 2
+
+
+def test_async_change_detection_skips_unchanged_rows(db_path):
+    """Test that the index is loaded from the table and unchanged rows skipped."""
+    pool = AsyncSQLitePool(db_path)
+
+    async def store():
+        await AsyncPostDataBaseManager(pool).run(make_posts(["a", "b"]))
+        manager = AsyncPostDataBaseManager(pool, change_detector=ChangeDetector())
+        await manager.run(make_posts(["a", "b"]))
+        checkouts = pool.checkouts
+        await manager.run(make_posts(["a", "b"], score=[1, 4]))
+        return checkouts
+
+    checkouts = asyncio.run(store())
+
+    # One write, then the index load; the unchanged rows were not written.
+    assert checkouts == 2
+    assert stored_posts(db_path) == [("a", 1, 0), ("b", 4, 0)]
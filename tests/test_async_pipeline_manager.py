@@ -0,0 +1,163 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import pandas as pd
+import pytest
+from src.async_pipeline_manager import AsyncPipelineManager
+from src.data_cleaner import RedditCommentCleaner
+from src.data_enricher import RedditCommentEnricher
+from src.data_filter import RedditCommentFilter
+from src.pipeline_manager import PipelineManager
+
+
+@pytest.fixture
+def comments():
+    """Fixture to provide fetched comment records."""
+    return [
+        {
+            "id": f"c{i}",
+            "post_id": "p1",
+            "author": "User",
+            "subreddit": "subreddit1",
+            "body": "[deleted]" if i % 4 == 0 else f"Comment number {i}",
+            "score": i,
+            "created_utc": 1700000000 + i,
+        }
+        for i in range(10)
+    ]
+
+
+class StubFetcher:
+    """Async fetcher yielding the given records."""
+
+    def __init__(self, records):
+        self._records = records
+        self.committed_keys = []
+
+    async def stream(self):
+        for record in self._records:
+            await asyncio.sleep(0)
+            yield record
+
+    def committed(self, keys):
+        self.committed_keys.extend(keys)
+
+
+def make_pipeline(comments, db_manager=None, chunk_size=None, **kwargs):
+    """Builds an async comment pipeline around a stub fetcher and DB manager."""
+    return AsyncPipelineManager(
+        fetcher=StubFetcher(comments),
+        cleaner=RedditCommentCleaner(),
+        enricher=RedditCommentEnricher(),
+        filter=RedditCommentFilter(min_upvotes=5, min_words=50),
+        db_manager=db_manager or AsyncMock(),
+        chunk_size=chunk_size,
+        **kwargs,
+    )
+
+
+def test_async_run_matches_sync_pipeline(comments):
+    """Test that the async pipeline stores and keeps what the sync one does."""
+    fetcher = MagicMock()
+    fetcher.stream.side_effect = lambda: iter(comments)
+    expected = PipelineManager(
+        fetcher=fetcher,
+        cleaner=RedditCommentCleaner(),
+        enricher=RedditCommentEnricher(),
+        filter=RedditCommentFilter(min_upvotes=5, min_words=50),
+        db_manager=MagicMock(),
+        chunk_size=3,
+    ).run()
+    db_manager = AsyncMock()
+
+    result = asyncio.run(make_pipeline(comments, db_manager, chunk_size=3).run())
+
+    pd.testing.assert_frame_equal(result, expected)
+    stored = [call.args[0] for call in db_manager.run.await_args_list]
+    assert [len(chunk) for chunk in stored] == [2, 2, 2, 1]
+
+
+def test_writes_overlap_and_results_keep_chunk_order(comments):
+    """Test that chunks are stored concurrently and yielded in order."""
+    in_flight = []
+    delays = iter([0.05, 0.01, 0.0, 0.0])
+
+    async def store(data):
+        in_flight.append(1)
+        await asyncio.sleep(next(delays))
+        in_flight.append(-1)
+
+    db_manager = AsyncMock()
+    db_manager.run.side_effect = store
+    pipeline = make_pipeline(comments, db_manager, chunk_size=3, max_pending_writes=4)
+
+    async def collect():
+        return [chunk.index.tolist() async for chunk in pipeline.stream()]
+
+    chunks = asyncio.run(collect())
+
+    running = [sum(in_flight[: i + 1]) for i in range(len(in_flight))]
+    assert max(running) > 1
+    assert [index for chunk in chunks for index in chunk] == sorted(
+        index for chunk in chunks for index in chunk
+    )
+
+
+def test_blocking_stages_run_off_the_loop(comments, mocker):
+    """Test that the CPU-bound stages run on the executor, not the loop."""
+    threads = []
+    cleaner = RedditCommentCleaner()
+    run = cleaner.run
+    mocker.patch.object(
+        cleaner,
+        "run",
+        side_effect=lambda data: threads.append(threading.get_ident()) or run(data),
+    )
+    pipeline = AsyncPipelineManager(
+        fetcher=StubFetcher(comments),
+        cleaner=cleaner,
+        enricher=RedditCommentEnricher(),
+        filter=RedditCommentFilter(),
+        db_manager=AsyncMock(),
+        chunk_size=4,
+    )
+
+    async def run_pipeline():
+        await pipeline.run()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run_pipeline())
+
+    assert len(threads) == 3
+    assert loop_thread not in threads
+
+
+def test_keys_are_committed_once_their_records_are_stored(comments):
+    """Test that keys are committed after their last chunk, not a failed one."""
+    records = [
+        dict(comment, post_id=post_id)
+        for comment, post_id in zip(comments, ["p1"] * 4 + ["p2"] * 3 + ["p3"] * 3)
+    ]
+    db_manager = AsyncMock()
+    db_manager.run.side_effect = [None, Exception("database is locked"), None, None]
+    pipeline = make_pipeline(
+        records, db_manager, chunk_size=3, checkpoint_key="post_id"
+    )
+
+    asyncio.run(pipeline.run())
+
+    # p1 and p2 both have records in the second chunk, whose store failed.
+    assert pipeline._fetcher.committed_keys == ["p3"]
+
+
+def test_store_errors_are_raised_when_asked(comments):
+    """Test that a failed store stops the run with raise_store_errors."""
+    db_manager = AsyncMock()
+    db_manager.run.side_effect = Exception("database is locked")
+    pipeline = make_pipeline(
+        comments, db_manager, chunk_size=3, raise_store_errors=True
+    )
+
+    with pytest.raises(Exception, match="database is locked"):
+        asyncio.run(pipeline.run())
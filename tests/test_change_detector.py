@@ -0,0 +1,51 @@
+import pandas as pd
+from src.change_detector import ChangeDetector
+
+
+def stored_rows():
+    """Builds the mutable columns of stored posts."""
+    return pd.DataFrame({"id": ["a", "b"], "score": [1, 2], "num_comments": [0, 5]})
+
+
+def test_classify_new_changed_and_unchanged():
+    """Test that rows are split into new, changed and unchanged ones."""
+    detector = ChangeDetector()
+    detector.load(stored_rows())
+
+    data = pd.DataFrame(
+        {"id": ["a", "b", "c"], "score": [1, 3, 1], "num_comments": [0, 5, 0]}
+    )
+    new, changed, _, _ = detector.classify(data["id"], data[["score", "num_comments"]])
+
+    assert new.tolist() == [False, False, True]
+    assert changed.tolist() == [False, True, False]
+
+
+def test_recorded_rows_are_known():
+    """Test that recorded rows are merged into the index, the latest winning."""
+    detector = ChangeDetector()
+    detector.load(stored_rows())
+    data = pd.DataFrame({"id": ["b", "c"], "score": [3, 1], "num_comments": [5, 0]})
+    _, _, keys, hashes = detector.classify(data["id"], data[["score", "num_comments"]])
+    detector.record(keys, hashes)
+
+    new, changed, _, _ = detector.classify(data["id"], data[["score", "num_comments"]])
+
+    assert not new.any() and not changed.any()
+    assert len(detector) == 3
+
+
+def test_snapshot_round_trip(tmp_path):
+    """Test that the index survives a save and load through the snapshot."""
+    path = str(tmp_path / "posts_index.npz")
+    detector = ChangeDetector(path)
+    assert not detector.load_snapshot()
+    detector.load(stored_rows())
+    detector.save_snapshot()
+
+    restored = ChangeDetector(path)
+    assert restored.load_snapshot()
+    rows = stored_rows()
+    new, changed, _, _ = restored.classify(rows["id"], rows[["score", "num_comments"]])
+    assert restored.loaded
+    assert not new.any() and not changed.any()
@@ -0,0 +1,54 @@
+import pytest
+from src.checkpoint_store import CheckpointStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "checkpoints.sqlite")
+
+
+def test_resume_continues_unfinished_run(path):
+    """Test that a resumed run sees the checkpoints of the interrupted one."""
+    store = CheckpointStore(path)
+    store.commit_batch("comments", 0, 10, ["p1", "p2"])
+    store.save_outputs("posts", {"p1": 3})
+    store.finish_pipeline("posts")
+    store.close()
+
+    resumed = CheckpointStore(path, resume=True)
+
+    assert resumed.run_id == store.run_id
+    assert resumed.completed_keys("comments") == {"p1", "p2"}
+    assert resumed.next_batch("comments") == 1
+    assert resumed.outputs("posts") == {"p1": 3}
+    assert resumed.pipeline_finished("posts")
+    assert not resumed.pipeline_finished("comments")
+    resumed.close()
+
+
+def test_new_run_starts_from_scratch(path):
+    """Test that finished runs are not resumed and new runs start empty."""
+    store = CheckpointStore(path)
+    store.commit_batch("comments", 0, 10, ["p1"])
+    store.finish()
+    store.close()
+
+    resumed = CheckpointStore(path, resume=True)
+    fresh = CheckpointStore(path)
+
+    assert resumed.run_id != store.run_id
+    assert fresh.run_id not in (store.run_id, resumed.run_id)
+    assert resumed.completed_keys("comments") == set()
+    assert fresh.committed_batches("comments") == set()
+    resumed.close()
+    fresh.close()
+
+
+def test_batch_outputs_are_committed_with_the_batch(path):
+    """Test that the outputs of a batch are saved in its transaction."""
+    store = CheckpointStore(path)
+    store.commit_batch("posts", 0, 2, ["p1"], {"p1": 4, "p2": 0})
+
+    assert store.outputs("posts") == {"p1": 4, "p2": 0}
+    assert store.completed_keys("posts") == {"p1"}
+    store.close()
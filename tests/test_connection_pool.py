@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+from src.connection_pool import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    """Fixture to provide a pool of two SQLite connections."""
+    pool = ConnectionPool(f"sqlite:///{tmp_path / 'pool.sqlite'}", pool_size=2)
+    yield pool
+    pool.close()
+
+
+def test_connection_is_returned_to_pool(pool):
+    """Test that connections go back to the pool and checkouts are counted."""
+    with pool.connection() as connection:
+        connection.cursor().execute("SELECT 1")
+        assert pool.metrics()["checked_out"] == 1
+
+    metrics = pool.metrics()
+    assert metrics["checkouts"] == 1
+    assert metrics["checked_out"] == 0
+    assert pool.dialect == "sqlite"
+    assert pool.placeholder == "?"
+
+
+def test_checkout_waits_for_free_connection(tmp_path):
+    """Test that a full pool blocks and the wait is recorded."""
+    pool = ConnectionPool(f"sqlite:///{tmp_path / 'pool.sqlite'}", pool_size=1)
+    release = threading.Event()
+    acquired = threading.Event()
+
+    def hold():
+        with pool.connection():
+            acquired.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    acquired.wait()
+    threading.Timer(0.1, release.set).start()
+    with pool.connection():
+        pass
+    holder.join()
+    pool.close()
+
+    metrics = pool.metrics()
+    assert metrics["checkouts"] == 2
+    assert metrics["wait_time"] >= 0.05
+
+
+def test_pool_context_manager_disposes(tmp_path):
+    """Test that leaving the context closes the pooled connections."""
+    with ConnectionPool(f"sqlite:///{tmp_path / 'pool.sqlite'}") as pool:
+        with pool.connection():
+            pass
+        assert pool.engine.pool.checkedin() == 1
+
+    assert pool.engine.pool.checkedin() == 0
@@ -0,0 +1,133 @@
+import re
+
+import pandas as pd
+import pytest
+from src.data_cleaner import RedditCleaner, RedditCommentCleaner, RedditPostCleaner
+
+
+def legacy_clean_text(text):
+    """The original five-step implementation of RedditCleaner._clean_text."""
+    if not isinstance(text, str) or text.strip() == "":
+        return "Content unavailable"
+
+    text = text.lower().strip()
+    text = re.sub(r"http\S+|www\S+", "", text)
+    text = re.sub(r"@\w+", "", text)
+    text = re.sub(r"#\w+", "", text)
+    text = re.sub(r"[^a-zA-Z0-9\s.,!?]", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+
+    return text
+
+
+@pytest.fixture
+def raw_texts():
+    """Fixture to provide texts covering the edge cases of the normalizer."""
+    return pd.Series(
+        [
+            "Check https://example.com/a?b=1 NOW!!",
+            "Visit www.site.org, thanks @mod and #climate",
+            "@userwww.example.org and #tagwww.x and @http://q.com",
+            "@xhttp #wwwx @whwhttp:/x @a#b #a@b x@y.com",
+            "Café   naïve İstanbul 😀\tdone\x1c.",
+            "  ",
+            "",
+            None,
+            3.5,
+            "[deleted]",
+        ],
+        index=range(10, 20),
+    )
+
+
+def test_clean_text_matches_legacy(raw_texts):
+    """Test that the single-pass normalizer matches the original one."""
+    for text in raw_texts:
+        assert RedditCleaner._clean_text(text) == legacy_clean_text(text)
+
+
+def test_clean_texts_matches_legacy(raw_texts):
+    """Test that the batch API matches the original normalizer row by row."""
+    result = RedditCleaner._clean_texts(raw_texts)
+
+    assert result.index.equals(raw_texts.index)
+    assert result.tolist() == [legacy_clean_text(text) for text in raw_texts]
+
+
+def test_post_cleaner_drops_deleted_titles():
+    """Test that missing and deleted titles are removed before cleaning."""
+    data = pd.DataFrame(
+        {
+            "id": ["1", "2", "3", "4"],
+            "title": ["Solar #energy!", None, "[removed]", "  "],
+            "author": ["a", None, "c", "d"],
+            "score": [1, 2, None, 4],
+            "created_utc": [1.0, 2.0, 3.0, 4.0],
+        }
+    )
+
+    result = RedditPostCleaner().run(data)
+
+    assert result["id"].tolist() == ["1", "4"]
+    assert result["title"].tolist() == ["solar !", "Content unavailable"]
+
+
+def test_comment_cleaner_fills_missing_author():
+    """Test that comments without an author are attributed to Anonymous."""
+    data = pd.DataFrame(
+        {
+            "id": ["1", "2"],
+            "body": ["Great @point", "[deleted]"],
+            "author": [None, "b"],
+            "score": [1, 2],
+            "created_utc": [1.0, 2.0],
+        }
+    )
+
+    result = RedditCommentCleaner().run(data)
+
+    assert result["author"].tolist() == ["Anonymous"]
+    assert result["body"].tolist() == ["great"]
+
+
+@pytest.fixture
+def comments():
+    """Fixture to provide raw comments without deleted bodies."""
+    return pd.DataFrame(
+        {
+            "id": ["1", "2"],
+            "body": ["Great @point", "Solar #energy!"],
+            "author": [None, "b"],
+            "score": [1, 2],
+            "created_utc": [1.0, 2.0],
+        }
+    )
+
+
+def test_cleaner_leaves_input_untouched(comments):
+    """Test that without inplace the caller's frame is not modified."""
+    original = comments.copy()
+
+    result = RedditCommentCleaner().run(comments)
+
+    assert result is not comments
+    pd.testing.assert_frame_equal(comments, original)
+
+
+def test_inplace_cleaner_reuses_owned_frame(comments):
+    """Test that with inplace and nothing to drop no copy is made."""
+    result = RedditCommentCleaner(inplace=True).run(comments)
+
+    assert result is comments
+    assert comments["body"].tolist() == ["great", "solar !"]
+    assert comments["author"].tolist() == ["Anonymous", "b"]
+
+
+def test_inplace_cleaner_selects_kept_rows_once(comments):
+    """Test that dropping rows selects them into a single new frame."""
+    comments.loc[0, "body"] = "[removed]"
+
+    result = RedditCommentCleaner(inplace=True).run(comments)
+
+    assert result["id"].tolist() == ["2"]
+    assert result.index.tolist() == [1]
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from src.data_enricher import RedditCommentEnricher, RedditPostEnricher
+
+
+def test_parallel_scores_match_serial():
+    """Test that the process pool returns the serial scores in row order."""
+    bodies = [
+        "great news for solar energy",
+        "terrible air quality today",
+        "",
+        "the city plan is good",
+        "great news for solar energy",
+        "awful",
+    ]
+    data = pd.DataFrame({"body": bodies, "created_utc": [0] * len(bodies)})
+
+    serial = RedditCommentEnricher().run(data.copy())
+    enricher = RedditCommentEnricher(parallel=True, max_workers=2, chunk_size=2)
+    try:
+        parallel = enricher.run(data.copy())
+    finally:
+        enricher.close()
+
+    pd.testing.assert_series_equal(
+        serial["sentiment_score"], parallel["sentiment_score"]
+    )
+    assert serial["sentiment_score"].iloc[1] < 0 < serial["sentiment_score"].iloc[0]
+
+
+def test_created_datetime_is_utc_datetime_column():
+    """Test that creation times become whole-second UTC datetimes."""
+    data = pd.DataFrame(
+        {"title": ["a", "b"], "created_utc": [1700000000.9, 1577836800]}
+    )
+
+    result = RedditPostEnricher().run(data)
+
+    assert str(result["created_datetime"].dtype) == "datetime64[ns, UTC]"
+    assert result["created_datetime"].dt.strftime("%Y-%m-%d %H:%M:%S").tolist() == [
+        "2023-11-14 22:13:20",
+        "2020-01-01 00:00:00",
+    ]
+
+
+def test_lazy_enricher_scores_only_selected_rows(mocker):
+    """Test that a lazy enricher scores the requested rows on demand."""
+    score = mocker.patch(
+        "src.sentiment.TextBlobBackend.score",
+        side_effect=lambda texts: np.full(len(texts), 0.5),
+    )
+    data = pd.DataFrame({"body": ["good", "bad", ""], "created_utc": [0, 0, 0]})
+    enricher = RedditCommentEnricher(lazy_sentiment=True)
+
+    enriched = enricher.run(data)
+    enricher.score_missing(enriched, np.array([False, True, True]))
+    enricher.score_missing(enriched, np.array([True, True, True]))
+
+    assert score.call_args_list == [mocker.call(["bad"]), mocker.call(["good"])]
+    assert enriched["sentiment_score"].tolist() == [0.5, 0.5, 0.0]
+    assert enriched["sentiment_score"].dtype == "float32"
@@ -1,6 +1,8 @@
+import prawcore
 import pytest
 from unittest.mock import MagicMock
 from src.data_fetcher import RedditCommentFetcher, RedditPostFetcher
+from src.fetch_state import FetchStateStore
 
 
 @pytest.fixture
@@ -67,3 +69,265 @@ def test_fetch_reddit_comments_valid_input(mock_reddit, comment_fetcher):
     assert len(result) == 2
     assert result[0]["body"] == "Test Comment 1"
     assert result[1]["body"] == "Test Comment 2"
+
+
+def make_submission(post_id, n_comments):
+    """Builds a mock submission with `n_comments` comments."""
+    submission = MagicMock()
+    submission.subreddit.display_name = "subreddit1"
+    submission.comments.list.return_value = [
+        MagicMock(id=f"{post_id}_c{i}", body=f"Comment {i}") for i in range(n_comments)
+    ]
+    return submission
+
+
+def test_fetch_comments_concurrently(mock_reddit):
+    """Test that concurrent fetching returns the comments of every post."""
+    submissions = {f"post_{i}": make_submission(f"post_{i}", i % 3) for i in range(20)}
+    mock_reddit.submission.side_effect = lambda id: submissions[id]
+    fetcher = RedditCommentFetcher(
+        "client_id", "client_secret", "user_agent", 0, list(submissions), max_workers=4
+    )
+
+    result = fetcher.run()
+
+    expected = {c.id for s in submissions.values() for c in s.comments.list()}
+    assert {comment["id"] for comment in result} == expected
+    assert len(result) == len(expected)
+
+
+def test_fetch_comments_retries_transient_errors(mock_reddit, mocker):
+    """Test that a post is fetched again after a server error."""
+    mocker.patch("src.data_fetcher.time.sleep")
+    submission = make_submission("post_1", 2)
+    submission.comments.replace_more.side_effect = [
+        prawcore.exceptions.ServerError(MagicMock(status_code=503)),
+        None,
+    ]
+    mock_reddit.submission.return_value = submission
+    fetcher = RedditCommentFetcher(
+        "client_id", "client_secret", "user_agent", 0, ["post_1"], max_retries=1
+    )
+
+    result = fetcher.run()
+
+    assert [comment["id"] for comment in result] == ["post_1_c0", "post_1_c1"]
+
+
+def test_fetch_comments_skips_post_after_retries(mock_reddit, mocker):
+    """Test that a post is skipped once its retries are exhausted."""
+    mocker.patch("src.data_fetcher.time.sleep")
+    failing = make_submission("post_1", 2)
+    failing.comments.replace_more.side_effect = prawcore.exceptions.ServerError(
+        MagicMock(status_code=503)
+    )
+    submissions = {"post_1": failing, "post_2": make_submission("post_2", 1)}
+    mock_reddit.submission.side_effect = lambda id: submissions[id]
+    fetcher = RedditCommentFetcher(
+        "client_id", "client_secret", "user_agent", 0, ["post_1", "post_2"]
+    )
+
+    result = fetcher.run()
+
+    assert [comment["id"] for comment in result] == ["post_2_c0"]
+    assert failing.comments.replace_more.call_count == 4
+
+
+def test_stream_yields_comments_per_post(mock_reddit):
+    """Test that comments are streamed before all posts are fetched."""
+    submissions = {"post_1": make_submission("post_1", 1)}
+    mock_reddit.submission.side_effect = lambda id: submissions[id]
+    fetcher = RedditCommentFetcher(
+        "client_id", "client_secret", "user_agent", 0, ["post_1", "post_2"]
+    )
+
+    stream = fetcher.stream()
+
+    assert next(stream)["id"] == "post_1_c0"
+    assert mock_reddit.submission.call_count == 1
+
+
+def make_post(post_id):
+    """Builds a mock submission as returned by a subreddit search."""
+    post = MagicMock(id=post_id, title=f"Title {post_id}")
+    post.author.name = "User"
+    return post
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_fetch_posts_merges_duplicate_matches(mock_reddit, max_workers):
+    """Test that a post found by several searches is returned once."""
+    results = {
+        ("sub1", "solar"): ["a", "b"],
+        ("sub1", "wind"): ["b", "c"],
+        ("sub2", "solar"): ["a"],
+        ("sub2", "wind"): [],
+        ("sub3", "city"): ["c"],
+    }
+
+    def subreddit(name):
+        mock_subreddit = MagicMock()
+        mock_subreddit.search.side_effect = lambda keyword, **kwargs: iter(
+            [make_post(post_id) for post_id in results[(name, keyword)]]
+        )
+        return mock_subreddit
+
+    mock_reddit.subreddit.side_effect = subreddit
+    fetcher = RedditPostFetcher(
+        "client_id",
+        "client_secret",
+        "user_agent",
+        {
+            "energy": {"subreddits": ["sub1", "sub2"], "keywords": ["solar", "wind"]},
+            "cities": {"subreddits": ["sub3"], "keywords": ["city"]},
+        },
+        10,
+        "month",
+        "new",
+        max_workers=max_workers,
+    )
+
+    result = fetcher.run()
+
+    assert [post["id"] for post in result] == ["a", "b", "c"]
+    assert result[2]["keyword"] == "wind"
+    assert result[2]["matches"] == [
+        {"category": "energy", "keyword": "wind"},
+        {"category": "cities", "keyword": "city"},
+    ]
+
+
+@pytest.fixture
+def fetch_state(tmp_path):
+    """Fixture to provide an empty fetch state store."""
+    store = FetchStateStore(str(tmp_path / "fetch_state.sqlite"))
+    yield store
+    store.close()
+
+
+def test_incremental_post_fetch_stops_at_known_posts(mock_reddit, fetch_state):
+    """Test that a second run only returns posts newer than the checkpoint."""
+    posts = [make_post(f"post_{i}") for i in (3, 2, 1)]
+    for post, created_utc in zip(posts, (300.0, 200.0, 100.0)):
+        post.created_utc = created_utc
+    mock_subreddit = mock_reddit.subreddit.return_value
+    fetcher = RedditPostFetcher(
+        "client_id",
+        "client_secret",
+        "user_agent",
+        {"category1": {"subreddits": ["subreddit1"], "keywords": ["keyword1"]}},
+        10,
+        "month",
+        "new",
+        fetch_state=fetch_state,
+    )
+
+    mock_subreddit.search.return_value = iter(posts[1:])
+    first = fetcher.run()
+    fetcher.committed(["post_2", "post_1"])
+    mock_subreddit.search.return_value = iter(posts)
+    second = fetcher.run()
+    fetcher.committed(["post_3"])
+
+    assert [post["id"] for post in first] == ["post_2", "post_1"]
+    assert [post["id"] for post in second] == ["post_3"]
+    assert fetch_state.get_search_checkpoint("subreddit1", "keyword1") == (
+        300.0,
+        {"post_1", "post_2", "post_3"},
+    )
+
+
+def test_incremental_comment_fetch_skips_unchanged_posts(mock_reddit, fetch_state):
+    """Test that posts are skipped while their number of comments is unchanged."""
+    submissions = {"post_1": make_submission("post_1", 1)}
+    submissions["post_2"] = make_submission("post_2", 2)
+    mock_reddit.submission.side_effect = lambda id: submissions[id]
+    fetch_state.update_comment_count("post_1", 1)
+    fetch_state.update_comment_count("post_2", 1)
+    fetcher = RedditCommentFetcher(
+        "client_id",
+        "client_secret",
+        "user_agent",
+        0,
+        ["post_1", "post_2"],
+        num_comments={"post_1": 1, "post_2": 2},
+        fetch_state=fetch_state,
+    )
+
+    result = fetcher.run()
+
+    assert [comment["post_id"] for comment in result] == ["post_2", "post_2"]
+    assert fetch_state.get_comment_counts(["post_2"]) == {"post_2": 1}
+    fetcher.committed(["post_2"])
+    assert fetch_state.get_comment_counts(["post_2"]) == {"post_2": 2}
+
+
+def test_checkpointed_comment_fetch_skips_completed_posts(mock_reddit, fetch_state):
+    """Test that stored posts are skipped and counts recorded once stored."""
+    submissions = {f"post_{i}": make_submission(f"post_{i}", 1) for i in (1, 2)}
+    mock_reddit.submission.side_effect = lambda id: submissions[id]
+    fetcher = RedditCommentFetcher(
+        "client_id",
+        "client_secret",
+        "user_agent",
+        0,
+        ["post_1", "post_2"],
+        num_comments={"post_1": 1, "post_2": 1},
+        fetch_state=fetch_state,
+        completed_post_ids={"post_1"},
+    )
+
+    result = fetcher.run()
+
+    assert [comment["post_id"] for comment in result] == ["post_2"]
+    assert fetch_state.get_comment_counts(["post_2"]) == {}
+    fetcher.committed(["post_2"])
+    assert fetch_state.get_comment_counts(["post_2"]) == {"post_2": 1}
+
+
+def test_incremental_search_is_recorded_once_all_posts_are_stored(
+    mock_reddit, fetch_state
+):
+    """Test that posts that were never stored are found again."""
+    posts = [make_post(f"post_{i}") for i in (2, 1)]
+    for post, created_utc in zip(posts, (200.0, 100.0)):
+        post.created_utc = created_utc
+    mock_subreddit = mock_reddit.subreddit.return_value
+    mock_subreddit.search.side_effect = lambda *args, **kwargs: iter(posts)
+    fetcher = RedditPostFetcher(
+        "client_id",
+        "client_secret",
+        "user_agent",
+        {"category1": {"subreddits": ["subreddit1"], "keywords": ["keyword1"]}},
+        10,
+        "month",
+        "new",
+        fetch_state=fetch_state,
+    )
+
+    fetcher.run()
+    fetcher.committed(["post_2"])
+
+    assert fetch_state.get_search_checkpoint("subreddit1", "keyword1") == (
+        None,
+        set(),
+    )
+    assert [post["id"] for post in fetcher.run()] == ["post_2", "post_1"]
+
+
+def test_search_errors_are_raised_when_asked(mock_reddit):
+    """Test that a failed search is raised rather than logged and skipped."""
+    mock_reddit.subreddit.return_value.search.side_effect = RuntimeError("403")
+    fetcher = RedditPostFetcher(
+        "client_id",
+        "client_secret",
+        "user_agent",
+        {"category1": {"subreddits": ["subreddit1"], "keywords": ["keyword1"]}},
+        10,
+        "month",
+        "new",
+        raise_errors=True,
+    )
+
+    with pytest.raises(RuntimeError):
+        fetcher.run()
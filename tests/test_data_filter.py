@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 import pandas as pd
 from src.data_filter import DataFilter, RedditPostFilter, RedditCommentFilter
@@ -126,3 +127,60 @@ def test_is_informative_comment(comment_filter, sample_comment_dataframe):
     """Test if a Reddit comment is considered informative based on body length."""
     assert comment_filter._is_informative(sample_comment_dataframe.iloc[0]) is True
     assert comment_filter._is_informative(sample_comment_dataframe.iloc[1]) is False
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_run_post_filter(vectorized):
+    """Test that both filter paths keep engaging, informative and strong posts."""
+    post_filter = RedditPostFilter(
+        min_upvotes=10,
+        min_comments=5,
+        min_words=5,
+        sentiment_threshold=0.3,
+        vectorized=vectorized,
+    )
+    data = pd.DataFrame(
+        [
+            {"id": "1", "title": "a b", "score": 20, "num_comments": 0},
+            {"id": "2", "title": "a b", "score": 1, "num_comments": 7},
+            {"id": "3", "title": "one two three four five", "score": 1},
+            {"id": "4", "title": "a b", "score": 1, "sentiment_score": -0.5},
+            {"id": "5", "title": "a b", "score": 1, "sentiment_score": 0.1},
+        ]
+    )
+    data["sentiment_score"] = data["sentiment_score"].fillna(0.0)
+    data["num_comments"] = data["num_comments"].fillna(0)
+
+    result = post_filter.run(data)
+
+    assert result["id"].tolist() == ["1", "2", "3", "4"]
+
+
+def test_vectorized_matches_row_wise(sample_comment_dataframe):
+    """Test that the vectorized comment filter matches the row-wise path."""
+    data = pd.concat([sample_comment_dataframe] * 3, ignore_index=True)
+    data.loc[1, "body"] = "  spaced\tout\nwords  across lines  "
+    data.loc[4, "sentiment_score"] = -0.3
+
+    row_wise = RedditCommentFilter(min_words=5, vectorized=False).run(data)
+    vectorized = RedditCommentFilter(min_words=5, vectorized=True).run(data)
+
+    pd.testing.assert_frame_equal(row_wise, vectorized)
+
+
+def test_lazy_sentiment_is_computed_for_undecided_rows(sample_comment_dataframe):
+    """Test that only rows the cheap criteria reject get a sentiment score."""
+    eager = RedditCommentFilter(min_words=5).run(sample_comment_dataframe.copy())
+    data = sample_comment_dataframe.copy()
+    scores = data.pop("sentiment_score").to_numpy()
+    data["sentiment_score"] = np.nan
+    scored = []
+
+    def score(df, rows):
+        scored.extend(df["id"][rows])
+        df.loc[rows, "sentiment_score"] = scores[rows]
+
+    lazy = RedditCommentFilter(min_words=5, sentiment_scorer=score).run(data)
+
+    assert lazy["id"].tolist() == eager["id"].tolist()
+    assert scored == ["2"]
@@ -0,0 +1,237 @@
+import sqlite3
+from contextlib import nullcontext
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+from src.change_detector import ChangeDetector
+from src.connection_pool import ConnectionPool
+from src.database_manager import CommentDataBaseManager, PostDataBaseManager
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Fixture to provide an SQLite database file with the posts table."""
+    path = tmp_path / "reddit_data.sqlite"
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            """
+            CREATE TABLE posts (
+                id TEXT PRIMARY KEY, title TEXT, author TEXT, subreddit TEXT,
+                content TEXT, created_datetime TEXT, score INTEGER,
+                num_comments INTEGER, url TEXT, category TEXT, keyword TEXT,
+                sentiment_score REAL
+            )
+            """
+        )
+    connection.close()
+    return path
+
+
+@pytest.fixture
+def pool(db_path):
+    """Fixture to provide a connection pool on the SQLite database."""
+    pool = ConnectionPool(f"sqlite:///{db_path}", pool_size=2)
+    yield pool
+    pool.close()
+
+
+def mock_pool(connection):
+    """Builds a MySQL pool stub that hands out `connection`."""
+    pool = MagicMock(dialect="mysql", placeholder="%s")
+    pool.connection.side_effect = lambda: nullcontext(connection)
+    return pool
+
+
+def make_posts(ids, score=1, num_comments=0):
+    """Builds enriched post data."""
+    return pd.DataFrame(
+        {
+            "id": ids,
+            "title": [f"title {i}" for i in ids],
+            "author": None,
+            "subreddit": "subreddit1",
+            "content": "",
+            "created_datetime": pd.to_datetime([1700000000] * len(ids), unit="s"),
+            "score": score,
+            "num_comments": num_comments,
+            "url": "https://example.com",
+            "sentiment_score": [0.5] * (len(ids) - 1) + [float("nan")],
+        }
+    )
+
+
+def test_bulk_upsert_inserts_and_updates(pool, db_path):
+    """Test that rows are inserted in batches and re-upserts update scores."""
+    manager = PostDataBaseManager(pool, batch_size=2)
+
+    manager.run(make_posts(["a", "b", "c"]))
+    manager.run(make_posts(["b", "d"], score=7, num_comments=3))
+
+    with sqlite3.connect(db_path) as connection:
+        rows = connection.execute(
+            "SELECT id, score, num_comments, category, sentiment_score, "
+            "created_datetime FROM posts ORDER BY id"
+        ).fetchall()
+    connection.close()
+    assert rows == [
+        ("a", 1, 0, "", 0.5, "2023-11-14 22:13:20"),
+        ("b", 7, 3, "", 0.5, "2023-11-14 22:13:20"),
+        ("c", 1, 0, "", None, "2023-11-14 22:13:20"),
+        ("d", 7, 3, "", None, "2023-11-14 22:13:20"),
+    ]
+
+
+def test_bulk_upsert_commits_per_batch():
+    """Test that every batch is sent as one statement in its own transaction."""
+    connection = MagicMock()
+    manager = PostDataBaseManager(mock_pool(connection), batch_size=2)
+
+    manager.run(make_posts(["a", "b", "c"]))
+
+    queries = [call.args[0] for call in connection.cursor().execute.call_args_list]
+    assert [query.count("(%s,") for query in queries] == [2, 1]
+    assert all("ON DUPLICATE KEY UPDATE score = VALUES(score)" in q for q in queries)
+    assert connection.commit.call_count == 2
+
+
+def test_load_data_infile_stages_batches():
+    """Test that the LOAD DATA path upserts from a staging table."""
+    connection = MagicMock()
+    manager = PostDataBaseManager(mock_pool(connection), load_data_infile=True)
+
+    manager.run(make_posts(["a", "b"]))
+
+    queries = [call.args[0] for call in connection.cursor().execute.call_args_list]
+    assert queries[0].startswith("CREATE TEMPORARY TABLE IF NOT EXISTS posts_staging")
+    assert queries[2].startswith("LOAD DATA LOCAL INFILE %s INTO TABLE posts_staging")
+    assert queries[3].startswith("INSERT INTO posts (id, title")
+    assert connection.commit.call_count == 1
+
+
+def test_load_data_infile_requires_mysql(pool):
+    """Test that the LOAD DATA path is rejected for SQLite connections."""
+    with pytest.raises(ValueError):
+        PostDataBaseManager(pool, load_data_infile=True)
+
+
+def test_failed_batch_is_rolled_back():
+    """Test that a failing batch is rolled back and the error raised."""
+    connection = MagicMock()
+    connection.cursor().execute.side_effect = RuntimeError("connection lost")
+    manager = PostDataBaseManager(mock_pool(connection))
+
+    with pytest.raises(RuntimeError):
+        manager.run(make_posts(["a"]))
+
+    connection.rollback.assert_called_once()
+    connection.commit.assert_not_called()
+
+
+def test_managers_share_the_pool(pool):
+    """Test that post and comment managers check out from one pool."""
+    with sqlite3.connect(pool.engine.url.database) as connection:
+        connection.execute(
+            "CREATE TABLE comments (id TEXT PRIMARY KEY, post_id TEXT, "
+            "author TEXT, subreddit TEXT, body TEXT, score INTEGER, "
+            "created_utc REAL, created_datetime TEXT, sentiment_score REAL)"
+        )
+    connection.close()
+
+    with PostDataBaseManager(pool, batch_size=1) as posts:
+        posts.run(make_posts(["a", "b"]))
+    with CommentDataBaseManager(pool) as comments:
+        comments.run(
+            pd.DataFrame(
+                {
+                    "id": ["c1"],
+                    "post_id": ["a"],
+                    "author": ["user1"],
+                    "subreddit": ["subreddit1"],
+                    "body": ["solar"],
+                    "score": [1],
+                }
+            )
+        )
+
+    metrics = pool.metrics()
+    assert metrics["checkouts"] == 3
+    assert metrics["checked_out"] == 0
+
+
+def test_change_detection_skips_unchanged_rows(pool, mocker):
+    """Test that only new and changed rows are written."""
+    PostDataBaseManager(pool).run(make_posts(["a", "b"]))
+    manager = PostDataBaseManager(pool, change_detector=ChangeDetector())
+    insert = mocker.spy(manager, "_insert_batch")
+
+    # Loaded from the table: "a" is unchanged, "b" changed, "c" is new.
+    data = make_posts(["a", "b", "c"])
+    data.loc[1, "score"] = 9
+    manager.run(data)
+    manager.run(data)
+
+    assert insert.call_count == 1
+    assert insert.call_args.args[1]["id"].tolist() == ["b", "c"]
+
+
+def test_duplicate_ids_are_written_once():
+    """Test that duplicate IDs in the data are sent once, the last one wins."""
+    connection = MagicMock()
+    manager = PostDataBaseManager(mock_pool(connection))
+
+    manager.run(make_posts(["a", "b", "a"], score=[1, 2, 3]))
+
+    query, params = connection.cursor().execute.call_args.args
+    assert query.count("(%s,") == 2
+    assert params[0::12] == ["b", "a"]
+    assert params[6::12] == [2, 3]
+
+
+def test_sentiment_is_scored_for_written_rows_only(pool, db_path):
+    """Test that lazily enriched rows get a score when they are written."""
+    PostDataBaseManager(pool).run(make_posts(["a", "b"]))
+    scored = []
+
+    def score(data, rows):
+        scored.extend(data["id"][rows])
+        data.loc[rows, "sentiment_score"] = -0.5
+
+    manager = PostDataBaseManager(
+        pool, change_detector=ChangeDetector(), sentiment_scorer=score
+    )
+    data = make_posts(["a", "b", "c"], score=[1, 2, 1])
+    data["sentiment_score"] = float("nan")
+    manager.run(data)
+
+    # "a" is unchanged and skipped, "b" changed, "c" is new.
+    assert scored == ["b", "c"]
+    with sqlite3.connect(db_path) as connection:
+        stored = connection.execute(
+            "SELECT id, sentiment_score FROM posts ORDER BY id"
+        ).fetchall()
+    connection.close()
+    assert stored == [("a", 0.5), ("b", None), ("c", -0.5)]
+
+
+def test_changed_rows_missing_from_the_table_are_scored(pool, db_path):
+    """Test that a changed row whose stored row is gone gets a score."""
+
+    def score(data, rows):
+        missing = rows & data["sentiment_score"].isna().to_numpy()
+        data.loc[missing, "sentiment_score"] = -0.5
+
+    manager = PostDataBaseManager(
+        pool, change_detector=ChangeDetector(), sentiment_scorer=score
+    )
+    manager.run(make_posts(["a"]))
+    with sqlite3.connect(db_path) as connection:
+        connection.execute("DELETE FROM posts")
+    connection.close()
+
+    manager.run(make_posts(["a"], score=5))
+
+    with sqlite3.connect(db_path) as connection:
+        stored = connection.execute("SELECT id, sentiment_score FROM posts").fetchall()
+    connection.close()
+    assert stored == [("a", -0.5)]
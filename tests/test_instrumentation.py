@@ -0,0 +1,77 @@
+import json
+import logging
+
+import pandas as pd
+import pytest
+from src.instrumentation import Instrumentation
+
+
+@pytest.fixture
+def data():
+    """Fixture to provide a small frame."""
+    return pd.DataFrame({"id": ["a", "b", "c", "d"], "score": [1, 5, 9, 2]})
+
+
+def keep_high_scores(data):
+    return data[data["score"] > 3]
+
+
+def test_measure_records_rows_and_time(data):
+    """Test that a call is counted with its rows and time."""
+    instrumentation = Instrumentation()
+
+    result = instrumentation.measure("posts", "filter", keep_high_scores, data)
+
+    assert len(result) == 2
+    totals = instrumentation.totals()[("posts", "filter")]
+    assert totals["calls"] == 1
+    assert totals["rows_in"] == 4 and totals["rows_out"] == 2
+    assert totals["wall_seconds"] > 0
+
+
+def test_measure_traces_memory(data):
+    """Test that the peak memory of a stage is recorded when tracing."""
+    instrumentation = Instrumentation(trace_memory=True)
+
+    instrumentation.measure("posts", "grow", lambda d: [0] * 100_000, data)
+
+    assert instrumentation.totals()[("posts", "grow")]["peak_memory_bytes"] > 800_000
+
+
+def test_measure_logs_structured_record(data, caplog):
+    """Test that every call is logged with its metrics attached."""
+    with caplog.at_level(logging.INFO, logger="EcoPulse"):
+        Instrumentation().measure("posts", "filter", keep_high_scores, data)
+
+    (record,) = [r for r in caplog.records if hasattr(r, "stage_metrics")]
+    assert record.stage_metrics["stage"] == "filter"
+    assert record.stage_metrics["rows_out"] == 2
+
+
+def test_failed_stage_is_recorded_and_raised(data, tmp_path):
+    """Test that an error is counted, exported as a span and re-raised."""
+    spans_path = tmp_path / "spans.jsonl"
+    instrumentation = Instrumentation(spans_path=str(spans_path))
+
+    with pytest.raises(ZeroDivisionError):
+        instrumentation.measure("posts", "enrich", lambda d: 1 / 0, data)
+
+    (span,) = [json.loads(line) for line in spans_path.read_text().splitlines()]
+    assert span["name"] == "posts.enrich"
+    assert span["status"]["code"] == "ERROR"
+    assert span["end_time_unix_nano"] >= span["start_time_unix_nano"]
+    assert instrumentation.totals()[("posts", "enrich")]["errors"] == 1
+
+
+def test_prometheus_file_has_totals(data, tmp_path):
+    """Test that the Prometheus file holds the totals of every stage."""
+    path = tmp_path / "ecopulse.prom"
+    instrumentation = Instrumentation(prometheus_path=str(path))
+
+    instrumentation.measure("posts", "filter", keep_high_scores, data)
+    instrumentation.measure("posts", "filter", keep_high_scores, data)
+
+    text = path.read_text()
+    assert "# TYPE ecopulse_stage_calls_total counter" in text
+    assert 'ecopulse_stage_calls_total{pipeline="posts",stage="filter"} 2' in text
+    assert 'ecopulse_stage_rows_in_total{pipeline="posts",stage="filter"} 8' in text
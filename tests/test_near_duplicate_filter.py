@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+from src.near_duplicate_filter import NearDuplicateFilter
+
+SPAM = "buy cheap solar panels now at our store, best prices guaranteed"
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    """Fixture to provide the path of the near-duplicate state."""
+    return str(tmp_path / "near_duplicates.sqlite")
+
+
+@pytest.fixture
+def comments():
+    """Fixture to provide cleaned comments with near-duplicate spam."""
+    return pd.DataFrame(
+        {
+            "id": ["c1", "c2", "c3", "c4", "c5"],
+            "body": [
+                SPAM,
+                SPAM + "!",
+                "wind turbines are getting bigger every single year",
+                SPAM.replace("now ", ""),
+                "thanks",
+            ],
+        }
+    )
+
+
+def test_near_duplicates_collapse_to_first_row(comments):
+    """Test that near-duplicates are dropped and counted on the first row."""
+    deduplicator = NearDuplicateFilter("body", ":memory:")
+
+    result = deduplicator.run(comments)
+
+    assert result["id"].tolist() == ["c1", "c3", "c5"]
+    assert result["duplicate_count"].tolist() == [2, 0, 0]
+    assert deduplicator.duplicate_counts() == {"c1": 2}
+
+
+def test_input_frame_is_not_modified(comments):
+    """Test that the counts are added to a new frame only."""
+    NearDuplicateFilter("body", ":memory:").run(comments.iloc[[0, 2]])
+
+    assert "duplicate_count" not in comments
+
+
+def test_short_texts_are_never_duplicates():
+    """Test that repeated short replies all pass."""
+    replies = pd.DataFrame({"id": ["a", "b", "c"], "body": ["thank you"] * 3})
+
+    result = NearDuplicateFilter("body", ":memory:").run(replies)
+
+    assert result["id"].tolist() == ["a", "b", "c"]
+
+
+def test_state_persists_across_runs(comments, state_path):
+    """Test that duplicates of rows from a previous run are found."""
+    NearDuplicateFilter("body", state_path).run(comments.iloc[[0]])
+    deduplicator = NearDuplicateFilter("body", state_path)
+
+    result = deduplicator.run(comments.iloc[[1, 2]])
+
+    assert result["id"].tolist() == ["c3"]
+    assert deduplicator.duplicate_counts() == {"c1": 1}
+
+
+def test_refetched_rows_are_not_duplicates_of_themselves(comments, state_path):
+    """Test that fetching the same rows again neither drops nor recounts."""
+    NearDuplicateFilter("body", state_path).run(comments)
+    deduplicator = NearDuplicateFilter("body", state_path)
+
+    result = deduplicator.run(comments)
+
+    assert result["id"].tolist() == ["c1", "c3", "c5"]
+    assert result["duplicate_count"].tolist() == [2, 0, 0]
+    assert deduplicator.duplicate_counts() == {"c1": 2}
+
+
+def test_state_with_other_settings_is_rejected(state_path):
+    """Test that signatures of different settings are never compared."""
+    NearDuplicateFilter("body", state_path, num_perm=64, bands=8)
+
+    with pytest.raises(ValueError):
+        NearDuplicateFilter("body", state_path)
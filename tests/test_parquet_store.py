@@ -0,0 +1,64 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.parquet_store import ParquetStore  # noqa: E402
+
+
+def make_posts(ids, created_utc, category="energy"):
+    """Builds post records."""
+    return pd.DataFrame(
+        {
+            "id": ids,
+            "title": [f"title {i}" for i in ids],
+            "author": None,
+            "subreddit": "solar",
+            "category": category,
+            "score": range(len(ids)),
+            "created_utc": created_utc,
+        }
+    )
+
+
+def test_write_partitions_by_date_subreddit_and_category(tmp_path):
+    """Test that records land in Hive-style partitions."""
+    store = ParquetStore(str(tmp_path))
+
+    store.write("raw", make_posts(["a", "b"], [1700000000, 1700100000]))
+
+    assert os.path.isdir(
+        tmp_path / "raw" / "date=2023-11-14" / "subreddit=solar" / "category=energy"
+    )
+    assert os.path.isdir(tmp_path / "raw" / "date=2023-11-16")
+
+
+def test_read_round_trip_with_date_filter_and_batches(tmp_path):
+    """Test that records read back in batches and filtered by date."""
+    store = ParquetStore(str(tmp_path))
+    store.write("cleaned", make_posts(["a", "b"], [1700000000, 1700100000]))
+    store.write(
+        "cleaned", make_posts(["c", "d", "e"], [1700000000] * 3, category="climate")
+    )
+
+    batches = list(store.read("cleaned", batch_size=2, start_date="2023-11-14"))
+    only_first_day = pd.concat(store.read("cleaned", end_date="2023-11-14"))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    records = pd.concat(batches).sort_values("id")
+    assert records["id"].tolist() == ["a", "b", "c", "d", "e"]
+    assert records["category"].tolist() == ["energy"] * 2 + ["climate"] * 3
+    assert sorted(only_first_day["id"]) == ["a", "c", "d", "e"]
+
+
+def test_read_missing_stage_yields_nothing(tmp_path):
+    """Test that a stage that was never written reads as empty."""
+    assert list(ParquetStore(str(tmp_path)).read("enriched")) == []
+
+
+def test_write_rejects_unknown_stage(tmp_path):
+    """Test that only the known stages can be written."""
+    with pytest.raises(ValueError):
+        ParquetStore(str(tmp_path)).write("filtered", make_posts(["a"], [0]))
@@ -0,0 +1,87 @@
+import pytest
+from src.data_cleaner import RedditCommentCleaner
+from src.data_enricher import RedditCommentEnricher
+from src.data_filter import RedditCommentFilter
+from src.pipeline_graph import (
+    DEFAULT_DEFINITION,
+    SOURCE,
+    Node,
+    PipelineGraph,
+    config_hash,
+)
+
+
+@pytest.fixture
+def processors():
+    """Fixture to provide the processors of a comment pipeline."""
+    return {
+        "cleaner": RedditCommentCleaner(),
+        "deduplicator": None,
+        "enricher": RedditCommentEnricher(),
+        "filter": RedditCommentFilter(),
+    }
+
+
+def test_disabled_processor_passes_its_input_through(processors):
+    """Test that a node without a processor is left out of the graph."""
+    graph = PipelineGraph.from_definition(DEFAULT_DEFINITION, processors)
+
+    assert [(node.name, node.input) for node in graph.nodes] == [
+        ("clean", SOURCE),
+        ("enrich", "clean"),
+        ("filter", "enrich"),
+    ]
+    assert (graph.store, graph.output) == ("enrich", "filter")
+
+
+def test_nodes_can_branch(processors):
+    """Test that several nodes can read the output of the same node."""
+    definition = {
+        "nodes": [
+            {"name": "clean", "processor": "cleaner"},
+            {"name": "enrich", "processor": "enricher"},
+            {"name": "strict", "processor": "strict"},
+            {"name": "filter", "processor": "filter", "input": "enrich"},
+        ],
+        "store": "enrich",
+        "output": "filter",
+    }
+    processors["strict"] = RedditCommentFilter(min_upvotes=100)
+
+    graph = PipelineGraph.from_definition(definition, processors)
+
+    assert [node.input for node in graph.nodes] == [SOURCE, "clean", "enrich", "enrich"]
+
+
+def test_input_must_be_defined_before(processors):
+    """Test that a node reading a later node is rejected."""
+    with pytest.raises(ValueError):
+        PipelineGraph(
+            [
+                Node("clean", processors["cleaner"], input="enrich"),
+                Node("enrich", processors["enricher"], input="clean"),
+            ],
+            store="enrich",
+            output="enrich",
+        )
+
+
+def test_unknown_processor_is_rejected(processors):
+    """Test that a node naming an unknown processor is rejected."""
+    definition = {
+        "nodes": [{"name": "clean", "processor": "scrubber"}],
+        "store": "clean",
+        "output": "clean",
+    }
+
+    with pytest.raises(ValueError):
+        PipelineGraph.from_definition(definition, processors)
+
+
+def test_config_hash_follows_the_settings():
+    """Test that only a change of the settings changes the hash."""
+    assert config_hash(RedditCommentFilter()) == config_hash(RedditCommentFilter())
+    assert config_hash(RedditCommentFilter()) != config_hash(
+        RedditCommentFilter(min_upvotes=5)
+    )
+    assert config_hash(RedditCommentFilter()) != config_hash(RedditCommentCleaner())
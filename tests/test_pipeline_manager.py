@@ -0,0 +1,387 @@
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+from src.data_cleaner import RedditCommentCleaner, RedditPostCleaner
+from src.data_enricher import RedditCommentEnricher, RedditPostEnricher
+from src.data_filter import RedditCommentFilter, RedditPostFilter
+from src.checkpoint_store import CheckpointStore
+from src.data_fetcher import RedditPostFetcher
+from src.fetch_state import FetchStateStore
+from src.instrumentation import Instrumentation
+from src.near_duplicate_filter import NearDuplicateFilter
+from src.pipeline_manager import PipelineManager
+from src.stage_cache import StageCache
+
+
+@pytest.fixture
+def comments():
+    """Fixture to provide fetched comment records."""
+    return [
+        {
+            "id": f"c{i}",
+            "post_id": "p1",
+            "author": "User",
+            "subreddit": "subreddit1",
+            "body": "[deleted]" if i % 4 == 0 else f"Comment number {i}",
+            "score": i,
+            "created_utc": 1700000000 + i,
+        }
+        for i in range(10)
+    ]
+
+
+def make_pipeline(comments, chunk_size=None, pipelined=False, min_upvotes=5, **kwargs):
+    """Builds a comment pipeline around a stub fetcher and DB manager."""
+    fetcher = MagicMock()
+    fetcher.stream.side_effect = lambda: iter(comments)
+    return PipelineManager(
+        fetcher=fetcher,
+        cleaner=RedditCommentCleaner(),
+        enricher=RedditCommentEnricher(),
+        filter=RedditCommentFilter(min_upvotes=min_upvotes, min_words=50),
+        db_manager=MagicMock(),
+        chunk_size=chunk_size,
+        pipelined=pipelined,
+        **kwargs,
+    )
+
+
+def test_chunked_run_matches_single_batch(comments):
+    """Test that processing in chunks yields the same filtered records."""
+    expected = make_pipeline(comments).run()
+    pipeline = make_pipeline(comments, chunk_size=3)
+
+    result = pipeline.run()
+
+    pd.testing.assert_frame_equal(result, expected)
+    stored = [call.args[0] for call in pipeline._db_manager.run.call_args_list]
+    assert [len(chunk) for chunk in stored] == [2, 2, 2, 1]
+
+
+def test_stream_processes_chunks_lazily(comments):
+    """Test that a chunk is stored before the next one is fetched."""
+    pipeline = make_pipeline(comments, chunk_size=4)
+
+    next(pipeline.stream())
+
+    assert pipeline._db_manager.run.call_count == 1
+
+
+def test_run_without_data_returns_empty_frame():
+    """Test that an empty fetch does not reach the other stages."""
+    pipeline = make_pipeline([], chunk_size=4)
+
+    assert pipeline.run().empty
+    pipeline._db_manager.run.assert_not_called()
+
+
+def test_pipelined_run_stores_every_chunk(comments):
+    """Test that the pipelined mode processes and stores all chunks."""
+    expected = make_pipeline(comments).run()
+    pipeline = make_pipeline(comments, chunk_size=3, pipelined=True)
+
+    result = pipeline.run().sort_index()
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert pipeline._db_manager.run.call_count == 4
+
+
+def test_replay_from_landing_zone(comments, tmp_path):
+    """Test that replaying the landed raw records gives the fetched result."""
+    pytest.importorskip("pyarrow")
+    from src.parquet_store import ParquetStore
+
+    store = ParquetStore(str(tmp_path))
+    expected = make_pipeline(comments, chunk_size=4, landing_zone=store).run()
+
+    replay = make_pipeline([], chunk_size=4, landing_zone=store, replay_from="raw")
+    result = replay.run().sort_values("id")
+
+    replay._fetcher.stream.assert_not_called()
+    pd.testing.assert_frame_equal(
+        result.reset_index(drop=True)[expected.columns],
+        expected.sort_values("id").reset_index(drop=True),
+        check_dtype=False,
+    )
+    # Replayed records are not landed a second time.
+    assert sum(len(chunk) for chunk in store.read("raw")) == len(comments)
+
+
+def test_replay_requires_landing_zone(comments):
+    """Test that replaying without a landing zone is rejected."""
+    with pytest.raises(ValueError):
+        make_pipeline(comments, replay_from="raw")
+
+
+def test_instrumented_run_measures_every_stage(comments):
+    """Test that every stage of every chunk is measured."""
+    instrumentation = Instrumentation()
+    make_pipeline(
+        comments, chunk_size=4, instrumentation=instrumentation, name="comments"
+    ).run()
+
+    totals = instrumentation.totals()
+    assert {stage for _, stage in totals} == {
+        "fetch",
+        "clean",
+        "enrich",
+        "filter",
+        "store",
+    }
+    assert totals[("comments", "fetch")]["rows_out"] == len(comments)
+    assert totals[("comments", "clean")]["calls"] == 3
+
+
+def test_near_duplicates_are_dropped_before_enriching(comments, mocker):
+    """Test that the enricher and the DB only see canonical comments."""
+    for comment in comments:
+        comment["body"] = "Buy cheap solar panels at our store, best prices!"
+    comments[5]["body"] = "Wind turbines are getting bigger every single year."
+    pipeline = make_pipeline(
+        comments, deduplicator=NearDuplicateFilter("body", ":memory:")
+    )
+    enrich = mocker.spy(pipeline._enricher, "run")
+
+    pipeline.run()
+
+    assert enrich.call_args.args[0]["id"].tolist() == ["c0", "c5"]
+    stored = pipeline._db_manager.run.call_args.args[0]
+    assert stored["duplicate_count"].tolist() == [8, 0]
+
+
+def test_stage_cache_reruns_only_changed_stages(comments, tmp_path, mocker):
+    """Test that changing the filter reruns the filter and nothing before."""
+    stage_cache = StageCache(str(tmp_path))
+    make_pipeline(comments, stage_cache=stage_cache).run()
+    pipeline = make_pipeline(comments, stage_cache=stage_cache, min_upvotes=8)
+    clean = mocker.spy(pipeline._cleaner, "run")
+    enrich = mocker.spy(pipeline._enricher, "run")
+    filter_ = mocker.spy(pipeline._filter, "run")
+
+    result = pipeline.run()
+
+    assert (clean.call_count, enrich.call_count, filter_.call_count) == (0, 0, 1)
+    assert result["id"].tolist() == ["c9"]
+    stored = pipeline._db_manager.run.call_args.args[0]
+    assert stored["id"].tolist() == ["c1", "c2", "c3", "c5", "c6", "c7", "c9"]
+
+
+def test_checkpoint_completes_keys_once_committed(comments, tmp_path):
+    """Test that a post is checkpointed once its last comment is stored."""
+    for comment, post_id in zip(comments, "0001122223"):
+        comment["post_id"] = f"p{post_id}"
+    checkpoint = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    pipeline = make_pipeline(
+        comments,
+        chunk_size=4,
+        checkpoint=checkpoint,
+        checkpoint_key="post_id",
+        name="comments",
+    )
+
+    pipeline.run()
+
+    committed = [call.args[0] for call in pipeline._fetcher.committed.call_args_list]
+    assert committed == [["p0"], ["p1"], ["p2"], ["p3"]]
+    assert checkpoint.committed_batches("comments") == {0, 1, 2}
+    assert checkpoint.completed_keys("comments") == {"p0", "p1", "p2", "p3"}
+    assert checkpoint.pipeline_finished("comments")
+
+
+def test_checkpointed_store_error_stops_the_run(comments, tmp_path):
+    """Test that a failed batch is raised and left for the resumed run."""
+    checkpoint = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    pipeline = make_pipeline(
+        comments, chunk_size=4, checkpoint=checkpoint, name="comments"
+    )
+    pipeline._db_manager.run.side_effect = [None, RuntimeError("connection lost")]
+
+    with pytest.raises(RuntimeError):
+        pipeline.run()
+
+    assert checkpoint.committed_batches("comments") == {0}
+    assert not checkpoint.pipeline_finished("comments")
+    resumed = CheckpointStore(str(tmp_path / "checkpoints.sqlite"), resume=True)
+    assert resumed.next_batch("comments") == 1
+
+
+@pytest.fixture
+def posts():
+    """Fixture to provide fetched post records with their matches."""
+    return [
+        {
+            "id": f"p{i}",
+            "title": f"Solar panels are spreading fast in town number {i}",
+            "author": "User",
+            "subreddit": "subreddit1",
+            "content": "",
+            "created_utc": 1700000000 + i,
+            "score": 10 * i,
+            "url": "https://example.com",
+            "num_comments": i,
+            "category": "energy",
+            "keyword": "solar",
+            "matches": [{"category": "energy", "keyword": "solar"}],
+        }
+        for i in range(2)
+    ]
+
+
+def make_post_pipeline(posts, **kwargs):
+    """Builds a post pipeline around a mocked fetcher and DB manager."""
+    fetcher = MagicMock()
+    fetcher.stream.side_effect = lambda: iter(posts)
+    return PipelineManager(
+        fetcher=fetcher,
+        cleaner=RedditPostCleaner(),
+        enricher=RedditPostEnricher(),
+        filter=RedditPostFilter(min_upvotes=5, min_words=3),
+        db_manager=MagicMock(),
+        **kwargs,
+    )
+
+
+def test_stage_cache_fingerprints_post_matches(posts, tmp_path, mocker):
+    """Test that post records with their list of matches are cached."""
+    stage_cache = StageCache(str(tmp_path))
+
+    expected = make_post_pipeline(posts, stage_cache=stage_cache).run()
+    pipeline = make_post_pipeline(posts, stage_cache=stage_cache)
+    clean = mocker.spy(pipeline._cleaner, "run")
+
+    result = pipeline.run()
+
+    assert clean.call_count == 0
+    pd.testing.assert_frame_equal(result, expected)
+    assert result["matches"].iloc[0] == [{"category": "energy", "keyword": "solar"}]
+
+
+def test_stage_cache_on_posts_replayed_from_landing_zone(posts, tmp_path):
+    """Test that replayed posts, whose matches are arrays, hit the cache."""
+    pytest.importorskip("pyarrow")
+    from src.parquet_store import ParquetStore
+
+    store = ParquetStore(str(tmp_path / "landing"))
+    store.write("raw", pd.DataFrame(posts))
+    stage_cache = StageCache(str(tmp_path / "cache"))
+
+    def replay():
+        return make_post_pipeline(
+            [], landing_zone=store, replay_from="raw", stage_cache=stage_cache
+        ).run()
+
+    expected = replay()
+    hits = stage_cache.hits
+    result = replay()
+
+    assert hits == 0
+    assert stage_cache.hits == 3
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_stage_cache_hits_are_landed(comments, tmp_path):
+    """Test that stages read from the stage cache still reach the landing zone."""
+    pytest.importorskip("pyarrow")
+    from src.parquet_store import ParquetStore
+
+    stage_cache = StageCache(str(tmp_path / "cache"))
+    make_pipeline(comments, stage_cache=stage_cache).run()
+    store = ParquetStore(str(tmp_path / "landing"))
+
+    make_pipeline(comments, stage_cache=stage_cache, landing_zone=store).run()
+
+    assert stage_cache.hits == 3
+    for stage in ("cleaned", "enriched"):
+        assert sum(len(chunk) for chunk in store.read(stage)) == 7
+
+
+def test_keys_of_failed_batches_are_not_committed(comments):
+    """Test that a logged store error keeps its posts out of `committed`."""
+    for comment, post_id in zip(comments, "0001122223"):
+        comment["post_id"] = f"p{post_id}"
+    pipeline = make_pipeline(comments, chunk_size=4, checkpoint_key="post_id")
+    pipeline._db_manager.run.side_effect = [None, RuntimeError("lost"), None]
+
+    pipeline.run()
+
+    committed = [call.args[0] for call in pipeline._fetcher.committed.call_args_list]
+    assert committed == [["p0"], ["p3"]]
+
+
+def make_submission(post_id, created_utc):
+    """Builds a mock submission as returned by a subreddit search."""
+    submission = MagicMock(
+        id=post_id,
+        title=f"Solar panels keep getting cheaper, post {post_id}",
+        selftext="",
+        created_utc=created_utc,
+        score=10,
+        url="https://example.com",
+        num_comments=int(created_utc) % 7,
+    )
+    submission.author.name = "User"
+    submission.subreddit.display_name = "subreddit1"
+    return submission
+
+
+def test_resume_after_crash_in_post_pipeline(tmp_path, mocker):
+    """Test that posts fetched but not stored before a crash are recovered."""
+    mock_reddit = mocker.patch("src.data_fetcher.praw.Reddit").return_value
+    submissions = [make_submission(f"p{i}", 1700000000 - i) for i in range(6)]
+    mock_reddit.subreddit.return_value.search.side_effect = lambda *a, **k: iter(
+        submissions
+    )
+    fetch_state = FetchStateStore(str(tmp_path / "fetch_state.sqlite"))
+    path = str(tmp_path / "checkpoints.sqlite")
+
+    def make_post_pipeline(checkpoint, db_manager):
+        fetcher = RedditPostFetcher(
+            "client_id",
+            "client_secret",
+            "user_agent",
+            {"energy": {"subreddits": ["subreddit1"], "keywords": ["solar"]}},
+            10,
+            "month",
+            "new",
+            fetch_state=fetch_state,
+            completed_post_ids=checkpoint.completed_keys("posts"),
+        )
+        return PipelineManager(
+            fetcher=fetcher,
+            cleaner=RedditPostCleaner(),
+            enricher=RedditPostEnricher(),
+            filter=RedditPostFilter(min_upvotes=5, min_words=3),
+            db_manager=db_manager,
+            chunk_size=2,
+            name="posts",
+            checkpoint=checkpoint,
+            checkpoint_key="id",
+            checkpoint_output="num_comments",
+        )
+
+    crashed = MagicMock()
+    crashed.run.side_effect = [None, RuntimeError("connection lost")]
+    with pytest.raises(RuntimeError):
+        make_post_pipeline(CheckpointStore(path), crashed).run()
+
+    # The search is not recorded, the incremental run finds its posts again.
+    assert fetch_state.get_search_checkpoint("subreddit1", "solar") == (None, set())
+    checkpoint = CheckpointStore(path, resume=True)
+    resumed = make_post_pipeline(checkpoint, MagicMock())
+    resumed.run()
+
+    # p1 was the last key of the committed batch, so it was still pending.
+    stored = resumed._db_manager.run.call_args_list
+    assert [list(call.args[0]["id"]) for call in stored] == [
+        ["p1", "p2"],
+        ["p3", "p4"],
+        ["p5"],
+    ]
+    assert checkpoint.outputs("posts") == {
+        submission.id: submission.num_comments for submission in submissions
+    }
+    assert checkpoint.pipeline_finished("posts")
+    newest, seen = fetch_state.get_search_checkpoint("subreddit1", "solar")
+    assert newest == 1700000000
+    assert seen == {submission.id for submission in submissions}
@@ -0,0 +1,41 @@
+import asyncio
+
+from src.rate_limiter import TokenBucket
+
+
+def test_burst_within_capacity_does_not_wait():
+    """Test that requests up to the bucket capacity go out immediately."""
+    bucket = TokenBucket(requests_per_minute=600, capacity=5)
+
+    assert sum(bucket.acquire() for _ in range(5)) == 0
+
+
+def test_acquire_waits_for_refill():
+    """Test that an empty bucket waits for the tokens to refill."""
+    bucket = TokenBucket(requests_per_minute=1200, capacity=1)
+    bucket.acquire()
+
+    waited = bucket.acquire()
+
+    assert 0 < waited <= 0.05
+
+
+def test_acquire_async_waits_without_blocking_the_loop():
+    """Test that an async wait for tokens lets other tasks run."""
+    bucket = TokenBucket(requests_per_minute=1200, capacity=1)
+    bucket.acquire()
+    ticks = []
+
+    async def tick():
+        for _ in range(3):
+            ticks.append(1)
+            await asyncio.sleep(0)
+
+    async def acquire():
+        waited, _ = await asyncio.gather(bucket.acquire_async(), tick())
+        return waited
+
+    waited = asyncio.run(acquire())
+
+    assert 0 < waited <= 0.05
+    assert len(ticks) == 3
@@ -0,0 +1,93 @@
+import sqlite3
+
+import pytest
+from src.connection_pool import ConnectionPool
+from src.data_cleaner import RedditPostCleaner
+from src.data_enricher import RedditPostEnricher
+from src.data_filter import RedditPostFilter
+from src.database_manager import PostDataBaseManager
+from src.pipeline_manager import PipelineManager
+from src.replay_fetcher import (
+    ReplayFetcher,
+    TextDistribution,
+    synthetic_comments,
+    synthetic_posts,
+    write_jsonl,
+)
+
+
+@pytest.fixture
+def posts_path(tmp_path):
+    """Fixture to provide a JSONL file of five synthetic posts."""
+    path = str(tmp_path / "posts.jsonl")
+    write_jsonl(synthetic_posts(5), path)
+    return path
+
+
+def test_synthetic_data_is_deterministic():
+    """Test that the same seed generates the same records."""
+    assert list(synthetic_comments(20, seed=3)) == list(synthetic_comments(20, seed=3))
+    assert list(synthetic_posts(20, seed=3)) != list(synthetic_posts(20, seed=4))
+
+
+def test_text_distribution_controls_length():
+    """Test that the mean number of words follows the distribution."""
+    distribution = TextDistribution(mean_words=50, sigma=0.1, deleted_ratio=0)
+    lengths = [len(c["body"].split()) for c in synthetic_comments(200, distribution)]
+
+    assert 40 < sum(lengths) / len(lengths) < 60
+
+
+def test_replay_returns_recorded_records(posts_path):
+    """Test that the file is replayed once without a size."""
+    records = ReplayFetcher(posts_path).run()
+
+    assert records == list(synthetic_posts(5))
+
+
+def test_replay_creates_no_reddit_client(posts_path, mocker):
+    """Test that replaying never creates a PRAW client."""
+    reddit = mocker.patch("src.data_fetcher.praw.Reddit")
+
+    records = ReplayFetcher(posts_path).run()
+
+    assert len(records) == 5
+    reddit.assert_not_called()
+
+
+def test_replay_repeats_file_with_unique_ids(posts_path):
+    """Test that a size beyond the file repeats it with suffixed IDs."""
+    records = ReplayFetcher(posts_path, size=12).run()
+
+    ids = [record["id"] for record in records]
+    assert len(ids) == len(set(ids)) == 12
+    assert ids[5] == "p0-1" and ids[10] == "p0-2"
+
+
+def test_pipeline_runs_offline_on_sqlite(posts_path, tmp_path):
+    """Test that the pipeline runs end to end without Reddit and MySQL."""
+    db_path = tmp_path / "reddit_data.sqlite"
+    with sqlite3.connect(db_path) as connection:
+        connection.execute(
+            "CREATE TABLE posts (id TEXT PRIMARY KEY, title TEXT, author TEXT, "
+            "subreddit TEXT, content TEXT, created_datetime TEXT, score INTEGER, "
+            "num_comments INTEGER, url TEXT, category TEXT, keyword TEXT, "
+            "sentiment_score REAL)"
+        )
+    connection.close()
+
+    with ConnectionPool(f"sqlite:///{db_path}") as pool:
+        PipelineManager(
+            fetcher=ReplayFetcher(posts_path, size=40),
+            cleaner=RedditPostCleaner(),
+            enricher=RedditPostEnricher(),
+            filter=RedditPostFilter(),
+            db_manager=PostDataBaseManager(pool),
+            chunk_size=16,
+        ).run()
+
+    with sqlite3.connect(db_path) as connection:
+        (stored,) = connection.execute("SELECT COUNT(*) FROM posts").fetchone()
+    connection.close()
+    deleted = sum(post["title"] == "[deleted]" for post in synthetic_posts(5))
+    assert stored == 40 - 8 * deleted
@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+from src.data_cleaner import RedditCommentCleaner
+from src.data_enricher import RedditCommentEnricher
+from src.data_filter import RedditCommentFilter
+from src.schema import COMMENT_SCHEMA, apply_schema, concat, fill_missing
+
+
+@pytest.fixture
+def comments():
+    """Fixture to provide fetched comments as pandas infers them."""
+    return pd.DataFrame(
+        {
+            "id": ["c1", "c2", "c3"],
+            "post_id": ["p1", "p1", "p2"],
+            "author": ["user1", None, "user1"],
+            "subreddit": ["climate", "climate", "climate"],
+            "body": ["Solar is great!", "[deleted]", "Wind is bad"],
+            "score": [3, 12, 7],
+            "created_utc": [1700000000.0, 1700000001.0, 1700000002.5],
+        }
+    )
+
+
+def test_apply_schema_converts_columns(comments):
+    """Test that columns get compact dtypes and timestamps whole seconds."""
+    data = apply_schema(comments, COMMENT_SCHEMA)
+
+    assert isinstance(data["author"].dtype, pd.CategoricalDtype)
+    assert isinstance(data["body"].dtype, pd.StringDtype)
+    assert data["score"].dtype == "int32"
+    assert data["created_utc"].tolist() == [1700000000, 1700000001, 1700000002]
+    assert data.memory_usage(deep=True).sum() < comments.memory_usage(deep=True).sum()
+
+
+def test_missing_integers_become_nullable(comments):
+    """Test that an integer column with gaps keeps them as missing values."""
+    comments.loc[1, "score"] = None
+
+    data = apply_schema(comments, COMMENT_SCHEMA)
+
+    assert data["score"].dtype == "Int32"
+    assert fill_missing(data["score"], 0).dtype == "int32"
+
+
+def test_fill_missing_adds_category():
+    """Test that a fill value becomes a category of a categorical column."""
+    authors = pd.Series(["user1", None], dtype="category")
+
+    assert fill_missing(authors, "Anonymous").tolist() == ["user1", "Anonymous"]
+
+
+def test_schema_survives_the_stages(comments):
+    """Test that cleaning, enriching and filtering keep the compact dtypes."""
+    data = apply_schema(comments, COMMENT_SCHEMA)
+
+    data = RedditCommentCleaner().run(data)
+    data = RedditCommentEnricher().run(data)
+    data = RedditCommentFilter(min_upvotes=5).run(data)
+
+    assert data["id"].tolist() == ["c1", "c3"]
+    assert isinstance(data["author"].dtype, pd.CategoricalDtype)
+    assert isinstance(data["body"].dtype, pd.StringDtype)
+    assert data["score"].dtype == "int32"
+    assert data["sentiment_score"].dtype == "float32"
+
+
+def test_concat_keeps_categoricals():
+    """Test that frames with different categories concatenate as categorical."""
+    first = pd.DataFrame({"subreddit": pd.Series(["climate"], dtype="category")})
+    second = pd.DataFrame({"subreddit": pd.Series(["energy"], dtype="category")})
+
+    result = concat([first, second])
+
+    assert isinstance(result["subreddit"].dtype, pd.CategoricalDtype)
+    assert result["subreddit"].tolist() == ["climate", "energy"]
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_enricher import RedditCommentEnricher
+from src.sentiment import LexiconBackend, TextBlobBackend, create_backend
+from src.sentiment_cache import SentimentCache
+
+
+@pytest.fixture(scope="module")
+def lexicon():
+    """Fixture to provide the lexicon backend built from TextBlob's lexicon."""
+    return LexiconBackend.from_textblob()
+
+
+def test_lexicon_matches_textblob_on_simple_texts(lexicon):
+    """Test that plain, negated and intensified words score like TextBlob."""
+    texts = ["this is very good", "this is not good", "terrible", "the weather"]
+
+    np.testing.assert_allclose(
+        lexicon.score(texts), TextBlobBackend().score(texts), atol=1e-9
+    )
+
+
+def test_modifiers_stay_within_a_text(lexicon):
+    """Test that a negation ending one text does not flip the next one."""
+    together = lexicon.score(["bad not", "good"])
+
+    np.testing.assert_allclose(together, [-0.7, 0.7])
+
+
+def test_lexicon_scores_empty_batch(lexicon):
+    """Test that an empty batch returns an empty array."""
+    assert lexicon.score([]).shape == (0,)
+
+
+def test_vader_lexicon(tmp_path):
+    """Test that VADER valences are scaled to [-1, 1] and averaged."""
+    path = tmp_path / "vader_lexicon.txt"
+    path.write_text("good\t2.0\t0.5\t[2, 2]\nawful\t-4.0\t0.1\t[-4, -4]\n")
+    backend = create_backend("lexicon", str(path))
+
+    np.testing.assert_allclose(
+        backend.score(["good", "good awful", "not good", "nothing"]),
+        [0.5, -0.25, -0.25, 0.0],
+    )
+    assert backend.name == "lexicon-vader"
+
+
+def test_enricher_uses_configured_backend(lexicon):
+    """Test that the enricher scores with the backend it is given."""
+    data = pd.DataFrame({"body": ["very good", "", "bad"], "created_utc": [0, 0, 0]})
+
+    enriched = RedditCommentEnricher(sentiment_backend=lexicon).run(data)
+
+    np.testing.assert_allclose(enriched["sentiment_score"], [0.91, 0.0, -0.7])
+
+
+def test_enricher_rejects_cache_of_other_backend(lexicon):
+    """Test that a cache holding another backend's scores is refused."""
+    with pytest.raises(ValueError):
+        RedditCommentEnricher(SentimentCache(None), sentiment_backend=lexicon)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_enricher import RedditCommentEnricher, RedditPostEnricher
+from src.sentiment_cache import SentimentCache
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    """Fixture to provide the path of an on-disk sentiment cache."""
+    return str(tmp_path / "sentiment_cache.sqlite")
+
+
+def test_get_many_counts_hits_and_misses(cache_path):
+    """Test that lookups count hits and misses across both tiers."""
+    cache = SentimentCache(cache_path, max_memory_items=1)
+    cache.put_many({"good": 0.7, "bad": -0.7})
+    cache.flush()
+
+    found = cache.get_many(["good", "bad", "unknown"])
+
+    assert found == {"good": 0.7, "bad": -0.7}
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_scores_persist_across_instances(cache_path):
+    """Test that flushed scores are found by a new cache on the same file."""
+    cache = SentimentCache(cache_path)
+    cache.put_many({"[deleted]": 0.0})
+    cache.close()
+
+    reopened = SentimentCache(cache_path)
+
+    assert reopened.get_or_compute("[deleted]", lambda text: 1.0) == 0.0
+    assert reopened.hits == 1
+
+
+def test_memory_tier_is_bounded():
+    """Test that the LRU tier evicts the least recently used score."""
+    cache = SentimentCache(None, max_memory_items=2)
+    cache.put_many({"a": 0.1, "b": 0.2})
+    cache.get_many(["a"])
+    cache.put_many({"c": 0.3})
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": 0.1, "c": 0.3}
+
+
+def test_enrichers_share_cache(cache_path, mocker):
+    """Test that post and comment enrichers score repeated text only once."""
+    scorer = mocker.patch(
+        "src.sentiment.TextBlobBackend.score",
+        side_effect=lambda texts: np.full(len(texts), 0.5),
+    )
+    cache = SentimentCache(cache_path)
+    posts = pd.DataFrame({"title": ["great news", "great news"], "created_utc": [0, 0]})
+    comments = pd.DataFrame({"body": ["great news", ""], "created_utc": [0, 0]})
+
+    RedditPostEnricher(cache).run(posts)
+    enriched = RedditCommentEnricher(cache).run(comments)
+
+    scorer.assert_called_once_with(["great news"])
+    assert enriched["sentiment_score"].tolist() == [0.5, 0.0]
+
+
+def test_namespaces_keep_backends_apart(cache_path):
+    """Test that scores of different backends are cached separately."""
+    cache = SentimentCache(cache_path)
+    cache.put_many({"great news": 0.8})
+    cache.flush()
+    lexicon = SentimentCache(cache_path, namespace="lexicon-textblob")
+
+    assert SentimentCache(cache_path).get_many(["great news"]) == {"great news": 0.8}
+    assert lexicon.get_many(["great news"]) == {}
@@ -0,0 +1,116 @@
+import pytest
+from src.data_cleaner import RedditCommentCleaner
+from src.data_enricher import RedditCommentEnricher
+from src.data_filter import RedditCommentFilter
+from src.pipeline_manager import PipelineManager
+from src.sharded_crawl import CrawlWorker, plan_comment_shards, plan_post_shards
+from src.work_queue import WorkQueue
+
+CATEGORIES = {
+    "air": {"subreddits": ["smog", "cities"], "keywords": ["pm2.5"]},
+    "water": {"subreddits": ["rivers"], "keywords": ["flood", "drought"]},
+}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"))
+    yield queue
+    queue.close()
+
+
+def test_plan_post_shards_one_per_subreddit():
+    """Test that every (category, subreddit) becomes a shard."""
+    shards = plan_post_shards(CATEGORIES)
+
+    assert [shard_id for shard_id, _, _ in shards] == [
+        "posts/air/smog",
+        "posts/air/cities",
+        "posts/water/rivers",
+    ]
+    assert shards[2][2] == {
+        "category": "water",
+        "subreddit": "rivers",
+        "keywords": ["flood", "drought"],
+    }
+
+
+def test_plan_comment_shards_splits_posts():
+    """Test that kept posts are split into fixed-size comment shards."""
+    shards = plan_comment_shards("posts/air/smog", {"c": 3, "a": 1, "b": 2}, size=2)
+
+    assert shards == [
+        (
+            "comments/posts/air/smog/0",
+            "comments",
+            {"post_ids": ["a", "b"], "num_comments": {"a": 1, "b": 2}},
+        ),
+        (
+            "comments/posts/air/smog/1",
+            "comments",
+            {"post_ids": ["c"], "num_comments": {"c": 3}},
+        ),
+    ]
+
+
+def test_worker_runs_post_shards_then_their_comment_shards(queue, mocker):
+    """Test that a worker crawls the comments of the posts it kept."""
+    queue.add(plan_post_shards(CATEGORIES))
+    run_posts = mocker.Mock(side_effect=lambda payload: {f"{payload['subreddit']}1": 4})
+    run_comments = mocker.Mock()
+    worker = CrawlWorker(queue, "w1", run_posts, run_comments, poll_interval=0)
+
+    assert worker.run() == 6
+    assert sorted(
+        call.args[0]["post_ids"][0] for call in run_comments.call_args_list
+    ) == ["cities1", "rivers1", "smog1"]
+    assert queue.counts() == {"pending": 0, "leased": 0, "done": 6, "failed": 0}
+
+
+def test_worker_returns_failed_shard_to_queue(queue, mocker):
+    """Test that a shard whose work raised is retried, not completed."""
+    queue.add(plan_post_shards({"air": {"subreddits": ["smog"], "keywords": []}}))
+    run_posts = mocker.Mock(side_effect=[RuntimeError("rate limited"), {}])
+    worker = CrawlWorker(queue, "w1", run_posts, mocker.Mock(), poll_interval=0)
+
+    assert worker.run() == 2
+    assert run_posts.call_count == 2
+    assert queue.counts()["done"] == 1
+
+
+def test_worker_retries_shard_whose_store_failed(queue, mocker):
+    """Test that a pipeline failing to store fails its shard."""
+    queue.add(plan_post_shards({"air": {"subreddits": ["smog"], "keywords": []}}))
+    db_manager = mocker.Mock()
+    db_manager.run.side_effect = [RuntimeError("connection lost"), None]
+
+    def run_posts(payload):
+        fetcher = mocker.Mock()
+        fetcher.stream.return_value = iter(
+            [
+                {
+                    "id": "c1",
+                    "post_id": "p1",
+                    "author": "User",
+                    "subreddit": "smog",
+                    "body": "Smog again",
+                    "score": 1,
+                    "created_utc": 1700000000,
+                }
+            ]
+        )
+        PipelineManager(
+            fetcher=fetcher,
+            cleaner=RedditCommentCleaner(),
+            enricher=RedditCommentEnricher(),
+            filter=RedditCommentFilter(),
+            db_manager=db_manager,
+            raise_store_errors=True,
+        ).run()
+        return {}
+
+    worker = CrawlWorker(queue, "w1", run_posts, mocker.Mock(), poll_interval=0)
+
+    assert worker.run() == 2
+    assert db_manager.run.call_count == 2
+    assert queue.counts()["done"] == 1
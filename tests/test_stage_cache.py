@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.stage_cache import StageCache
+
+
+@pytest.fixture
+def data():
+    """Fixture to provide a stage output with a categorical column."""
+    return pd.DataFrame(
+        {
+            "id": ["c1", "c2"],
+            "subreddit": pd.Categorical(["a", "b"]),
+            "sentiment_score": pd.Series([0.5, -0.1], dtype="float32"),
+        }
+    )
+
+
+def test_outputs_are_read_back_with_their_dtypes(data, tmp_path):
+    """Test that a stored output is found again, unchanged."""
+    cache = StageCache(str(tmp_path))
+    key = StageCache.key("enrich", "config", StageCache.fingerprint(data))
+
+    assert cache.get(key) is None
+    cache.put(key, data)
+
+    pd.testing.assert_frame_equal(StageCache(str(tmp_path)).get(key), data)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_fingerprint_depends_on_values_index_and_dtypes(data):
+    """Test that any change of the input changes its fingerprint."""
+    fingerprint = StageCache.fingerprint(data)
+    changed_value = data.assign(id=["c1", "c3"])
+    changed_dtype = data.astype({"sentiment_score": "float64"})
+
+    assert StageCache.fingerprint(data.copy()) == fingerprint
+    assert StageCache.fingerprint(changed_value) != fingerprint
+    assert StageCache.fingerprint(data.set_axis([5, 6])) != fingerprint
+    assert StageCache.fingerprint(changed_dtype) != fingerprint
+
+
+def test_fingerprint_serialises_lists_of_dicts():
+    """Test that columns holding lists of dicts, e.g. matches, are hashed."""
+    data = pd.DataFrame({"id": ["p1", "p2"], "matches": [[{"keyword": "solar"}], []]})
+    changed = data.assign(matches=[[{"keyword": "wind"}], []])
+
+    assert StageCache.fingerprint(data) == StageCache.fingerprint(data.copy())
+    assert StageCache.fingerprint(changed) != StageCache.fingerprint(data)
+
+
+def test_fingerprint_serialises_arrays():
+    """Test that array cells, e.g. matches read from Parquet, are hashed."""
+    matches = np.empty(1, dtype=object)
+    matches[0] = {"keyword": "solar", "ids": np.array([1])}
+    data = pd.DataFrame({"id": ["p1"], "matches": pd.Series([matches], dtype=object)})
+    as_lists = pd.DataFrame(
+        {"id": ["p1"], "matches": [[{"keyword": "solar", "ids": [1]}]]}
+    )
+
+    assert StageCache.fingerprint(data) == StageCache.fingerprint(as_lists)
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+from src.staged_executor import ClosableQueue, Stage, StagedExecutor
+
+
+def test_all_items_pass_through_every_stage():
+    """Test that every item is processed by every stage exactly once."""
+    executor = StagedExecutor(
+        [Stage("double", lambda x: 2 * x, workers=3), Stage("inc", lambda x: x + 1)],
+        queue_size=2,
+    )
+
+    result = executor.run(range(50))
+
+    assert sorted(result) == [2 * x + 1 for x in range(50)]
+
+
+def test_queues_apply_backpressure():
+    """Test that a slow stage stops the source from running ahead."""
+    produced = []
+    release = threading.Event()
+
+    def source():
+        for item in range(100):
+            produced.append(item)
+            yield item
+
+    def slow(item):
+        release.wait()
+        return item
+
+    executor = StagedExecutor([Stage("slow", slow)], queue_size=2)
+    results = executor.run(source())
+    consumer = threading.Thread(target=lambda: list(results))
+    consumer.start()
+    time.sleep(0.3)
+
+    assert len(produced) <= 5
+    release.set()
+    consumer.join()
+    assert len(produced) == 100
+
+
+@pytest.mark.parametrize("failing_stage", ["source", "stage"])
+def test_first_error_is_raised_to_consumer(failing_stage):
+    """Test that an error in the source or a stage stops the execution."""
+
+    def source():
+        yield 1
+        if failing_stage == "source":
+            raise ValueError("source failed")
+        yield 2
+
+    def stage(item):
+        if failing_stage == "stage":
+            raise ValueError("stage failed")
+        return item
+
+    executor = StagedExecutor([Stage("stage", stage), Stage("next", lambda x: x)])
+
+    with pytest.raises(ValueError, match=f"{failing_stage} failed"):
+        list(executor.run(source()))
+
+
+def test_closable_queue_iterates_until_closed():
+    """Test that a consumer receives items put before the queue was closed."""
+    items = ClosableQueue()
+    producer = threading.Thread(
+        target=lambda: [items.put(i) for i in range(3)] + [items.close()]
+    )
+    producer.start()
+
+    assert list(items) == [0, 1, 2]
+    producer.join()
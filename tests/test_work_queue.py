@@ -0,0 +1,58 @@
+import pytest
+from src.work_queue import WorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    """Queue with two shards in a temporary file."""
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), max_attempts=2)
+    queue.add([("a", "posts", {"n": 1}), ("b", "posts", {"n": 2})])
+    yield queue
+    queue.close()
+
+
+def test_claims_hand_out_every_shard_once(queue):
+    """Test that leased shards are not claimed by another worker."""
+    first = queue.claim("w1", lease_seconds=60)
+    second = queue.claim("w2", lease_seconds=60)
+
+    assert (first.id, first.payload, first.attempts) == ("a", {"n": 1}, 1)
+    assert second.id == "b"
+    assert queue.claim("w3", lease_seconds=60) is None
+    assert queue.unfinished() == 2
+
+
+def test_expired_lease_is_claimed_again(queue, mocker):
+    """Test that the shard of a dead worker goes to another worker."""
+    clock = mocker.patch("src.work_queue.time.time", return_value=1000.0)
+    queue.claim("w1", lease_seconds=10)
+    queue.claim("w1", lease_seconds=10)
+
+    clock.return_value = 1011.0
+    shard = queue.claim("w2", lease_seconds=10)
+
+    assert (shard.id, shard.attempts) == ("a", 2)
+    assert not queue.renew("a", "w1", lease_seconds=10)
+    assert queue.renew("a", "w2", lease_seconds=10)
+
+
+def test_complete_is_idempotent(queue):
+    """Test that completing twice adds the produced shards once."""
+    queue.claim("w1", lease_seconds=60)
+    children = [("a/0", "comments", {"post_ids": ["p"]})]
+
+    assert queue.complete("a", "w1", children)
+    assert not queue.complete("a", "w2", children)
+    assert queue.add(children) == 0
+    assert queue.counts() == {"pending": 2, "leased": 0, "done": 1, "failed": 0}
+
+
+def test_failed_shard_is_retried_then_given_up(queue):
+    """Test that a shard is given up after max_attempts failed claims."""
+    for _ in range(2):
+        shard = queue.claim("w1", lease_seconds=60)
+        assert shard.id == "a"
+        queue.fail("a", "w1", "boom")
+
+    assert queue.claim("w1", lease_seconds=60).id == "b"
+    assert queue.counts()["failed"] == 1